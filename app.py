@@ -1,70 +1,136 @@
 import os
-from flask import Flask, Response
+from importlib import import_module
+
+from flask import Flask, Response, jsonify
 from flask_cors import CORS
 from dotenv import load_dotenv
+from mysql.connector.errors import PoolError
+from db import set_db_session
 
 load_dotenv()
 
 is_debug = os.getenv("FLASK_DEBUG", "false").lower() == "true"
+# embedded: web processes run the scheduler (one elected leader executes jobs)
+# standalone: jobs run only in `python scheduler.py`
+scheduler_mode = os.getenv("SCHEDULER_MODE", "embedded").lower()
+
+# Blueprints as (module, attribute, url_prefix). Controllers and their
+# services are imported by create_app(), not when this module is imported.
+BLUEPRINTS = [
+    ("controllers.auth_controller", "auth_controller_bp", "/api"),
+    ("controllers.project_controller", "project_bp", "/api"),
+    ("controllers.call_logs_controller", "call_logs_bp", "/api/calls"),
+    ("controllers.user_controller", "user_controller_bp", "/api"),
+    ("controllers.leads_controller", "leads_bp", "/api/leads"),
+    ("controllers.lead_status_history_controller", "lead_status_history_bp", "/api"),
+    ("controllers.audit_controller", "audit_controller_bp", "/api"),
+    ("controllers.reports_controller", "reports_bp", "/api/reports"),
+    ("controllers.notification_controller", "notification_bp", "/api/notifications"),
+    ("controllers.project_assignment_controller", "project_assignment_bp", "/api"),
+    ("controllers.lead_transfer_controller", "lead_transfer_bp", "/api"),
+    ("controllers.mcube_controller", "mcube_bp", "/api/calls"),
+    ("controllers.webhook_controller", "webhook_bp", "/api/webhook"),
+    ("controllers.website_leads_controller", "website_leads_bp", "/api/website"),
+    ("controllers.bulk_upload_controller", "bulk_upload_bp", "/api"),
+    ("controllers.report_email_controller", "report_email_bp", "/api"),
+    ("controllers.ops_controller", "ops_bp", "/api"),
+    ("controllers.metrics_controller", "metrics_bp", None),
+    ("controllers.health_controller", "health_bp", None),
+]
+
+
+def create_app(blueprints=None, init_services=True):
+    """
+    Build the Flask app.
+
+    blueprints     - module names to register (e.g. ["leads_controller"]);
+                     all of BLUEPRINTS by default. Tests that exercise one
+                     area can skip importing the rest.
+    init_services  - run the user schema check and start the scheduler and
+                     MCube workers. Off for tests and scripts.
+
+    The DB pool is not touched here; it is created on the first get_db().
+    """
+    from utils.request_profiler import init_request_profiling
+    from utils.json_provider import FastJSONProvider
+    from utils.compression import init_compression
+
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    allowed_origins = os.getenv("CORS_ORIGINS", "http://localhost:4200").split(",")
+    CORS(app, origins=allowed_origins, supports_credentials=True)
+    init_request_profiling(app)
+    init_compression(app)
+
+    # Security headers on every response
+    @app.after_request
+    def set_security_headers(response: Response):
+        response.headers["X-Content-Type-Options"] = "nosniff"
+        response.headers["X-Frame-Options"] = "DENY"
+        response.headers["X-XSS-Protection"] = "1; mode=block"
+        response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
+        response.headers["Cache-Control"] = "no-store"
+        return response
+
+    # Worker threads are reused; don't carry the last request's DB session over
+    @app.before_request
+    def reset_db_session():
+        set_db_session(None)
+
+    # Pool exhausted: tell the client to back off instead of a bare 500
+    @app.errorhandler(PoolError)
+    def handle_pool_exhausted(e):
+        response = jsonify({"error": "Server is busy, please retry shortly"})
+        response.status_code = 503
+        response.headers["Retry-After"] = "2"
+        return response
+
+    # Register Blueprints
+    wanted = set(blueprints) if blueprints is not None else None
+    for module_name, attribute, url_prefix in BLUEPRINTS:
+        if wanted is not None and module_name.rsplit(".", 1)[-1] not in wanted:
+            continue
+        blueprint = getattr(import_module(module_name), attribute)
+        app.register_blueprint(blueprint, url_prefix=url_prefix)
+
+    if init_services:
+        _init_services(app)
+
+    return app
+
+
+def _init_services(app):
+    from services.scheduler_service import init_scheduler
+    from services.mcube_ingest_service import init_mcube_workers
+    from services.schema_service import run_schema_migrations
+
+    # Schema changes, kept off the request path (also runnable as a deploy step)
+    try:
+        failed = run_schema_migrations()
+        if failed:
+            print(f"Schema migrations failed: {', '.join(failed)}")
+    except Exception as e:
+        print(f"Schema migrations skipped: {e}")
+
+    # Initialize scheduler only once in debug/reloader mode.
+    if not is_debug or os.getenv("WERKZEUG_RUN_MAIN") == "true":
+        if scheduler_mode != "standalone":
+            init_scheduler(app)
+        init_mcube_workers()
+
 
-# Import Blueprints
-from controllers.project_controller import project_bp
-from controllers.call_logs_controller import call_logs_bp
-from controllers.user_controller import user_controller_bp 
-from controllers.auth_controller import auth_controller_bp
-from controllers.leads_controller import leads_bp
-from controllers.lead_status_history_controller import lead_status_history_bp
-from controllers.audit_controller import audit_controller_bp
-from controllers.reports_controller import reports_bp
-from services.scheduler_service import init_scheduler
-from controllers.notification_controller import notification_bp
-from controllers.project_assignment_controller import project_assignment_bp
-from controllers.lead_transfer_controller import lead_transfer_bp
-from controllers.mcube_controller import mcube_bp
-from controllers.webhook_controller import webhook_bp
-from controllers.bulk_upload_controller import bulk_upload_bp
-from controllers.website_leads_controller import website_leads_bp
-from controllers.report_email_controller import report_email_bp
-
-app = Flask(__name__)
-allowed_origins = os.getenv("CORS_ORIGINS", "http://localhost:4200").split(",")
-CORS(app, origins=allowed_origins, supports_credentials=True)
-
-# Security headers on every response
-@app.after_request
-def set_security_headers(response: Response):
-    response.headers["X-Content-Type-Options"] = "nosniff"
-    response.headers["X-Frame-Options"] = "DENY"
-    response.headers["X-XSS-Protection"] = "1; mode=block"
-    response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-    response.headers["Cache-Control"] = "no-store"
-    return response
-
-# Initialize scheduler only once in debug/reloader mode.
-if not is_debug or os.getenv("WERKZEUG_RUN_MAIN") == "true":
-    init_scheduler(app)
-
-
-# Register Blueprints
-app.register_blueprint(auth_controller_bp, url_prefix='/api')
-app.register_blueprint(project_bp, url_prefix="/api")
-app.register_blueprint(call_logs_bp, url_prefix="/api/calls")
-app.register_blueprint(user_controller_bp, url_prefix="/api")
-app.register_blueprint(leads_bp, url_prefix="/api/leads")
-app.register_blueprint(lead_status_history_bp, url_prefix='/api')
-app.register_blueprint(audit_controller_bp, url_prefix="/api")
-app.register_blueprint(reports_bp, url_prefix="/api/reports")
-app.register_blueprint(notification_bp, url_prefix="/api/notifications")
-app.register_blueprint(project_assignment_bp, url_prefix="/api")
-app.register_blueprint(lead_transfer_bp, url_prefix="/api")
-app.register_blueprint(mcube_bp, url_prefix="/api/calls")
-app.register_blueprint(webhook_bp, url_prefix="/api/webhook")
-app.register_blueprint(website_leads_bp, url_prefix="/api/website")
-app.register_blueprint(bulk_upload_bp, url_prefix="/api")
-app.register_blueprint(report_email_bp, url_prefix="/api")
+_default_app = None
 
 
+def __getattr__(name):
+    # `app:app` (gunicorn, flask run) builds the default app on first access
+    global _default_app
+    if name == "app":
+        if _default_app is None:
+            _default_app = create_app()
+        return _default_app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5000, debug=is_debug)
+    create_app().run(host="0.0.0.0", port=5000, debug=is_debug)
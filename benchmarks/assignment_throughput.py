@@ -0,0 +1,90 @@
+"""
+Lead assignment throughput under concurrency.
+
+Runs assign_next_employee() from several threads against the configured
+database and reports assignments/sec, latency percentiles and how evenly
+the project's roster was covered. It advances the real tracker row for the
+project, so point it at a staging database.
+
+    python -m benchmarks.assignment_throughput --project P001 --threads 16 --per-thread 50
+"""
+import argparse
+import statistics
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from services.lead_assignment_service import (  # noqa: E402
+    ASSIGNMENT_STRATEGIES,
+    assign_next_employee,
+)
+
+
+def run(project_id, threads, per_thread, strategy):
+    latencies = []
+    assignees = Counter()
+    errors = []
+    lock = threading.Lock()
+    start_gate = threading.Barrier(threads)
+
+    def worker():
+        start_gate.wait()
+        for _ in range(per_thread):
+            started = time.perf_counter()
+            try:
+                emp_id = assign_next_employee(project_id, strategy=strategy)
+            except Exception as e:
+                with lock:
+                    errors.append(str(e))
+                continue
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                assignees[emp_id] += 1
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    began = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    wall = time.perf_counter() - began
+
+    return wall, latencies, assignees, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--project", required=True, help="project_id with mapped SALES_EXEC users")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--per-thread", type=int, default=50)
+    parser.add_argument("--strategy", choices=ASSIGNMENT_STRATEGIES, default=None)
+    args = parser.parse_args()
+
+    wall, latencies, assignees, errors = run(args.project, args.threads, args.per_thread, args.strategy)
+
+    total = sum(assignees.values())
+    print(f"assignments:  {total} in {wall:.2f}s ({total / wall:.1f}/s)")
+    if latencies:
+        ordered = sorted(latencies)
+        p95 = ordered[int(len(ordered) * 0.95) - 1] if len(ordered) > 1 else ordered[0]
+        print(f"latency ms:   p50={statistics.median(ordered) * 1000:.1f} p95={p95 * 1000:.1f} max={ordered[-1] * 1000:.1f}")
+    if assignees:
+        counts = assignees.values()
+        print(f"distribution: {len(assignees)} reps, min={min(counts)} max={max(counts)}")
+        for emp_id, count in sorted(assignees.items()):
+            print(f"  {emp_id}: {count}")
+    if errors:
+        print(f"errors:       {len(errors)} (first: {errors[0]})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Click2Call client against a local MCube stand-in.
+
+Starts a throwaway HTTP server that answers like the Click2Call endpoint
+(optionally slow, failing or flaky), fires concurrent calls through
+services.mcube_client and prints latency, retry and breaker figures. No
+database or MCube account is needed.
+
+    python -m benchmarks.click2call_client --threads 8 --calls 200
+    python -m benchmarks.click2call_client --mode flaky --fail-every 3
+    python -m benchmarks.click2call_client --mode down
+"""
+import argparse
+import json
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services import mcube_client  # noqa: E402
+
+
+def make_handler(mode, delay, fail_every):
+    counter = {"n": 0}
+    lock = threading.Lock()
+
+    class StandIn(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+
+            with lock:
+                counter["n"] += 1
+                n = counter["n"]
+
+            if delay:
+                time.sleep(delay)
+
+            if mode == "down" or (mode == "flaky" and n % fail_every == 0):
+                status, payload = 503, {"status": "error", "message": "busy"}
+            else:
+                status, payload = 200, {"status": "success", "callid": f"SIM{n}", "agent": body.get("agent")}
+
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    return StandIn, counter
+
+
+def run(url, threads, calls):
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    per_thread = max(calls // threads, 1)
+
+    def worker(index):
+        for i in range(per_thread):
+            started = time.perf_counter()
+            try:
+                mcube_client.post_json(url, {"api_key": "local", "agent": f"90000{index:05d}", "destination": f"8{i:09d}"})
+            except Exception as e:
+                with lock:
+                    errors.append(type(e).__name__)
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - started)
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    began = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return time.perf_counter() - began, latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--mode", choices=("ok", "flaky", "down"), default="ok")
+    parser.add_argument("--delay", type=float, default=0.02, help="stand-in response delay in seconds")
+    parser.add_argument("--fail-every", type=int, default=4, help="flaky mode: every Nth request gets a 503")
+    args = parser.parse_args()
+
+    handler, counter = make_handler(args.mode, args.delay, args.fail_every)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/click2call"
+
+    try:
+        wall, latencies, errors = run(url, args.threads, args.calls)
+    finally:
+        server.shutdown()
+
+    done = len(latencies)
+    print(f"calls:        {done} ok, {len(errors)} failed in {wall:.2f}s ({done / wall:.1f}/s)")
+    print(f"server hits:  {counter['n']}")
+    if latencies:
+        ordered = sorted(latencies)
+        p95 = ordered[int(len(ordered) * 0.95) - 1] if len(ordered) > 1 else ordered[0]
+        print(f"latency ms:   p50={statistics.median(ordered) * 1000:.1f} p95={p95 * 1000:.1f} max={ordered[-1] * 1000:.1f}")
+    if errors:
+        print(f"errors:       {', '.join(sorted(set(errors)))}")
+    print(json.dumps(mcube_client.get_click2call_metrics(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
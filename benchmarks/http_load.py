@@ -0,0 +1,163 @@
+"""
+HTTP load test against a running server, or against gunicorn started here
+once per worker class so gthread and gevent can be compared on one box.
+
+Each client thread keeps its own keep-alive session and cycles through the
+given paths for --duration seconds; prints throughput, p50/p95/p99 and
+status counts. Authenticated endpoints need a token (--token, or the
+BENCH_TOKEN environment variable).
+
+    python -m benchmarks.http_load --url http://localhost:5000 --path /api/leads --concurrency 50
+    python -m benchmarks.http_load --worker-class gthread,gevent --path /health/ready --path /api/leads
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import requests  # noqa: E402
+from dotenv import load_dotenv  # noqa: E402
+
+load_dotenv()
+
+READY_TIMEOUT = 60
+
+
+def _percentile(samples, pct):
+    return samples[min(int(len(samples) * pct), len(samples) - 1)]
+
+
+def run_load(base_url, paths, concurrency, duration, headers):
+    samples = []
+    statuses = Counter()
+    errors = Counter()
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client(offset):
+        session = requests.Session()
+        session.headers.update(headers)
+        local_samples = []
+        local_statuses = Counter()
+        local_errors = Counter()
+        n = offset
+        while time.monotonic() < deadline:
+            path = paths[n % len(paths)]
+            n += 1
+            started = time.perf_counter()
+            try:
+                response = session.get(base_url + path, timeout=30)
+                response.content
+                local_statuses[response.status_code] += 1
+            except requests.RequestException as e:
+                local_errors[type(e).__name__] += 1
+                continue
+            local_samples.append(time.perf_counter() - started)
+        with lock:
+            samples.extend(local_samples)
+            statuses.update(local_statuses)
+            errors.update(local_errors)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    started = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - started
+
+    samples.sort()
+    return {
+        "requests": len(samples),
+        "rps": len(samples) / elapsed if elapsed else 0,
+        "p50": _percentile(samples, 0.50) * 1000 if samples else None,
+        "p95": _percentile(samples, 0.95) * 1000 if samples else None,
+        "p99": _percentile(samples, 0.99) * 1000 if samples else None,
+        "statuses": dict(sorted(statuses.items())),
+        "errors": dict(errors),
+    }
+
+
+def report(label, result):
+    if not result["requests"]:
+        print(f"{label:<10} no successful requests  errors={result['errors']}")
+        return
+    print(
+        f"{label:<10} {result['requests']:>7} req  {result['rps']:8.1f} req/s  "
+        f"p50={result['p50']:7.1f}ms  p95={result['p95']:7.1f}ms  p99={result['p99']:7.1f}ms  "
+        f"status={result['statuses']}"
+        + (f"  errors={result['errors']}" if result["errors"] else "")
+    )
+
+
+def _wait_ready(base_url, process):
+    deadline = time.monotonic() + READY_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"gunicorn exited with code {process.returncode}")
+        try:
+            if requests.get(base_url + "/health/ready", timeout=2).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    raise SystemExit(f"server not ready after {READY_TIMEOUT}s")
+
+
+def run_gunicorn(worker_class, bind, args, headers):
+    env = dict(os.environ, GUNICORN_WORKER_CLASS=worker_class, GUNICORN_BIND=bind,
+               GUNICORN_ACCESS_LOG="/dev/null")
+    if args.workers:
+        env["GUNICORN_WORKERS"] = str(args.workers)
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:create_app()"],
+        cwd=ROOT, env=env,
+    )
+    base_url = f"http://{bind}"
+    try:
+        _wait_ready(base_url, process)
+        return run_load(base_url, args.path, args.concurrency, args.duration, headers)
+    finally:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout=60)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:5000", help="server to hit when not starting gunicorn")
+    parser.add_argument("--path", action="append", help="request path, repeatable (default /health/ready)")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=30, help="seconds per run")
+    parser.add_argument("--token", default=os.getenv("BENCH_TOKEN"), help="bearer token for authenticated paths")
+    parser.add_argument("--worker-class", help="comma-separated gunicorn worker classes to start and compare")
+    parser.add_argument("--workers", type=int, help="override the worker count gunicorn.conf.py derives")
+    parser.add_argument("--bind", default="127.0.0.1:5055", help="address for the gunicorn started here")
+    args = parser.parse_args()
+    args.path = args.path or ["/health/ready"]
+
+    headers = {"Accept-Encoding": "gzip"}
+    if args.token:
+        headers["Authorization"] = f"Bearer {args.token}"
+
+    print(f"paths={args.path} concurrency={args.concurrency} duration={args.duration:.0f}s")
+    if not args.worker_class:
+        report("server", run_load(args.url.rstrip("/"), args.path, args.concurrency, args.duration, headers))
+        return
+
+    for worker_class in args.worker_class.split(","):
+        report(worker_class, run_gunicorn(worker_class.strip(), args.bind, args, headers))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Startup cost: import time per entry point, with a budget to catch regressions.
+
+Each target runs in a fresh interpreter under `python -X importtime`,
+--runs times; the median wall time is compared with its budget and the
+slowest modules (cumulative, from the last run) are listed. Exits 1 when
+any target is over budget, so it can run in CI.
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --runs 9 --top 25
+    python -m benchmarks.import_time --target "import services.leads_service" --budget-ms 150
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# statement -> budget in ms (median wall time of a cold import, no DB)
+TARGETS = {
+    "import app": 300,
+    "import app; app.create_app(init_services=False)": 650,
+    "import db": 120,
+}
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+_TIMER = (
+    "import time as _t\n"
+    "_started = _t.perf_counter()\n"
+    "{statement}\n"
+    "print(_t.perf_counter() - _started)\n"
+)
+
+
+def measure(statement):
+    """Wall seconds and [(module, self_us, cumulative_us, depth)] for one cold run."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _TIMER.format(statement=statement)],
+        cwd=ROOT, capture_output=True, text=True,
+        # no DB or PEM access is expected at import; keep whatever env is set
+        env=dict(os.environ, PYTHONDONTWRITEBYTECODE="1"),
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"{statement!r} failed:\n{result.stderr[-2000:]}")
+
+    modules = []
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return float(result.stdout.strip().splitlines()[-1]), modules
+
+
+def slowest(modules, top):
+    """Top-level imports (depth 0/1) ranked by cumulative time."""
+    shallow = [m for m in modules if m[3] <= 1]
+    return sorted(shallow, key=lambda m: m[2], reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="slowest modules to list per target")
+    parser.add_argument("--target", help="measure only this statement")
+    parser.add_argument("--budget-ms", type=float, help="budget for --target")
+    args = parser.parse_args()
+
+    targets = {args.target: args.budget_ms} if args.target else TARGETS
+
+    over_budget = []
+    for statement, budget in targets.items():
+        samples = []
+        modules = []
+        for _ in range(args.runs):
+            wall, modules = measure(statement)
+            samples.append(wall * 1000)
+        median = statistics.median(samples)
+        verdict = ""
+        if budget is not None:
+            verdict = f"  budget {budget:.0f}ms " + ("OK" if median <= budget else "OVER")
+            if median > budget:
+                over_budget.append(statement)
+
+        print(f"\n{statement}")
+        print(f"  median {median:7.1f}ms  min {min(samples):7.1f}ms  max {max(samples):7.1f}ms{verdict}")
+        for name, self_us, cumulative_us, depth in slowest(modules, args.top):
+            print(f"  {cumulative_us / 1000:8.1f}ms  {'  ' * depth}{name}")
+
+    if over_budget:
+        print(f"\nover budget: {', '.join(over_budget)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
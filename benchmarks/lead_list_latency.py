@@ -0,0 +1,127 @@
+"""
+Lead list latency per role.
+
+Optionally seeds synthetic leads (one customer each) using existing source,
+status, project and SALES_EXEC ids, then times fetch_all_leads() for
+ADMIN, SALES_MGR and SALES_EXEC callers and prints p50/p95 per role.
+Seeding writes real rows, so run it against a scratch copy of the schema
+(point DB_NAME at it).
+
+    python -m benchmarks.lead_list_latency --seed 1000000
+    python -m benchmarks.lead_list_latency --runs 200 --page-size 50
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from db import get_db  # noqa: E402
+from services.leads_service import fetch_all_leads  # noqa: E402
+
+SEED_BATCH = 5000
+SEED_PREFIX = "BENCH"
+
+
+def _ids(cursor, sql):
+    cursor.execute(sql)
+    return [row[0] for row in cursor.fetchall()]
+
+
+def _reference_ids(cursor):
+    refs = {
+        "sources": _ids(cursor, "SELECT source_id FROM lead_sources"),
+        "statuses": _ids(cursor, "SELECT status_id FROM lead_status"),
+        "projects": _ids(cursor, "SELECT project_id FROM project_registration"),
+        "execs": _ids(cursor, "SELECT emp_id FROM employee WHERE role_id = 'SALES_EXEC' AND emp_status = 'Active'"),
+    }
+    missing = [name for name, values in refs.items() if not values]
+    if missing:
+        raise SystemExit(f"Need at least one row for: {', '.join(missing)}")
+    return refs
+
+
+def seed(total):
+    conn = get_db()
+    cursor = conn.cursor()
+    try:
+        refs = _reference_ids(cursor)
+        cursor.execute("SELECT COUNT(*) FROM leads WHERE lead_id LIKE %s", (f"{SEED_PREFIX}%",))
+        start = cursor.fetchone()[0]
+
+        for offset in range(start, total, SEED_BATCH):
+            stop = min(offset + SEED_BATCH, total)
+            customers = []
+            leads = []
+            for n in range(offset, stop):
+                customer_id = f"{SEED_PREFIX}C{n}"
+                customers.append((customer_id, f"Bench{n}", "Lead", f"+91{7000000000 + n}"))
+                leads.append((
+                    f"{SEED_PREFIX}L{n}", customer_id,
+                    random.choice(refs["sources"]), random.choice(refs["statuses"]),
+                    random.choice(refs["execs"]), random.choice(refs["projects"]),
+                    random.randint(0, 3 * 365 * 86400),
+                ))
+            cursor.executemany("""
+                INSERT INTO customer (customer_id, customer_first_name, customer_last_name, phone_num, created_on, is_active)
+                VALUES (%s, %s, %s, %s, NOW(), 1)
+            """, customers)
+            cursor.executemany("""
+                INSERT INTO leads (lead_id, customer_id, source_id, status_id, emp_id, project_id,
+                                   lead_description, created_on, is_active)
+                VALUES (%s, %s, %s, %s, %s, %s, 'benchmark', NOW() - INTERVAL %s SECOND, 1)
+            """, leads)
+            conn.commit()
+            print(f"seeded {stop}/{total}", end="\r", flush=True)
+        print()
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def time_role(role, actor_ids, runs, page_size):
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fetch_all_leads({"page_size": page_size, "page": 1}, random.choice(actor_ids), role)
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    p95 = samples[max(int(len(samples) * 0.95) - 1, 0)]
+    return statistics.median(samples) * 1000, p95 * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=0, help="top up synthetic leads to this many")
+    parser.add_argument("--runs", type=int, default=100)
+    parser.add_argument("--page-size", type=int, default=50)
+    args = parser.parse_args()
+
+    if args.seed:
+        seed(args.seed)
+
+    conn = get_db()
+    cursor = conn.cursor()
+    try:
+        refs = _reference_ids(cursor)
+        cursor.execute("SELECT COUNT(*) FROM leads WHERE is_active = 1")
+        total = cursor.fetchone()[0]
+    finally:
+        cursor.close()
+        conn.close()
+
+    print(f"active leads: {total}")
+    for role in ("ADMIN", "SALES_MGR", "SALES_EXEC"):
+        p50, p95 = time_role(role, refs["execs"], args.runs, args.page_size)
+        print(f"{role:<11} p50={p50:7.1f}ms  p95={p95:7.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
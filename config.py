@@ -1,4 +1,5 @@
 import os
+from functools import lru_cache
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -8,17 +9,31 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 PRIVATE_KEY_PATH = os.path.join(BASE_DIR, "private.pem")
 PUBLIC_KEY_PATH = os.path.join(BASE_DIR, "public.pem")
 
-with open(PRIVATE_KEY_PATH, "r") as f:
-    PRIVATE_KEY = f.read()
-
-with open(PUBLIC_KEY_PATH, "r") as f:
-    PUBLIC_KEY = f.read()
-
 JWT_ISSUER = os.getenv("JWT_ISSUER")
 JWT_AUDIENCE = os.getenv("JWT_AUDIENCE")
 
-if not PRIVATE_KEY or not PUBLIC_KEY:
-    raise RuntimeError("JWT keys not configured")
+
+# Keys are read on first use, so scripts and tests that never issue or
+# verify a token don't need the PEM files
+def _read_key(path):
+    try:
+        with open(path, "r") as f:
+            key = f.read()
+    except FileNotFoundError:
+        key = None
+    if not key:
+        raise RuntimeError("JWT keys not configured")
+    return key
+
+
+@lru_cache(maxsize=None)
+def get_private_key():
+    return _read_key(PRIVATE_KEY_PATH)
+
+
+@lru_cache(maxsize=None)
+def get_public_key():
+    return _read_key(PUBLIC_KEY_PATH)
 
 SMTP_EMAIL = os.getenv("SMTP_EMAIL")
 SMTP_PASSWORD = os.getenv("SMTP_PASSWORD")
@@ -0,0 +1,3 @@
+# Query budgets (utils/pytest_query_budget.py) apply to every test run;
+# pytester runs small inner suites to test the plugin itself.
+pytest_plugins = ["pytester", "utils.pytest_query_budget"]
@@ -1,7 +1,7 @@
 from flask import Blueprint, request, jsonify
 import jwt, datetime
 from services.auth_service import AuthService
-from config import PRIVATE_KEY, JWT_ISSUER, JWT_AUDIENCE
+from config import get_private_key, JWT_ISSUER, JWT_AUDIENCE
 import logging
 logger = logging.getLogger(__name__)
 from decorators.auth_decorators import token_required
@@ -39,7 +39,7 @@ def login():
         "exp": datetime.datetime.utcnow() + datetime.timedelta(hours=2)
     }
 
-    token = jwt.encode(payload, PRIVATE_KEY, algorithm="RS256")
+    token = jwt.encode(payload, get_private_key(), algorithm="RS256")
 
     return jsonify({
         "access_token": token,
@@ -70,8 +70,41 @@ def get_call_logs(decoded):
 @token_required
 def get_call_logs_ui(decoded):
     from services.call_logs_service import get_call_logs_for_ui
-    logs = get_call_logs_for_ui()
-    return jsonify(logs), 200
+
+    filters = {
+        "emp_id": request.args.get("empId"),
+        "lead_id": request.args.get("leadId"),
+        "status": request.args.get("status"),
+        "source": request.args.get("source"),
+        "start_date": request.args.get("startDate"),
+        "end_date": request.args.get("endDate"),
+    }
+
+    limit = request.args.get("limit")
+    cursor_token = request.args.get("cursor") or None
+    try:
+        limit = int(limit) if limit else None
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+
+    try:
+        page = get_call_logs_for_ui(
+            filters=filters,
+            limit=limit,
+            cursor_token=cursor_token
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # Without limit/cursor keep the bare list the existing screen reads
+    if limit is None and not cursor_token:
+        return jsonify(page["data"]), 200
+
+    return jsonify({
+        "data": page["data"],
+        "nextCursor": page["next_cursor"],
+        "hasMore": page["has_more"]
+    }), 200
 
 
 @call_logs_bp.route("/ui/lead/<lead_id>", methods=["GET"])
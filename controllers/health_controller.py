@@ -0,0 +1,40 @@
+import logging
+import mysql.connector
+from flask import Blueprint, jsonify
+from db import DB_CONFIG
+from utils.lifecycle import is_draining
+
+logger = logging.getLogger(__name__)
+
+health_bp = Blueprint("health_bp", __name__)
+
+READINESS_CONNECT_TIMEOUT = 2
+
+
+@health_bp.route("/health/live", methods=["GET"])
+def liveness():
+    # The process is up and serving; no dependencies checked
+    return jsonify({"status": "ok"}), 200
+
+
+@health_bp.route("/health/ready", methods=["GET"])
+def readiness():
+    if is_draining():
+        return jsonify({"status": "draining"}), 503
+
+    # Own connection, not the pool: a worker that is merely busy is still
+    # ready, and pulling it would push its load onto the others
+    try:
+        conn = mysql.connector.connect(**DB_CONFIG, connection_timeout=READINESS_CONNECT_TIMEOUT)
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+            cursor.close()
+        finally:
+            conn.close()
+    except Exception as e:
+        logger.error(f"Readiness check failed: {e}")
+        return jsonify({"status": "unavailable"}), 503
+
+    return jsonify({"status": "ok"}), 200
@@ -3,6 +3,7 @@ from flask import Blueprint, request, jsonify
 from services import leads_service
 from utils.token_helper import get_emp_id_from_token,get_emp_role_from_token
 from utils.validators import validate_lead_input
+from utils.json_provider import RowMapper, field
 
 leads_bp = Blueprint('leads', __name__)
 
@@ -17,6 +18,48 @@ def _serialize_datetime(value):
 
 
 
+def _multi_value_arg(name):
+    """Accept both ?x=a&x=b and ?x=a,b."""
+    values = []
+    for raw in request.args.getlist(name):
+        values.extend(v.strip() for v in raw.split(',') if v.strip())
+    return values
+
+
+LEAD_FIELDS = [
+    field('id'),
+    field('name'),
+    field('phone'),
+    field('alternatePhone'),
+    field('email'),
+    field('profession'),
+
+    # Display names (for tables, detail views)
+    field('source'),
+    field('status'),
+    field('assignedTo'),
+    field('project'),
+
+    # IDs (for dropdown binding in edit mode)
+    field('sourceId'),
+    field('statusId'),
+    field('assignedToId'),
+    field('projectId'),
+
+    field('description', default=''),
+    field('firstContacted', convert=_serialize_datetime),
+    field('originallyCreatedBy', key=('originallyCreatedBy', 'createdBy')),
+    field('firstAssignedTo', key=('firstAssignedTo', 'assignedTo')),
+    field('currentAssignedTo', key=('currentAssignedTo', 'assignedTo')),
+    field('createdAt', convert=_serialize_datetime),
+    field('createdBy'),
+    field('modifiedAt', convert=_serialize_datetime),
+    field('modifiedBy'),
+]
+
+LEAD_MAPPER = RowMapper(LEAD_FIELDS)
+
+
 def to_frontend_format(backend_lead):
     """
     Maps backend dictionary to frontend camelCase.
@@ -24,37 +67,7 @@ def to_frontend_format(backend_lead):
     """
     if not backend_lead:
         return None
-
-    return {
-        'id':             backend_lead.get('id'),
-        'name':           backend_lead.get('name'),
-        'phone':          backend_lead.get('phone'),
-        'alternatePhone': backend_lead.get('alternatePhone'),
-        'email':          backend_lead.get('email'),
-        'profession':     backend_lead.get('profession'),
-
-        # Display names (for tables, detail views)
-        'source':         backend_lead.get('source'),
-        'status':         backend_lead.get('status'),
-        'assignedTo':     backend_lead.get('assignedTo'),
-        'project':        backend_lead.get('project'),
-
-        # IDs (for dropdown binding in edit mode)
-        'sourceId':       backend_lead.get('sourceId'),
-        'statusId':       backend_lead.get('statusId'),
-        'assignedToId':   backend_lead.get('assignedToId'),
-        'projectId':      backend_lead.get('projectId'),
-
-        'description':    backend_lead.get('description') or '',
-        'firstContacted': _serialize_datetime(backend_lead.get('firstContacted')),
-        'originallyCreatedBy': backend_lead.get('originallyCreatedBy') or backend_lead.get('createdBy'),
-        'firstAssignedTo': backend_lead.get('firstAssignedTo') or backend_lead.get('assignedTo'),
-        'currentAssignedTo': backend_lead.get('currentAssignedTo') or backend_lead.get('assignedTo'),
-        'createdAt':      _serialize_datetime(backend_lead.get('createdAt')),
-        'createdBy':      backend_lead.get('createdBy'),
-        'modifiedAt':     _serialize_datetime(backend_lead.get('modifiedAt')),
-        'modifiedBy':     backend_lead.get('modifiedBy'),
-    }
+    return LEAD_MAPPER.map([backend_lead])[0]
 
 
 # ──────────────────────────────────────────────
@@ -65,19 +78,67 @@ def get_leads():
     try:
         actor_id = get_emp_id_from_token()
         role = get_emp_role_from_token()
-        
-        print("ACTOR:", actor_id)
-        print("ROLE:", role)
 
         filters = {
-            'customer': request.args.get('customer'),
-            'mobile':   request.args.get('mobile'),
-            'source':   request.args.get('source'),
-            'employee': request.args.get('employee'),
-            'project':  request.args.get('project'),
+            'customer':      request.args.get('customer'),
+            'mobile':        request.args.get('mobile'),
+            'source':        request.args.get('source'),
+            'employee':      request.args.get('employee'),
+            'project':       request.args.get('project'),
+            'source_ids':    _multi_value_arg('sourceId'),
+            'status_ids':    _multi_value_arg('statusId'),
+            'emp_ids':       _multi_value_arg('assignedToId'),
+            'project_ids':   _multi_value_arg('projectId'),
+            'created_from':  request.args.get('createdFrom'),
+            'created_to':    request.args.get('createdTo'),
+            'modified_from': request.args.get('modifiedFrom'),
+            'modified_to':   request.args.get('modifiedTo'),
         }
-        leads = leads_service.fetch_all_leads(filters, actor_id, role)
-        return jsonify([to_frontend_format(lead) for lead in leads]), 200
+
+        if request.args.get('pageSize'):
+            try:
+                filters['page_size'] = min(max(int(request.args['pageSize']), 1), 500)
+                filters['page'] = int(request.args.get('page', 1))
+            except ValueError:
+                return jsonify({'error': 'page and pageSize must be integers'}), 400
+
+        result = leads_service.fetch_all_leads(filters, actor_id, role)
+        leads = LEAD_MAPPER.map(result["data"])
+        if result["page"] is None:
+            # Unpaged callers keep getting the bare list
+            return jsonify(leads), 200
+
+        return jsonify({
+            'data': leads,
+            'pagination': {
+                'page': result["page"],
+                'pageSize': result["page_size"],
+                'total': result["total"],
+                'hasMore': result["page"] * result["page_size"] < result["total"],
+            }
+        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+# ──────────────────────────────────────────────
+# SEARCH leads (type-ahead)
+# ──────────────────────────────────────────────
+@leads_bp.route('/search', methods=['GET'])
+def search_leads():
+    try:
+        actor_id = get_emp_id_from_token()
+        if not actor_id:
+            return jsonify({'error': 'Unauthorized: valid token required'}), 401
+        role = get_emp_role_from_token()
+
+        try:
+            limit = int(request.args.get('limit', 10))
+        except ValueError:
+            return jsonify({'error': 'limit must be an integer'}), 400
+
+        results = leads_service.search_leads(request.args.get('q'), actor_id, role, limit)
+        return jsonify(results), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -185,6 +246,40 @@ def update_lead(lead_id):
         return jsonify({'error': str(e)}), 500
 
 
+# ──────────────────────────────────────────────
+# BULK status change
+# ──────────────────────────────────────────────
+@leads_bp.route('/bulk-status', methods=['POST'])
+def bulk_update_status():
+    try:
+        data = request.json or {}
+
+        actor_id = get_emp_id_from_token()
+        if not actor_id:
+            return jsonify({'error': 'Unauthorized: valid token required'}), 401
+        role = get_emp_role_from_token()
+
+        result = leads_service.bulk_update_lead_status(
+            data.get('leadIds'),
+            data.get('status'),
+            remarks=data.get('remarks'),
+            actor_id=actor_id,
+            role=role
+        )
+        return jsonify({
+            'updated': result['updated'],
+            'results': [
+                {'leadId': row['lead_id'], 'outcome': row['outcome'], **({'error': row['error']} if 'error' in row else {})}
+                for row in result['results']
+            ]
+        }), 200
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 # ──────────────────────────────────────────────
 # DELETE lead (soft)
 # ──────────────────────────────────────────────
@@ -2,7 +2,10 @@ import os
 import logging
 from flask import Blueprint, request, jsonify
 from services.mcube_service import process_mcube_call, initiate_click2call
+from services.mcube_ingest_service import is_queue_mode, enqueue_mcube_call
+from services.mcube_client import MCubeUnavailableError, get_click2call_metrics
 from decorators.auth_decorators import token_required
+from decorators.rate_limit import ingestion_guard
 from db import get_db
 
 logger = logging.getLogger(__name__)
@@ -26,6 +29,7 @@ def _verify_mcube_key():
 
 
 @mcube_bp.route("/mcube-webhook", methods=["POST"])
+@ingestion_guard("mcube", "MCUBE_API_KEY", key_param="api_key")
 def mcube_webhook():
     """
     Receives call data from MCube when a call ends.
@@ -39,6 +43,25 @@ def mcube_webhook():
     if not data:
         return jsonify({"error": "No data received"}), 400
 
+    if is_queue_mode():
+        try:
+            result = enqueue_mcube_call(data)
+            return jsonify({
+                "success": True,
+                "message": "Call already received" if result["duplicate"] else "Call queued",
+                **result
+            }), 202
+
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+
+        except Exception as e:
+            logger.error(f"MCube webhook enqueue error: {e}")
+            return jsonify({
+                "success": False,
+                "error": str(e)
+            }), 500
+
     try:
         result = process_mcube_call(data)
         return jsonify({
@@ -79,7 +102,8 @@ def click2call(decoded):
 
     emp_id = decoded["sub"]
 
-    # Look up agent's phone number
+    # Look up agent's phone number; the connection goes back to the pool
+    # before the MCube round trip.
     db = get_db()
     cursor = db.cursor(dictionary=True)
 
@@ -89,14 +113,18 @@ def click2call(decoded):
             (emp_id,)
         )
         employee = cursor.fetchone()
+    finally:
+        cursor.close()
+        db.close()
 
-        if not employee or not employee["phone_num"]:
-            return jsonify({
-                "error": "Your phone number is not configured. Please update your profile."
-            }), 400
+    if not employee or not employee["phone_num"]:
+        return jsonify({
+            "error": "Your phone number is not configured. Please update your profile."
+        }), 400
 
-        agent_phone = employee["phone_num"]
+    agent_phone = employee["phone_num"]
 
+    try:
         result = initiate_click2call(agent_phone, customer_phone)
 
         # Log the outbound call attempt
@@ -110,6 +138,12 @@ def click2call(decoded):
             "data": result
         }), 200
 
+    except MCubeUnavailableError as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 503
+
     except Exception as e:
         logger.error(f"Click2Call error: {e}")
         return jsonify({
@@ -117,6 +151,9 @@ def click2call(decoded):
             "error": str(e)
         }), 500
 
-    finally:
-        cursor.close()
-        db.close()
+
+@mcube_bp.route("/click2call/metrics", methods=["GET"])
+@token_required
+def click2call_metrics(decoded):
+    """Click2Call latency, retries, in-flight requests and breaker state for this worker."""
+    return jsonify(get_click2call_metrics()), 200
@@ -0,0 +1,39 @@
+import os
+import hmac
+import ipaddress
+from flask import Blueprint, Response, request, jsonify
+from utils.request_profiler import render_metrics
+from utils.compression import render_compression_metrics
+from services.rate_limit_service import render_rate_limit_metrics
+
+metrics_bp = Blueprint("metrics_bp", __name__)
+
+# Bearer token for the Prometheus scraper
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+# Comma-separated CIDRs allowed to scrape without the token, e.g.
+# "10.0.0.0/8,127.0.0.1/32". Matched against the socket address, so behind
+# a proxy list the scraper's direct path rather than the proxy's address.
+METRICS_ALLOWED_NETWORKS = [
+    ipaddress.ip_network(cidr.strip(), strict=False)
+    for cidr in os.getenv("METRICS_ALLOWED_NETWORKS", "").split(",")
+    if cidr.strip()
+]
+
+
+def _from_allowed_network():
+    try:
+        address = ipaddress.ip_address(request.remote_addr or "")
+    except ValueError:
+        return False
+    return any(address in network for network in METRICS_ALLOWED_NETWORKS)
+
+
+@metrics_bp.route("/metrics", methods=["GET"])
+def metrics():
+    # Closed unless a token or an allowed network is configured
+    supplied = request.headers.get("Authorization", "").removeprefix("Bearer ")
+    token_ok = bool(METRICS_TOKEN) and hmac.compare_digest(supplied, METRICS_TOKEN)
+    if not token_ok and not _from_allowed_network():
+        return jsonify({"error": "Unauthorized"}), 401
+    body = render_metrics() + render_compression_metrics() + render_rate_limit_metrics()
+    return Response(body, mimetype="text/plain; version=0.0.4; charset=utf-8")
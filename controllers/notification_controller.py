@@ -13,7 +13,6 @@ notification_bp = Blueprint("notifications", __name__)
 def get_notifications():
 
     emp_id = get_emp_id_from_token()
-    print("NOTIFICATION FETCH FOR:", emp_id)
 
     conn = get_db()
     cursor = conn.cursor(dictionary=True)
@@ -43,8 +42,6 @@ def mark_notification_read(notification_id):
 
     emp_id = get_emp_id_from_token()
 
-    print("MARK READ:", notification_id, "FOR:", emp_id)
-
     conn = get_db()
     cursor = conn.cursor()
 
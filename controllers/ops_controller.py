@@ -0,0 +1,29 @@
+from flask import Blueprint, jsonify, request
+from decorators.auth_decorators import token_required, role_required
+from db import get_pool_stats
+
+# Operational endpoints (scheduler runs, pool stats); admins only
+ops_bp = Blueprint("ops_bp", __name__)
+
+
+@ops_bp.route("/ops/scheduler/runs", methods=["GET"])
+@token_required
+@role_required("ADMIN")
+def list_job_runs(decoded):
+    try:
+        limit = min(int(request.args.get("limit", 100)), 500)
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    # Imported here so loading this blueprint doesn't pull in APScheduler
+    from services.scheduler_service import get_job_runs
+    try:
+        return jsonify(get_job_runs(request.args.get("jobId"), limit)), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@ops_bp.route("/ops/db/pool", methods=["GET"])
+@token_required
+@role_required("ADMIN")
+def db_pool_stats(decoded):
+    return jsonify(get_pool_stats()), 200
@@ -35,7 +35,13 @@ def add_project_assignment(decoded):
 
     try:
         created_by = decoded.get("sub") or decoded.get("username", "SYSTEM")
-        assignment = create_project_assignment(project_id, emp_id, created_by)
+        assignment = create_project_assignment(
+            project_id,
+            emp_id,
+            created_by,
+            assignment_weight=data.get("assignment_weight"),
+            max_open_leads=data.get("max_open_leads")
+        )
         return jsonify(assignment), 201
     except ValueError as e:
         return jsonify({"error": str(e)}), 400
@@ -1,5 +1,5 @@
 from flask import Blueprint, request, jsonify
-from services.project_service import project_service
+from services.project_service import project_service, ProjectInUseError
 from decorators.auth_decorators import token_required
 import traceback
 
@@ -162,6 +162,9 @@ def delete_project(decoded, project_id):
 
         return jsonify({"message": "Project deleted successfully"}), 200
 
+    except ProjectInUseError as e:
+        return jsonify({"error": str(e)}), 409
+
     except Exception:
         traceback.print_exc()
         return jsonify({"error": "Internal Server Error"}), 500
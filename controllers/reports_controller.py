@@ -1,13 +1,116 @@
 from flask import Blueprint, jsonify, request, Response
 from decorators.auth_decorators import token_required
 import services.reports_service as reports_service
+from utils.xlsx_export import XLSX_MIMETYPE, build_xlsx, column, iter_file_chunks
+from utils.json_provider import RowMapper, json_stream_response
 import csv
+import traceback
 
 reports_bp = Blueprint('reports_controller', __name__)
 
+# ─── XLSX column specs (per report) ─────────────────────────────────────────
+ACTIVE_LEADS_XLSX = [
+    column("Lead ID", "lead_id", width=12),
+    column("Lead Name", "lead_name", width=28),
+    column("Description", "lead_description", width=40),
+    column("Employee", "emp_first_name", width=18),
+    column("Project", "project_name", width=24),
+    column("Created On", "created_on", "datetime", width=20),
+]
+
+USER_LEADS_XLSX = [
+    column("Lead ID", "lead_id", width=12),
+    column("Lead Name", "lead_name", width=28),
+    column("Description", "lead_description", width=40),
+    column("Project", "project_name", width=24),
+    column("Created On", "created_on", "datetime", width=20),
+    column("Current Status", "status_name", width=20),
+]
+
+SUMMARY_LEADS_XLSX = [
+    column("Lead ID", "lead_id", width=12),
+    column("Lead Name", "lead_name", width=28),
+    column("Description", "lead_description", width=40),
+    column("Employee", "employee_name", width=18),
+    column("Project", "project_name", width=24),
+    column("Label", "label", width=20),
+    column("Current Status", "current_status", width=20),
+    column("Created On", "created_on", "datetime", width=20),
+]
+
+HISTORY_REPORT_XLSX = [
+    column("History ID", "history_id", "number", width=12),
+    column("Lead ID", "lead_id", width=12),
+    column("Lead Name", "lead_name", width=28),
+    column("Employee", "employee_name", width=18),
+    column("Project", "project_name", width=24),
+    column("Changed At", "changed_at", "datetime", width=20),
+    column("Current Status", "current_status", width=20),
+    column("Remarks", "remarks", width=40),
+]
+
+DAILY_LOG_XLSX = [
+    column("Lead ID", "lead_id", width=12),
+    column("Lead Name", "lead_name", width=28),
+    column("Created On", "created_on", "datetime", width=20),
+    column("Employee", "employee_name", width=18),
+    column("Project", "project_name", width=24),
+    column("Status", "label", width=20),
+]
+
+WEEKLY_LOG_XLSX = [
+    column("Lead ID", "lead_id", width=12),
+    column("Created On", "created_on", "datetime", width=20),
+    column("Customer Name", "customer_name", width=28),
+    column("Project", "project_name", width=24),
+    column("Source", "source_name", width=18),
+    column("Employee", "employee_name", width=18),
+    column("Status", "status", width=20),
+]
+
+MONTHLY_LOG_XLSX = [
+    column("Lead ID", "lead_id", width=12),
+    column("Created On", "created_on", "datetime", width=20),
+    column("Description", "lead_name", width=40),
+    column("Customer Name", "customer_name", width=28),
+    column("Project", "project_name", width=24),
+    column("Source", "source_name", width=18),
+    column("Employee", "employee_name", width=18),
+    column("Status", "status", width=20),
+]
+
+# JSON list rows: raw columns, created_on as 'YYYY-MM-DD HH:MM:SS' like before
+REPORT_ROWS_JSON = RowMapper(convert={"created_on": str})
+# ────────────────────────────────────────────────────────────────────────────
+
 def is_authorized(decoded):
     return decoded.get("role_type") in ["ADMIN", "SALES_MGR"]
 
+def wants_xlsx():
+    return (request.args.get('format') or '').lower() == 'xlsx'
+
+def xlsx_response(columns, rows, filename, sheet_title, preamble=None):
+    """Builds a write-only workbook from a row iterator and streams it back."""
+    try:
+        output = build_xlsx(columns, rows, sheet_title=sheet_title, preamble=preamble)
+    except Exception as e:
+        print(f"Error building {filename}: {traceback.format_exc()}")
+        return jsonify({"error": str(e)}), 500
+
+    return Response(
+        iter_file_chunks(output),
+        mimetype=XLSX_MIMETYPE,
+        headers={"Content-Disposition": f"attachment;filename={filename}"}
+    )
+
+def json_rows_response(rows, label):
+    """Streams report rows as {"success": true, "data": [...]}."""
+    try:
+        return json_stream_response(rows, REPORT_ROWS_JSON, envelope={"success": True})
+    except Exception as e:
+        print(f"Error in {label}: {traceback.format_exc()}")
+        return jsonify({"error": str(e)}), 500
+
 @reports_bp.route('/summary', methods=['GET'])
 @token_required
 def get_summary(decoded):
@@ -143,16 +246,32 @@ def get_daily_log(decoded):
     source_id = request.args.get('sourceId')
     status_id = request.args.get('statusId')
     
-    result = reports_service.get_daily_log(project_id, user_id, source_id, status_id)
-    if result.get("success"):
-        return jsonify(result), 200
-    return jsonify({"error": result.get("message")}), 500
+    if wants_xlsx():
+        return xlsx_response(
+            DAILY_LOG_XLSX,
+            reports_service.iter_daily_log(project_id, user_id, source_id, status_id),
+            "daily_log.xlsx",
+            "Daily Log"
+        )
+
+    return json_rows_response(
+        reports_service.iter_daily_log(project_id, user_id, source_id, status_id),
+        "daily log"
+    )
 
 @reports_bp.route('/download', methods=['GET'])
 @token_required
 def download_active_leads(decoded):
     if not is_authorized(decoded):
         return jsonify({"message": "Unauthorized"}), 403
+
+    if wants_xlsx():
+        return xlsx_response(
+            ACTIVE_LEADS_XLSX,
+            reports_service.iter_active_leads_for_download(),
+            "active_leads.xlsx",
+            "Active Leads"
+        )
         
     result = reports_service.get_active_leads_for_download()
     if not result.get("success"):
@@ -206,6 +325,16 @@ def export_user_leads(decoded):
     
     if not emp_id or not activity:
         return jsonify({"error": "emp_id and activity are required"}), 400
+
+    if wants_xlsx():
+        columns = USER_LEADS_XLSX[:2] + [column("Activity Status", lambda r: activity, width=20)] + USER_LEADS_XLSX[2:]
+        return xlsx_response(
+            columns,
+            reports_service.iter_user_leads_export(emp_id, activity, start_date, end_date, project_id, source_id, status_id),
+            f"leads_{emp_id}_{activity.replace(' ', '_')}.xlsx",
+            "User Leads",
+            preamble=[[f"EMP ID: {emp_id}", f"User Name: {user_name}"]]
+        )
         
     result = reports_service.get_user_leads_export(emp_id, activity, start_date, end_date, project_id, source_id, status_id)
     if not result.get("success"):
@@ -254,11 +383,10 @@ def export_user_leads_json(decoded):
     if not emp_id or not activity:
         return jsonify({"error": "emp_id and activity are required"}), 400
         
-    result = reports_service.get_user_leads_export(emp_id, activity, start_date, end_date, project_id, source_id, status_id)
-    if not result.get("success"):
-        return jsonify({"error": result.get("message")}), 500
-        
-    return jsonify(result), 200
+    return json_rows_response(
+        reports_service.iter_user_leads_export(emp_id, activity, start_date, end_date, project_id, source_id, status_id),
+        "user leads export"
+    )
 
 @reports_bp.route('/summary-leads', methods=['GET'])
 @token_required
@@ -276,12 +404,19 @@ def summary_leads(decoded):
     
     if not summary_type:
         return jsonify({"error": "type is required"}), 400
+
+    if wants_xlsx():
+        return xlsx_response(
+            SUMMARY_LEADS_XLSX,
+            reports_service.iter_summary_leads(summary_type, start_date, end_date, project_id, user_id, source_id, status_id),
+            f"summary_leads_{summary_type.replace(' ', '_')}.xlsx",
+            f"{summary_type} Leads"
+        )
         
-    result = reports_service.get_summary_leads(summary_type, start_date, end_date, project_id, user_id, source_id, status_id)
-    if not result.get("success"):
-        return jsonify({"error": result.get("message")}), 500
-        
-    return jsonify(result), 200
+    return json_rows_response(
+        reports_service.iter_summary_leads(summary_type, start_date, end_date, project_id, user_id, source_id, status_id),
+        "summary leads"
+    )
 
 @reports_bp.route('/weekly-log', methods=['GET'])
 @token_required
@@ -296,11 +431,18 @@ def get_weekly_log(decoded):
     source_id = request.args.get('sourceId')
     status_id = request.args.get('statusId')
     
-    result = reports_service.get_weekly_report_log(start_date, end_date, project_id, user_id, source_id, status_id)
-    if not result.get("success"):
-        return jsonify({"error": result.get("message")}), 500
-        
-    return jsonify(result), 200
+    if wants_xlsx():
+        return xlsx_response(
+            WEEKLY_LOG_XLSX,
+            reports_service.iter_weekly_report_log(start_date, end_date, project_id, user_id, source_id, status_id),
+            "weekly_log.xlsx",
+            "Weekly Log"
+        )
+
+    return json_rows_response(
+        reports_service.iter_weekly_report_log(start_date, end_date, project_id, user_id, source_id, status_id),
+        "weekly report log"
+    )
 
 @reports_bp.route('/monthly-log', methods=['GET'])
 @token_required
@@ -314,12 +456,28 @@ def get_monthly_log(decoded):
     user_id = request.args.get('userId')
     source_id = request.args.get('sourceId')
     status_id = request.args.get('statusId')
+
+    # The query is built before streaming starts, so bad input must be caught here
+    if month and year:
+        try:
+            month, year = int(month), int(year)
+        except ValueError:
+            return jsonify({"error": "month and year must be integers"}), 400
+        if not 1 <= month <= 12:
+            return jsonify({"error": "month must be between 1 and 12"}), 400
     
-    result = reports_service.get_monthly_report_log(month, year, project_id, user_id, source_id, status_id)
-    if not result.get("success"):
-        return jsonify({"error": result.get("message")}), 500
-        
-    return jsonify(result), 200
+    if wants_xlsx():
+        return xlsx_response(
+            MONTHLY_LOG_XLSX,
+            reports_service.iter_monthly_report_log(month, year, project_id, user_id, source_id, status_id),
+            "monthly_log.xlsx",
+            "Monthly Log"
+        )
+
+    return json_rows_response(
+        reports_service.iter_monthly_report_log(month, year, project_id, user_id, source_id, status_id),
+        "monthly report log"
+    )
 
 @reports_bp.route('/monthly-performance-report', methods=['GET'])
 @token_required
@@ -386,6 +544,14 @@ def get_history_report(decoded):
     if not status_name:
         return jsonify({"error": "type must be 'site_visit' or 'deal_closed'"}), 400
 
+    if wants_xlsx():
+        return xlsx_response(
+            HISTORY_REPORT_XLSX,
+            reports_service.iter_immutable_history_report(status_name, start_date, end_date, project_id, user_id),
+            f"{status_type}_history.xlsx",
+            status_name
+        )
+
     result = reports_service.get_immutable_history_report(status_name, start_date, end_date, project_id, user_id)
     if not result.get("success"):
         return jsonify({"error": result.get("message")}), 500
@@ -1,7 +1,8 @@
 from flask import Blueprint, request, jsonify
 from services.user_service import (
     register_user,
-    get_all_users,
+    search_users,
+    get_user_counts,
     get_user_by_id,
     update_user,
     update_user_status,
@@ -77,11 +78,55 @@ def fetch_users(decoded):
         return jsonify({"success": False, "error": "Admin or Sales Manager access required"}), 403
 
     try:
-        users = get_all_users()
+        page = request.args.get('page')
+        page_size = request.args.get('pageSize')
+        try:
+            page = int(page) if page else None
+            page_size = int(page_size) if page_size else None
+        except ValueError:
+            return jsonify({"success": False, "error": "page and pageSize must be integers"}), 400
+
+        result = search_users(
+            search=request.args.get('q'),
+            role_id=request.args.get('role'),
+            emp_status=request.args.get('status'),
+            page=page,
+            page_size=page_size
+        )
+
+        response = {
+            "success": True,
+            "data": result["data"]
+        }
+        if result["page"] is not None:
+            response["pagination"] = {
+                "page": result["page"],
+                "pageSize": result["page_size"],
+                "total": result["total"]
+            }
+
+        return jsonify(response), 200
+
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
 
+# -------------------------
+# USER COUNTS (dashboard)
+# -------------------------
+@user_controller_bp.route('/users/counts', methods=['GET'])
+@token_required
+def fetch_user_counts(decoded):
+    if decoded.get("role_type") not in ["ADMIN", "SALES_MGR"]:
+        return jsonify({"success": False, "error": "Admin or Sales Manager access required"}), 403
+
+    try:
         return jsonify({
             "success": True,
-            "data": users
+            "data": get_user_counts()
         }), 200
 
     except Exception as e:
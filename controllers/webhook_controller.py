@@ -1,6 +1,8 @@
 import logging
 from flask import Blueprint, request, jsonify
 from decorators.webhook_auth import webhook_key_required
+from decorators.idempotency import idempotent
+from decorators.rate_limit import ingestion_guard
 from services.webhook_service import process_webhook_lead
 
 logger = logging.getLogger(__name__)
@@ -10,6 +12,8 @@ webhook_bp = Blueprint("webhook", __name__)
 
 @webhook_bp.route("/lead", methods=["POST"])
 @webhook_key_required
+@ingestion_guard("webhook", "WEBHOOK_API_KEY")
+@idempotent("webhook_lead")
 def receive_lead():
     """
     Receive a lead from Make.com (or any external webhook).
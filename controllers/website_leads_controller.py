@@ -1,6 +1,8 @@
 import logging
 from flask import Blueprint, request, jsonify
 from decorators.webhook_auth import website_key_required
+from decorators.idempotency import idempotent
+from decorators.rate_limit import ingestion_guard
 from services.webhook_service import process_webhook_lead
 
 logger = logging.getLogger(__name__)
@@ -10,6 +12,8 @@ website_leads_bp = Blueprint("website_leads", __name__)
 
 @website_leads_bp.route("/lead", methods=["POST"])
 @website_key_required
+@ingestion_guard("website_lead", "WEBSITE_FORM_API_KEY", key_header="X-Website-Key")
+@idempotent("website_lead")
 def receive_website_lead():
     """
     Receive a lead directly from a website backend or chatbot backend.
@@ -1,10 +1,20 @@
 import os
+import time
+import logging
+import threading
+import traceback
+from contextlib import contextmanager
+from contextvars import ContextVar
+
 import mysql.connector
 from mysql.connector import pooling
+from mysql.connector.errors import PoolError
 from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # ----------------------------------------
 # Database configuration from environment
 # ----------------------------------------
@@ -15,17 +25,561 @@ DB_CONFIG = {
     "database": os.getenv("DB_NAME", "presales")
 }
 
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20"))
+# Extra unpooled connections allowed when the pool is empty
+DB_POOL_MAX_OVERFLOW = int(os.getenv("DB_POOL_MAX_OVERFLOW", "0"))
+# How long get_db() waits for a free connection before giving up
+DB_POOL_CHECKOUT_TIMEOUT = float(os.getenv("DB_POOL_CHECKOUT_TIMEOUT", "5"))
+# Connections held longer than this are logged with the stack that took them
+DB_POOL_LEAK_SECONDS = float(os.getenv("DB_POOL_LEAK_SECONDS", "30"))
+
+# ----------------------------------------
+# Read replica (optional)
+# ----------------------------------------
+# Reads that opt in with get_db(readonly=True) go here when DB_REPLICA_HOST
+# is set; everything else, and every write, stays on the primary.
+DB_REPLICA_HOST = os.getenv("DB_REPLICA_HOST")
+REPLICA_CONFIG = {
+    **DB_CONFIG,
+    "host": DB_REPLICA_HOST,
+    "user": os.getenv("DB_REPLICA_USER", DB_CONFIG["user"]),
+    "password": os.getenv("DB_REPLICA_PASSWORD", DB_CONFIG["password"]),
+}
+if os.getenv("DB_REPLICA_PORT"):
+    REPLICA_CONFIG["port"] = int(os.getenv("DB_REPLICA_PORT"))
+
+DB_REPLICA_POOL_SIZE = int(os.getenv("DB_REPLICA_POOL_SIZE", "10"))
+DB_REPLICA_CHECKOUT_TIMEOUT = float(os.getenv("DB_REPLICA_CHECKOUT_TIMEOUT", "1"))
+# Replica is skipped while it is further behind than this (-1 disables the check)
+DB_REPLICA_MAX_LAG_SECONDS = float(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", "5"))
+DB_REPLICA_LAG_CHECK_SECONDS = float(os.getenv("DB_REPLICA_LAG_CHECK_SECONDS", "5"))
+DB_REPLICA_LAG_PROBE_TIMEOUT = int(os.getenv("DB_REPLICA_LAG_PROBE_TIMEOUT", "2"))
+# A session that committed on the primary reads from it for this long,
+# whichever worker serves it (tracked in replica_sticky_sessions)
+DB_REPLICA_STICKY_SECONDS = float(os.getenv("DB_REPLICA_STICKY_SECONDS", "10"))
+
+HISTOGRAM_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30)
+
 # ----------------------------------------
 # Connection pool
 # ----------------------------------------
-connection_pool = pooling.MySQLConnectionPool(
-    pool_name="presales_pool",
-    pool_size=int(os.getenv("DB_POOL_SIZE", "20")),
-    **DB_CONFIG
-)
+# Created per process on first use (or from gunicorn's post_fork), never
+# inherited across fork: a forked child sharing its parent's sockets
+# corrupts both sides' MySQL sessions.
+connection_pool = None
+replica_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+_leak_monitor_pid = None
+
+
+def init_pools():
+    """Create this process's pools (idempotent per process)."""
+    global connection_pool, replica_pool, _pool_pid, _slots, _replica_slots, _leak_monitor_pid
+    if _pool_pid == os.getpid():
+        return
+
+    with _pool_lock:
+        if _pool_pid == os.getpid():
+            return
+
+        # Anything inherited from a parent is dropped without closing; the
+        # sockets still belong to the parent
+        with _stats_lock:
+            _checked_out.clear()
+            _stats["in_use"] = _stats["replica_in_use"] = 0
+        _slots = threading.BoundedSemaphore(DB_POOL_SIZE + DB_POOL_MAX_OVERFLOW)
+        _replica_slots = threading.BoundedSemaphore(DB_REPLICA_POOL_SIZE)
+        connection_pool = pooling.MySQLConnectionPool(
+            pool_name="presales_pool",
+            pool_size=DB_POOL_SIZE,
+            **DB_CONFIG
+        )
+        replica_pool = pooling.MySQLConnectionPool(
+            pool_name="presales_replica_pool",
+            pool_size=DB_REPLICA_POOL_SIZE,
+            **REPLICA_CONFIG
+        ) if DB_REPLICA_HOST else None
+        _pool_pid = os.getpid()
+
+        if DB_POOL_LEAK_SECONDS > 0 and _leak_monitor_pid != os.getpid():
+            threading.Thread(target=_leak_monitor, name="db-leak-monitor", daemon=True).start()
+            _leak_monitor_pid = os.getpid()
+
+
+def close_pools():
+    """Close idle pooled connections on shutdown (this process's pools only)."""
+    global connection_pool, replica_pool, _pool_pid
+    with _pool_lock:
+        if _pool_pid != os.getpid():
+            return
+        for pool in (connection_pool, replica_pool):
+            if pool is None:
+                continue
+            try:
+                pool._remove_connections()
+            except Exception as e:
+                logger.warning(f"Closing {pool.pool_name} failed: {e}")
+        connection_pool = replica_pool = None
+        _pool_pid = None
+
+
+class PoolExhaustedError(PoolError):
+    """No connection became free within DB_POOL_CHECKOUT_TIMEOUT."""
+
+
+def _histogram():
+    return {"count": 0, "sum": 0.0, "buckets": {bucket: 0 for bucket in HISTOGRAM_BUCKETS}}
+
+
+def _observe(histogram, value):
+    histogram["count"] += 1
+    histogram["sum"] += value
+    for bucket in HISTOGRAM_BUCKETS:
+        if value <= bucket:
+            histogram["buckets"][bucket] += 1
+
+
+_slots = threading.BoundedSemaphore(DB_POOL_SIZE + DB_POOL_MAX_OVERFLOW)
+_replica_slots = threading.BoundedSemaphore(DB_REPLICA_POOL_SIZE)
+_stats_lock = threading.Lock()
+_stats = {
+    "checkouts": 0,
+    "timeouts": 0,
+    "errors": 0,
+    "overflow_checkouts": 0,
+    "leaks_reported": 0,
+    "in_use": 0,
+    "max_in_use": 0,
+    "replica_checkouts": 0,
+    "replica_fallbacks": 0,
+    "replica_in_use": 0,
+    "sticky_reads": 0,
+    "wait_seconds": _histogram(),
+    "hold_seconds": _histogram(),
+}
+_checked_out = {}
+
+# Who the current request acts for, so their own writes are read back
+# from the primary (see set_db_session)
+_db_session = ContextVar("db_session", default=None)
+# session -> monotonic time its replica_sticky_sessions row was last pushed
+_last_write = {}
+# Per-request profile (utils.request_profiler) that cursors report into
+current_profile = ContextVar("db_profile", default=None)
+_replica_state = {"lag": None, "checked_at": 0.0, "healthy": False}
+_replica_lock = threading.Lock()
+_write_lock = threading.Lock()
+
+
+class TrackedConnection:
+    """
+    Proxy around a pooled (or overflow) connection. close() returns it to
+    the pool exactly once and records how long it was held.
+    """
+
+    def __init__(self, conn, slots, overflow=False, replica=False):
+        self._conn = conn
+        self._slots = slots
+        self._overflow = overflow
+        self._replica = replica
+        self._closed = False
+        self._checked_out_at = time.monotonic()
+        self._thread = threading.current_thread().name
+        self._stack = "".join(traceback.format_stack(limit=12)[:-2]) if DB_POOL_LEAK_SECONDS > 0 else ""
+        self._leak_reported = False
+
+        with _stats_lock:
+            _checked_out[id(self)] = self
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def cursor(self, *args, **kwargs):
+        cursor = self._conn.cursor(*args, **kwargs)
+        profile = current_profile.get()
+        return ProfiledCursor(cursor, profile) if profile is not None else cursor
+
+    def commit(self):
+        self._conn.commit()
+        if not self._replica:
+            _record_write(self._conn)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+
+        held = time.monotonic() - self._checked_out_at
+        try:
+            self._conn.close()
+        finally:
+            with _stats_lock:
+                _checked_out.pop(id(self), None)
+                _stats["replica_in_use" if self._replica else "in_use"] -= 1
+                _observe(_stats["hold_seconds"], held)
+            self._slots.release()
+
+
+class ProfiledCursor:
+    """
+    Cursor proxy used while a request profile is active: times every
+    execute/fetch and counts rows, reporting them to the profile.
+    """
+
+    def __init__(self, cursor, profile):
+        self._cursor = cursor
+        self._profile = profile
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._cursor.close()
+
+    def __iter__(self):
+        for row in self._cursor:
+            self._profile.record_rows(1)
+            yield row
+
+    def _timed(self, method, statement, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return method(statement, *args, **kwargs)
+        finally:
+            self._profile.record_query(statement, time.perf_counter() - started)
+
+    def execute(self, operation, *args, **kwargs):
+        return self._timed(self._cursor.execute, operation, *args, **kwargs)
+
+    def executemany(self, operation, *args, **kwargs):
+        return self._timed(self._cursor.executemany, operation, *args, **kwargs)
+
+    def _fetch(self, method, *args):
+        started = time.perf_counter()
+        result = method(*args)
+        self._profile.record_fetch(time.perf_counter() - started)
+        if isinstance(result, list):
+            self._profile.record_rows(len(result))
+        elif result is not None:
+            self._profile.record_rows(1)
+        return result
+
+    def fetchone(self):
+        return self._fetch(self._cursor.fetchone)
+
+    def fetchmany(self, *args):
+        return self._fetch(self._cursor.fetchmany, *args)
+
+    def fetchall(self):
+        return self._fetch(self._cursor.fetchall)
+
+
+def _checkout(pool, slots, config, timeout, replica=False):
+    started = time.monotonic()
+    if not slots.acquire(timeout=timeout):
+        with _stats_lock:
+            _stats["timeouts"] += 1
+        target = "replica" if replica else f"{DB_POOL_SIZE} pooled + {DB_POOL_MAX_OVERFLOW} overflow"
+        raise PoolExhaustedError(
+            f"No database connection available within {timeout}s ({target} in use)"
+        )
+
+    overflow = False
+    try:
+        try:
+            conn = pool.get_connection()
+        except PoolError:
+            # Pool empty but an overflow slot is free
+            conn = mysql.connector.connect(**config)
+            overflow = True
+    except Exception:
+        slots.release()
+        with _stats_lock:
+            _stats["errors"] += 1
+        raise
+
+    with _stats_lock:
+        _stats["checkouts"] += 1
+        _stats["overflow_checkouts"] += overflow
+        if replica:
+            _stats["replica_checkouts"] += 1
+            _stats["replica_in_use"] += 1
+        else:
+            _stats["in_use"] += 1
+            _stats["max_in_use"] = max(_stats["max_in_use"], _stats["in_use"])
+        waited = time.monotonic() - started
+        _observe(_stats["wait_seconds"], waited)
+
+    profile = current_profile.get()
+    if profile is not None:
+        profile.record_pool_wait(waited)
+
+    return TrackedConnection(conn, slots, overflow, replica)
+
+
+def get_db(readonly=False, timeout=None):
+    """
+    Check a connection out of the pool, waiting up to
+    DB_POOL_CHECKOUT_TIMEOUT for one to be returned. The pool pings the
+    connection and reconnects it if the server dropped it.
+    Raises PoolExhaustedError on timeout.
+
+    readonly=True routes to the replica when one is configured, healthy,
+    within DB_REPLICA_MAX_LAG_SECONDS and the current session has not just
+    written; otherwise it quietly falls back to the primary. Only pass it
+    for reads that tolerate a few seconds of staleness.
+    """
+    init_pools()
+
+    if readonly and _use_replica():
+        try:
+            return _checkout(replica_pool, _replica_slots, REPLICA_CONFIG, DB_REPLICA_CHECKOUT_TIMEOUT, replica=True)
+        except Exception as e:
+            logger.warning(f"Replica checkout failed, reading from primary: {e}")
+            with _stats_lock:
+                _stats["replica_fallbacks"] += 1
+
+    return _checkout(
+        connection_pool, _slots, DB_CONFIG,
+        DB_POOL_CHECKOUT_TIMEOUT if timeout is None else timeout
+    )
+
+
+@contextmanager
+def db_cursor(dictionary=False, readonly=False):
+    """
+    with db_cursor(dictionary=True) as (conn, cursor):
+        ...
+    Cursor and connection are closed on every path; committing is up to
+    the caller.
+    """
+    conn = get_db(readonly=readonly)
+    cursor = conn.cursor(dictionary=dictionary)
+    try:
+        yield conn, cursor
+    finally:
+        try:
+            cursor.close()
+        finally:
+            conn.close()
+
+
+def get_pool_stats():
+    with _stats_lock:
+        stats = {
+            key: value for key, value in _stats.items()
+            if key not in ("wait_seconds", "hold_seconds")
+        }
+        for key in ("wait_seconds", "hold_seconds"):
+            histogram = _stats[key]
+            stats[key] = {
+                "count": histogram["count"],
+                "sum": round(histogram["sum"], 4),
+                "buckets": {str(bucket): count for bucket, count in histogram["buckets"].items()},
+            }
+    stats["pool_size"] = DB_POOL_SIZE
+    stats["max_overflow"] = DB_POOL_MAX_OVERFLOW
+    stats["replica"] = {
+        "configured": bool(DB_REPLICA_HOST),
+        "pool_size": DB_REPLICA_POOL_SIZE if DB_REPLICA_HOST else 0,
+        "healthy": _replica_state["healthy"],
+        "lag_seconds": _replica_state["lag"],
+    }
+    return stats
+
+
+def pool_utilization():
+    """Share of primary connections checked out in this process (0..1)."""
+    with _stats_lock:
+        in_use = _stats["in_use"]
+    return in_use / max(DB_POOL_SIZE + DB_POOL_MAX_OVERFLOW, 1)
+
 
 # ----------------------------------------
-# Get DB connection
+# Replica routing
 # ----------------------------------------
-def get_db():
-    return connection_pool.get_connection()
+def set_db_session(key):
+    """Tag the current request with the user it acts for (None to clear)."""
+    _db_session.set(key)
+
+
+def ensure_replica_session_schema():
+    """Sticky-read table for read-your-writes. Run by services.schema_service."""
+    with db_cursor() as (conn, cursor):
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS replica_sticky_sessions (
+                session_key VARCHAR(150) NOT NULL PRIMARY KEY,
+                sticky_until DATETIME(3) NOT NULL
+            )
+        """)
+
+
+def _record_write(conn):
+    """
+    After a primary commit, keep the session's reads on the primary for
+    DB_REPLICA_STICKY_SECONDS. The deadline is stored on the primary, not in
+    this process, because the session's next request usually lands on
+    another worker. Pushed at most every half window per session, with a
+    deadline 1.5 windows out, so every write is covered for a full window.
+    """
+    key = _db_session.get()
+    if key is None or replica_pool is None:
+        return
+
+    now = time.monotonic()
+    with _write_lock:
+        pushed_at = _last_write.get(key)
+        if pushed_at is not None and now - pushed_at < DB_REPLICA_STICKY_SECONDS / 2:
+            return
+        _last_write[key] = now
+        if len(_last_write) > 5000:
+            for stale in [k for k, t in _last_write.items() if now - t > DB_REPLICA_STICKY_SECONDS]:
+                del _last_write[stale]
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            INSERT INTO replica_sticky_sessions (session_key, sticky_until)
+            VALUES (%s, NOW(3) + INTERVAL %s MICROSECOND)
+            ON DUPLICATE KEY UPDATE sticky_until = VALUES(sticky_until)
+        """, (key, int(DB_REPLICA_STICKY_SECONDS * 1.5 * 1_000_000)))
+        conn.commit()
+    except Exception as e:
+        logger.warning(f"Could not record sticky session {key}: {e}")
+        with _write_lock:
+            _last_write.pop(key, None)
+    finally:
+        cursor.close()
+
+
+def _wrote_recently():
+    key = _db_session.get()
+    if key is None:
+        return False
+
+    pushed_at = _last_write.get(key)
+    if pushed_at is not None and time.monotonic() - pushed_at < DB_REPLICA_STICKY_SECONDS:
+        return True
+
+    # Written through another worker? One primary-key lookup on the primary
+    try:
+        conn = _checkout(connection_pool, _slots, DB_CONFIG, DB_REPLICA_CHECKOUT_TIMEOUT)
+    except Exception as e:
+        logger.warning(f"Sticky session check skipped: {e}")
+        return False
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            SELECT 1 FROM replica_sticky_sessions
+            WHERE session_key = %s AND sticky_until > NOW(3)
+        """, (key,))
+        return cursor.fetchone() is not None
+    except Exception as e:
+        logger.warning(f"Sticky session check failed: {e}")
+        return False
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def _read_replica_lag():
+    """
+    Seconds behind the source, or None if replication is not running.
+    Probed on its own short-lived connection, so a saturated replica pool
+    never reads as an unhealthy replica.
+    """
+    conn = mysql.connector.connect(**REPLICA_CONFIG, connection_timeout=DB_REPLICA_LAG_PROBE_TIMEOUT)
+    cursor = conn.cursor(dictionary=True)
+    try:
+        try:
+            cursor.execute("SHOW REPLICA STATUS")
+        except mysql.connector.Error:
+            # MySQL < 8.0.22
+            cursor.execute("SHOW SLAVE STATUS")
+        row = cursor.fetchone()
+        if not row:
+            return None
+        lag = row.get("Seconds_Behind_Source", row.get("Seconds_Behind_Master"))
+        return None if lag is None else float(lag)
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def _replica_healthy():
+    if DB_REPLICA_MAX_LAG_SECONDS < 0:
+        return True
+
+    now = time.monotonic()
+    if now - _replica_state["checked_at"] < DB_REPLICA_LAG_CHECK_SECONDS:
+        return _replica_state["healthy"]
+
+    # One thread re-checks; the rest use the last answer meanwhile
+    if not _replica_lock.acquire(blocking=False):
+        return _replica_state["healthy"]
+    try:
+        try:
+            lag = _read_replica_lag()
+        except Exception as e:
+            logger.warning(f"Replica lag check failed: {e}")
+            lag = None
+
+        healthy = lag is not None and lag <= DB_REPLICA_MAX_LAG_SECONDS
+        if healthy != _replica_state["healthy"]:
+            logger.warning(f"Read replica {'back in' if healthy else 'taken out of'} rotation (lag={lag})")
+        _replica_state.update(lag=lag, checked_at=time.monotonic(), healthy=healthy)
+        return healthy
+    finally:
+        _replica_lock.release()
+
+
+def _use_replica():
+    if replica_pool is None:
+        return False
+    if _wrote_recently():
+        with _stats_lock:
+            _stats["sticky_reads"] += 1
+        return False
+    return _replica_healthy()
+
+
+# ----------------------------------------
+# Leak detection
+# ----------------------------------------
+def check_for_leaks():
+    """Log (once each) connections held longer than DB_POOL_LEAK_SECONDS."""
+    now = time.monotonic()
+    with _stats_lock:
+        suspects = [
+            conn for conn in _checked_out.values()
+            if not conn._leak_reported and now - conn._checked_out_at > DB_POOL_LEAK_SECONDS
+        ]
+        for conn in suspects:
+            conn._leak_reported = True
+        _stats["leaks_reported"] += len(suspects)
+
+    for conn in suspects:
+        logger.warning(
+            f"DB connection held for {now - conn._checked_out_at:.1f}s by thread {conn._thread}; "
+            f"checked out at:\n{conn._stack}"
+        )
+    return len(suspects)
+
+
+def _leak_monitor():
+    while True:
+        time.sleep(max(DB_POOL_LEAK_SECONDS / 2, 1))
+        try:
+            check_for_leaks()
+        except Exception as e:
+            logger.error(f"Leak check failed: {e}")
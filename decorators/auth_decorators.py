@@ -1,7 +1,8 @@
 from functools import wraps
 from flask import request, jsonify,g
 import jwt
-from config import PUBLIC_KEY, JWT_ISSUER, JWT_AUDIENCE
+from config import get_public_key, JWT_ISSUER, JWT_AUDIENCE
+from db import set_db_session
 
 def token_required(f):
     @wraps(f)
@@ -16,7 +17,7 @@ def token_required(f):
         try:
             decoded = jwt.decode(
                 token,
-                PUBLIC_KEY,
+                get_public_key(),
                 algorithms=["RS256"],
                 issuer=JWT_ISSUER,
                 audience=JWT_AUDIENCE
@@ -26,7 +27,24 @@ def token_required(f):
         except jwt.InvalidTokenError:
             return jsonify({"message": "Invalid token"}), 401
 
+        # replica reads for this user see their own recent writes
+        set_db_session(decoded.get("sub"))
+
         # pass decoded token to the route
         return f(decoded, *args, **kwargs)
 
     return decorated
+
+
+def role_required(*roles):
+    """Stack under @token_required; refuses tokens whose role_type is not in roles."""
+    def decorator(f):
+        @wraps(f)
+        def decorated(decoded, *args, **kwargs):
+            if decoded.get("role_type") not in roles:
+                return jsonify({"error": f"{' or '.join(roles)} access required"}), 403
+            return f(decoded, *args, **kwargs)
+
+        return decorated
+
+    return decorator
@@ -0,0 +1,75 @@
+import logging
+from functools import wraps
+from flask import request, jsonify, make_response
+from services.idempotency_service import (
+    COMPLETED,
+    payload_key,
+    begin_request,
+    complete_request,
+    release_request
+)
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 128
+
+
+def idempotent(scope):
+    """
+    Replay the original response for retried requests.
+    The key is the Idempotency-Key header, or a hash of the JSON body when
+    the caller does not send one. Only 2xx responses are stored; failures
+    release the key so a retry is processed normally.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            key = (request.headers.get(IDEMPOTENCY_HEADER) or "").strip()
+            if not key:
+                data = request.get_json(silent=True)
+                if not data:
+                    return f(*args, **kwargs)
+                key = payload_key(data)
+
+            if len(key) > MAX_KEY_LENGTH:
+                return jsonify({"error": f"{IDEMPOTENCY_HEADER} must be at most {MAX_KEY_LENGTH} characters"}), 400
+
+            try:
+                existing = begin_request(scope, key)
+            except Exception as e:
+                # The store is a guard, not a dependency: fall through if it is unavailable
+                logger.error(f"Idempotency store unavailable for {scope}: {e}")
+                return f(*args, **kwargs)
+
+            if existing:
+                if existing.get("status") == COMPLETED:
+                    replay = make_response(existing["response_body"], existing["response_code"])
+                    replay.mimetype = "application/json"
+                    replay.headers["Idempotent-Replayed"] = "true"
+                    return replay
+
+                return jsonify({
+                    "success": False,
+                    "error": "A request with this idempotency key is already being processed"
+                }), 409
+
+            try:
+                response = make_response(f(*args, **kwargs))
+            except Exception:
+                release_request(scope, key)
+                raise
+
+            if 200 <= response.status_code < 300:
+                try:
+                    complete_request(scope, key, response.status_code, response.get_data(as_text=True))
+                except Exception as e:
+                    logger.error(f"Could not store idempotent response for {scope}: {e}")
+            else:
+                release_request(scope, key)
+
+            return response
+
+        return decorated
+
+    return decorator
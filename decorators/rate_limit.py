@@ -0,0 +1,70 @@
+import hmac
+import math
+import os
+from functools import wraps
+from flask import request, jsonify
+from services.rate_limit_service import (
+    LOAD_SHED_RETRY_AFTER,
+    should_shed_load,
+    check_rate_limit,
+    acquire_ingestion_slot,
+    release_ingestion_slot,
+    record_rejection
+)
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+
+
+def _too_many_requests(message, retry_after):
+    response = jsonify({"success": False, "error": message})
+    response.status_code = 429
+    response.headers["Retry-After"] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+def _valid_key(api_key, key_env):
+    expected = os.getenv(key_env) if key_env else None
+    if not api_key or not expected:
+        return False
+    return hmac.compare_digest(api_key.strip().encode("utf-8"), expected.strip().encode("utf-8"))
+
+
+def ingestion_guard(scope, key_env, key_header="X-API-Key", key_param=None):
+    """
+    Protect a public ingestion endpoint, cheapest check first:
+    1. shed load while the DB pool is nearly exhausted
+    2. token bucket: per API key when the request carries the valid key
+       (`key_env` names its env var; header, or query param), otherwise
+       per client IP, so one shared NAT address can't starve an integration
+       and unauthenticated callers can't mint buckets with made-up keys
+    3. cap concurrent ingestion requests, waiting briefly for a slot
+    Every refusal is a 429 with Retry-After.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            if not RATE_LIMIT_ENABLED:
+                return f(*args, **kwargs)
+
+            if should_shed_load():
+                record_rejection(scope, "load_shed")
+                return _too_many_requests("Server is busy, please retry shortly", LOAD_SHED_RETRY_AFTER)
+
+            api_key = request.headers.get(key_header) or (request.args.get(key_param) if key_param else None)
+            allowed, retry_after = check_rate_limit(scope, api_key if _valid_key(api_key, key_env) else None)
+            if not allowed:
+                record_rejection(scope, "rate_limited")
+                return _too_many_requests("Rate limit exceeded", retry_after)
+
+            if not acquire_ingestion_slot():
+                record_rejection(scope, "concurrency")
+                return _too_many_requests("Too many concurrent requests, please retry shortly", 1)
+
+            try:
+                return f(*args, **kwargs)
+            finally:
+                release_ingestion_slot()
+
+        return decorated
+
+    return decorator
@@ -0,0 +1,100 @@
+"""
+Production entry point:
+
+    gunicorn -c gunicorn.conf.py "app:create_app()"
+
+Sizing (all overridable from the environment):
+  threads  GUNICORN_THREADS, default DB_POOL_SIZE, so a worker never runs
+           more concurrent requests than it has pooled connections
+  workers  GUNICORN_WORKERS, default 2 x CPUs + 1, capped so that
+           workers x (DB_POOL_SIZE + DB_POOL_MAX_OVERFLOW + replica pool)
+           stays within DB_MAX_CONNECTIONS (the share of MySQL's
+           max_connections this deployment may use)
+
+GUNICORN_WORKER_CLASS=gevent is supported for I/O-heavy loads (MCube
+calls, exports); it needs `pip install gevent` and the pure-Python MySQL
+driver (use_pure), since the C extension blocks the event loop. Compare
+the two with benchmarks/http_load.py.
+
+On SIGTERM each worker first fails /health/ready for GRACEFUL_DRAIN_SECONDS
+so the load balancer stops sending traffic, then finishes in-flight
+requests within GUNICORN_GRACEFUL_TIMEOUT before exiting.
+"""
+import os
+import signal
+import threading
+import multiprocessing
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+_cpus = multiprocessing.cpu_count()
+_pool_size = int(os.getenv("DB_POOL_SIZE", "20"))
+_connections_per_worker = (
+    _pool_size
+    + int(os.getenv("DB_POOL_MAX_OVERFLOW", "0"))
+    + (int(os.getenv("DB_REPLICA_POOL_SIZE", "10")) if os.getenv("DB_REPLICA_HOST") else 0)
+)
+_max_connections = int(os.getenv("DB_MAX_CONNECTIONS", "150"))
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+workers = int(os.getenv(
+    "GUNICORN_WORKERS",
+    max(1, min(2 * _cpus + 1, _max_connections // max(_connections_per_worker, 1)))
+))
+threads = int(os.getenv("GUNICORN_THREADS", _pool_size))
+# gevent: concurrent greenlets per worker, bounded by the same pool
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", _pool_size * 5))
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+drain_seconds = float(os.getenv("GRACEFUL_DRAIN_SECONDS", "10"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30")) + int(drain_seconds)
+
+# Recycle workers now and then to cap slow leaks
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "5000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "500"))
+
+# The app is imported in each worker, so pools, scheduler and queue threads
+# are created there. Preloading would start them in the master instead.
+preload_app = False
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-")
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+
+
+def post_fork(server, worker):
+    # Fresh pools and HTTP sessions per worker, never the parent's sockets
+    import db
+    from services.mcube_client import reset_session
+
+    try:
+        db.init_pools()
+    except Exception as e:
+        # Not fatal: get_db() retries on first use and readiness reports it
+        server.log.warning(f"Worker {worker.pid}: DB pool not created yet: {e}")
+    reset_session()
+
+
+def post_worker_init(worker):
+    from utils.lifecycle import begin_drain
+
+    stop = worker.handle_exit
+
+    def drain_then_exit(signum, frame):
+        begin_drain()
+        worker.log.info(f"Worker {worker.pid} draining for {drain_seconds:.0f}s before shutdown")
+        timer = threading.Timer(drain_seconds, stop, args=(signum, frame))
+        timer.daemon = True
+        timer.start()
+
+    signal.signal(signal.SIGTERM, drain_then_exit)
+
+
+def worker_exit(server, worker):
+    from utils.lifecycle import shutdown_background_work
+
+    shutdown_background_work()
@@ -0,0 +1,42 @@
+"""
+Standalone scheduler process.
+
+Run the cron jobs outside the web workers:
+
+    SCHEDULER_MODE=standalone   # in the web workers' environment
+    python scheduler.py
+
+Several copies can run for failover; leader election ensures only one of
+them executes jobs at a time.
+"""
+import signal
+import threading
+
+from dotenv import load_dotenv
+from flask import Flask
+
+load_dotenv()
+
+from services.scheduler_service import init_scheduler, scheduler  # noqa: E402
+from services.scheduler_lock_service import INSTANCE_ID, stop_leader_election  # noqa: E402
+
+app = Flask(__name__)
+stopping = threading.Event()
+
+
+def _shutdown(signum, frame):
+    stopping.set()
+
+
+if __name__ == "__main__":
+    signal.signal(signal.SIGTERM, _shutdown)
+    signal.signal(signal.SIGINT, _shutdown)
+
+    init_scheduler(app)
+    print(f"Scheduler process {INSTANCE_ID} started")
+
+    stopping.wait()
+
+    scheduler.shutdown(wait=True)
+    stop_leader_election()
+    print(f"Scheduler process {INSTANCE_ID} stopped")
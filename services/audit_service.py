@@ -1,5 +1,8 @@
+import logging
 from db import get_db
 
+logger = logging.getLogger(__name__)
+
 
 # --------------------------------
 # INSERT AUDIT LOG (Already Working)
@@ -31,10 +34,10 @@ def log_audit(object_name, object_id, property_name, old_value, new_value, modif
         cursor.execute(query, values)
         conn.commit()
 
-        print(f"AUDIT LOG INSERTED → {object_name} | {object_id} | {action_type}")
+        logger.debug(f"Audit log inserted: {object_name} | {object_id} | {action_type}")
 
     except Exception as e:
-        print("AUDIT LOG ERROR:", e)
+        logger.error(f"Audit log insert failed: {e}")
 
     finally:
         if cursor:
@@ -43,6 +46,30 @@ def log_audit(object_name, object_id, property_name, old_value, new_value, modif
             conn.close()
 
 
+# --------------------------------
+# INSERT AUDIT LOGS IN BULK
+# --------------------------------
+def log_audit_batch(cursor, entries):
+    """
+    Insert several audit rows on the caller's cursor so they commit (or roll
+    back) together with the change they describe.
+    entries: iterable of (object_name, object_id, property_name,
+                          old_value, new_value, modified_by, action_type)
+    """
+    rows = [
+        (object_name, str(object_id), property_name, old_value, new_value, modified_by, action_type)
+        for object_name, object_id, property_name, old_value, new_value, modified_by, action_type in entries
+    ]
+    if not rows:
+        return
+
+    cursor.executemany("""
+        INSERT INTO audit_trail
+        (object_name, object_id, property_name, old_value, new_value, modified_by, action_type)
+        VALUES (%s,%s,%s,%s,%s,%s,%s)
+    """, rows)
+
+
 # --------------------------------
 # FETCH AUDIT LOGS (For Frontend)
 # --------------------------------
@@ -52,7 +79,7 @@ def get_audit_logs():
     cursor = None
 
     try:
-        conn = get_db()
+        conn = get_db(readonly=True)
         cursor = conn.cursor(dictionary=True)
 
         query = """
@@ -112,7 +139,7 @@ def get_audit_logs():
         return logs
 
     except Exception as e:
-        print("FETCH AUDIT LOG ERROR:", e)
+        logger.error(f"Audit log fetch failed: {e}")
         return []
 
     finally:
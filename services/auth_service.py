@@ -4,7 +4,7 @@ from db import get_db
 import logging
 import jwt
 import datetime
-from config import PRIVATE_KEY, PUBLIC_KEY
+from config import get_private_key, get_public_key
 from services.email_service import send_reset_email
 from utils.validators import validate_password_strength
 
@@ -113,7 +113,7 @@ class AuthService:
                 "exp": datetime.datetime.utcnow() + datetime.timedelta(minutes=15)
             }
 
-            token = jwt.encode(payload, PRIVATE_KEY, algorithm="RS256")
+            token = jwt.encode(payload, get_private_key(), algorithm="RS256")
 
             frontend_url = os.getenv("FRONTEND_URL", "http://localhost:4200")
             reset_link = f"{frontend_url}/reset-password?token={token}"
@@ -138,7 +138,7 @@ class AuthService:
         try:
             decoded = jwt.decode(
                 token,
-                PUBLIC_KEY,
+                get_public_key(),
                 algorithms=["RS256"]
             )
 
@@ -8,14 +8,8 @@ from services.webhook_service import (
     _auto_assign_employee,
     _find_project_by_name,
     _find_source_by_name,
-    _update_assignment_tracker,
 )
 
-try:
-    from openpyxl import load_workbook
-except ImportError:  # pragma: no cover - optional dependency for xlsx support
-    load_workbook = None
-
 
 EXPECTED_COLUMNS = [
     "first_name",
@@ -83,7 +77,10 @@ def _read_csv_rows(file_storage) -> List[Dict[str, str]]:
 
 
 def _read_xlsx_rows(file_storage) -> List[Dict[str, str]]:
-    if load_workbook is None:
+    try:
+        # Imported here: openpyxl is slow to load and only XLSX uploads need it
+        from openpyxl import load_workbook
+    except ImportError:  # pragma: no cover - optional dependency for xlsx support
         raise ValueError("XLSX upload requires openpyxl to be installed on the backend")
 
     workbook = load_workbook(filename=io.BytesIO(file_storage.read()), read_only=True, data_only=True)
@@ -300,7 +297,7 @@ def _build_lead_payload(cursor, row: Dict[str, str]) -> Tuple[Dict[str, str], bo
 
     project_id, source_id = _match_required_ids(cursor, row)
     explicit_assignee = _resolve_explicit_assignee(cursor, row)
-    assigned_to = explicit_assignee or _auto_assign_employee(cursor, project_id)
+    assigned_to = explicit_assignee or _auto_assign_employee(project_id)
     status_id = _get_new_enquiry_status(cursor)
 
     return ({
@@ -347,18 +344,12 @@ def process_bulk_lead_upload(file_storage, actor_id: str) -> Dict[str, Any]:
         for index, row in enumerate(rows, start=2):
             cursor = conn.cursor(dictionary=True)
             try:
-                lead_payload, used_explicit_assignee = _build_lead_payload(cursor, row)
+                lead_payload, _ = _build_lead_payload(cursor, row)
                 assigned_to = lead_payload["assigned_to"]
-                project_id = lead_payload["project"]
 
                 cursor.close()
                 lead_id = add_new_lead(lead_payload, actor_id=actor_id, role="ADMIN")
 
-                if not used_explicit_assignee:
-                    tracker_cursor = conn.cursor(dictionary=True)
-                    _update_assignment_tracker(tracker_cursor, project_id, assigned_to)
-                    tracker_cursor.close()
-
                 conn.commit()
 
                 created_leads.append({
@@ -1,5 +1,72 @@
-from datetime import datetime
-from db import get_db
+import os
+import time
+import base64
+import threading
+from datetime import datetime, timedelta
+from db import get_db, db_cursor
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+CALL_LOG_INDEXES = {
+    "idx_call_log_time": "call_time, call_id",
+    "idx_call_log_emp_time": "emp_id, call_time",
+    "idx_call_log_lead_time": "lead_id, call_time",
+    "idx_call_log_status_time": "call_status, call_time",
+    "idx_call_log_source_time": "call_source, call_time",
+}
+
+# -------------------------
+# Active call sessions
+# -------------------------
+# call_id -> {"lead_id", "emp_id", "call_time"} for calls started in this
+# process. It lets end_call_service return the duration without reading the
+# row back; calls started on another worker fall back to LAST_INSERT_ID().
+
+CALL_SESSION_TTL_SECONDS = int(os.getenv("CALL_SESSION_TTL_SECONDS", str(4 * 60 * 60)))
+
+CALL_SESSION_SWEEP_SECONDS = 15 * 60
+
+_active_calls = {}
+_active_calls_lock = threading.Lock()
+_last_sweep = time.monotonic()
+
+
+def _register_call(call_id, lead_id, emp_id, call_time):
+    global _last_sweep
+    with _active_calls_lock:
+        _active_calls[call_id] = {"lead_id": lead_id, "emp_id": emp_id, "call_time": call_time}
+
+    # The registry is per process, so each process sweeps its own
+    if time.monotonic() - _last_sweep > CALL_SESSION_SWEEP_SECONDS:
+        _last_sweep = time.monotonic()
+        sweep_stale_call_sessions()
+
+
+def _pop_call(call_id):
+    with _active_calls_lock:
+        return _active_calls.pop(call_id, None)
+
+
+def get_active_calls(emp_id=None):
+    """Calls started in this process that have not ended yet."""
+    with _active_calls_lock:
+        sessions = list(_active_calls.items())
+    return [
+        {"call_id": call_id, **session}
+        for call_id, session in sessions
+        if emp_id is None or session["emp_id"] == emp_id
+    ]
+
+
+def sweep_stale_call_sessions(max_age_seconds=None):
+    """Drop sessions whose end was never reported. Returns the count removed."""
+    cutoff = datetime.now() - timedelta(seconds=max_age_seconds or CALL_SESSION_TTL_SECONDS)
+    with _active_calls_lock:
+        stale = [call_id for call_id, session in _active_calls.items() if session["call_time"] < cutoff]
+        for call_id in stale:
+            del _active_calls[call_id]
+    return len(stale)
 
 
 def start_call_service(lead_id, emp_id):
@@ -7,7 +74,7 @@ def start_call_service(lead_id, emp_id):
     cursor = db.cursor()
 
     try:
-        call_time = datetime.now()
+        call_time = datetime.now().replace(microsecond=0)
 
         cursor.execute("""
             INSERT INTO call_log
@@ -22,7 +89,9 @@ def start_call_service(lead_id, emp_id):
         ))
 
         db.commit()
-        return cursor.lastrowid
+        call_id = cursor.lastrowid
+        _register_call(call_id, lead_id, emp_id, call_time)
+        return call_id
 
     finally:
         cursor.close()
@@ -30,41 +99,51 @@ def start_call_service(lead_id, emp_id):
 
 
 def end_call_service(call_id):
-    db = get_db()
-    cursor = db.cursor(dictionary=True)
-
+    """
+    Close a call with one conditional UPDATE (no read of the row first).
+    Repeat calls match no row and return ALREADY_ENDED, so ending is idempotent.
+    """
     try:
-        # Fetch call start time and duration
-        cursor.execute("""
-            SELECT call_time, call_duration
-            FROM call_log
-            WHERE call_id = %s
-        """, (call_id,))
-        call = cursor.fetchone()
+        call_id = int(call_id)
+    except (TypeError, ValueError):
+        return None
 
-        if not call:
-            return None  # Call not found
-
-        if call["call_duration"] is not None:
-            return "ALREADY_ENDED"
+    session = _pop_call(call_id)
+    # Known session: duration from the registered start time (same clock that
+    # wrote call_time). Otherwise MySQL derives it from the stored call_time.
+    duration = None
+    if session:
+        duration = max(int((datetime.now() - session["call_time"]).total_seconds()), 0)
 
-        end_time = datetime.now()
-        duration = int((end_time - call["call_time"]).total_seconds())
+    db = get_db()
+    cursor = db.cursor()
 
+    try:
         cursor.execute("""
             UPDATE call_log
             SET
-                call_duration = %s,
+                call_duration = LAST_INSERT_ID(COALESCE(%s, GREATEST(TIMESTAMPDIFF(SECOND, call_time, NOW()), 0))),
                 call_status = %s
-            WHERE call_id = %s
+            WHERE call_id = %s AND call_duration IS NULL
         """, (
             duration,
             "Connected",   # or "Completed" ONLY if ENUM allows it
             call_id
         ))
 
-        db.commit()
-        return duration
+        if cursor.rowcount == 1:
+            db.commit()
+            if duration is None:
+                cursor.execute("SELECT LAST_INSERT_ID()")
+                duration = cursor.fetchone()[0]
+            return duration
+
+        # Nothing updated: either an unknown id or a call that already ended
+        cursor.execute("SELECT 1 FROM call_log WHERE call_id = %s", (call_id,))
+        if not cursor.fetchone():
+            return None  # Call not found
+
+        return "ALREADY_ENDED"
 
     finally:
         cursor.close()
@@ -72,7 +151,7 @@ def end_call_service(call_id):
 
 
 def get_call_logs_service():
-    db = get_db()
+    db = get_db(readonly=True)
     cursor = db.cursor(dictionary=True)
 
     try:
@@ -95,13 +174,126 @@ def get_call_logs_service():
         cursor.close()
         db.close()
 
-def get_call_logs_for_ui():
-    db = get_db()
+def ensure_call_log_schema():
+    """
+    Composite indexes backing the call-log screen filters. Each one ends in
+    call_time so the keyset ORDER BY call_time DESC, call_id DESC is served
+    straight from the index (call_id is the clustered key, so it rides along).
+    Run by services.schema_service, not on a request.
+    """
+    with db_cursor() as (db, cursor):
+        for index_name, columns in CALL_LOG_INDEXES.items():
+            cursor.execute("SHOW INDEX FROM call_log WHERE Key_name = %s", (index_name,))
+            if not cursor.fetchall():
+                cursor.execute(f"CREATE INDEX {index_name} ON call_log ({columns})")
+
+
+def _format_duration(seconds, verbose=False):
+    if seconds is None:
+        return '-'
+    seconds = int(seconds)
+    if verbose:
+        return f"{seconds // 60} min {seconds % 60} sec"
+    return f"{seconds // 60}m {seconds % 60}s"
+
+
+def _encode_page_cursor(call_time, call_id):
+    # Rows without a call_time sort last; their cursor carries an empty time
+    time_part = call_time.strftime('%Y-%m-%d %H:%M:%S.%f') if call_time else ""
+    raw = f"{time_part}|{call_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_page_cursor(token):
+    try:
+        raw = base64.urlsafe_b64decode(token.encode()).decode()
+        call_time, call_id = raw.split("|", 1)
+        parsed_time = datetime.strptime(call_time, '%Y-%m-%d %H:%M:%S.%f') if call_time else None
+        return parsed_time, int(call_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def _build_call_log_filters(filters):
+    conditions = []
+    params = []
+
+    if filters.get("emp_id"):
+        conditions.append("c.emp_id = %s")
+        params.append(filters["emp_id"])
+
+    if filters.get("lead_id"):
+        conditions.append("c.lead_id = %s")
+        params.append(filters["lead_id"])
+
+    if filters.get("status"):
+        conditions.append("c.call_status = %s")
+        params.append(filters["status"])
+
+    if filters.get("source"):
+        conditions.append("c.call_source = %s")
+        params.append(filters["source"])
+
+    if filters.get("start_date"):
+        conditions.append("c.call_time >= %s")
+        params.append(filters["start_date"])
+
+    if filters.get("end_date"):
+        end_date = filters["end_date"]
+        if len(end_date) == 10:
+            # Whole-day upper bound without wrapping call_time in DATE()
+            conditions.append("c.call_time < DATE_ADD(%s, INTERVAL 1 DAY)")
+        else:
+            conditions.append("c.call_time <= %s")
+        params.append(end_date)
+
+    return conditions, params
+
+
+def serialize_call_log_row(row):
+    seconds = row.pop("callDurationSeconds", None)
+    row["callDuration"] = _format_duration(seconds)
+    return row
+
+
+def get_call_logs_for_ui(filters=None, limit=None, cursor_token=None):
+    """
+    Call log listing, newest first (rows without a call_time last).
+    With neither limit nor cursor_token every matching row is returned, as
+    the legacy screen expects; otherwise it is keyset-paginated.
+    Returns {"data": [...], "next_cursor": str|None, "has_more": bool}.
+    """
+    filters = filters or {}
+    paginate = limit is not None or cursor_token is not None
+    if paginate:
+        limit = max(1, min(int(limit or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE))
+
+    conditions, params = _build_call_log_filters(filters)
+
+    if cursor_token:
+        last_time, last_id = _decode_page_cursor(cursor_token)
+        if last_time is None:
+            conditions.append("(c.call_time IS NULL AND c.call_id < %s)")
+            params.append(last_id)
+        else:
+            # DESC puts NULL call_time rows after every dated row
+            conditions.append("(c.call_time < %s OR (c.call_time = %s AND c.call_id < %s) OR c.call_time IS NULL)")
+            params.extend([last_time, last_time, last_id])
+
+    where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    limit_clause = "LIMIT %s" if paginate else ""
+    if paginate:
+        params.append(limit + 1)
+
+    db = get_db(readonly=True)
     cursor = db.cursor(dictionary=True)
 
     try:
-        cursor.execute("""
+
+        # Page the narrow call_log rows first, then join names for that page only
+        cursor.execute(f"""
             SELECT
+                c.call_id AS callId,
                 CONCAT_WS(' ',
                     e.emp_first_name,
                     e.emp_middle_name,
@@ -117,27 +309,40 @@ def get_call_logs_for_ui():
                 cu.phone_num AS phoneNumber,
                 c.call_source AS callType,
                 c.call_status AS callStatus,
-
-                CASE
-                    WHEN c.call_duration IS NULL THEN '-'
-                    ELSE CONCAT(
-                        FLOOR(c.call_duration / 60), 'm ',
-                        MOD(c.call_duration, 60), 's'
-                    )
-                END AS callDuration,
-
+                c.call_duration AS callDurationSeconds,
                 c.call_time AS callTime,
                 l.lead_description AS remarks,
                 c.recording_url AS recordingUrl
 
-            FROM call_log c
+            FROM (
+                SELECT c.call_id
+                FROM call_log c
+                {where_clause}
+                ORDER BY c.call_time DESC, c.call_id DESC
+                {limit_clause}
+            ) page
+            JOIN call_log c ON c.call_id = page.call_id
             LEFT JOIN employee e ON c.emp_id = e.emp_id
             LEFT JOIN leads l ON c.lead_id = l.lead_id
             LEFT JOIN customer cu ON l.customer_id = cu.customer_id
-            ORDER BY c.call_time DESC
-        """)
+            ORDER BY c.call_time DESC, c.call_id DESC
+        """, tuple(params))
 
-        return cursor.fetchall()
+        rows = cursor.fetchall()
+        has_more = paginate and len(rows) > limit
+        if paginate:
+            rows = rows[:limit]
+
+        next_cursor = None
+        if has_more and rows:
+            last = rows[-1]
+            next_cursor = _encode_page_cursor(last["callTime"], last["callId"])
+
+        return {
+            "data": [serialize_call_log_row(row) for row in rows],
+            "next_cursor": next_cursor,
+            "has_more": has_more
+        }
 
     finally:
         cursor.close()
@@ -158,13 +363,7 @@ def get_call_logs_for_lead_ui(lead_id):
                     WHEN c.call_duration IS NULL THEN NULL
                     ELSE CAST(ADDTIME(TIME(c.call_time), SEC_TO_TIME(c.call_duration)) AS CHAR)
                 END AS endTime,
-                CASE
-                    WHEN c.call_duration IS NULL THEN '-'
-                    ELSE CONCAT(
-                        FLOOR(c.call_duration / 60), ' min ',
-                        MOD(c.call_duration, 60), ' sec'
-                    )
-                END AS duration,
+                c.call_duration AS durationSeconds,
                 c.call_status AS callStatus,
                 c.call_source AS callSource,
                 c.call_time AS callTime,
@@ -182,7 +381,10 @@ def get_call_logs_for_lead_ui(lead_id):
             ORDER BY c.call_time DESC
         """, (lead_id,))
 
-        return cursor.fetchall()
+        rows = cursor.fetchall()
+        for row in rows:
+            row["duration"] = _format_duration(row.pop("durationSeconds", None), verbose=True)
+        return rows
 
     finally:
         cursor.close()
@@ -1,7 +1,6 @@
 from db import get_db
-from services.audit_service import log_audit
-from services.notification_service import create_notification
-from datetime import datetime
+from services.audit_service import log_audit_batch
+from services.lead_event_bus import LeadEvent, ACTIVITY_SCHEDULED, stage_event, dispatch
 
 
 def _ensure_scheduled_activities_table(cursor):
@@ -65,6 +64,7 @@ def create_scheduled_activity(lead_id, status_id, scheduled_at, remarks, created
             remarks,
             created_by
         ))
+        schedule_id = cursor.lastrowid
 
         cursor.execute("""
             INSERT INTO lead_status_history
@@ -91,85 +91,19 @@ def create_scheduled_activity(lead_id, status_id, scheduled_at, remarks, created
         ))
 
         if old_status_id != status_id:
-            log_audit(
-                "Leads",
-                lead_id,
-                "status_id",
-                old_status_id,
-                status_id,
-                created_by,
-                "UPDATE"
-            )
+            log_audit_batch(cursor, [
+                ("Leads", lead_id, "status_id", old_status_id, status_id, created_by, "UPDATE")
+            ])
 
-        cursor.execute("""
-            SELECT status_name
-            FROM lead_status
-            WHERE status_id = %s
-        """, (status_id,))
-        status_row = cursor.fetchone()
-        status_name = status_row["status_name"] if status_row else None
+        # Visit notifications go out through the event bus after commit
+        event = stage_event(cursor, LeadEvent(ACTIVITY_SCHEDULED, lead_id, created_by, {
+            "schedule_id": schedule_id,
+            "status_id": status_id,
+            "scheduled_at": normalized_scheduled_at
+        }))
 
-        cursor.execute("""
-            SELECT TRIM(CONCAT(c.customer_first_name,' ',IFNULL(c.customer_last_name,''))) AS lead_name
-            FROM customer c
-            WHERE c.customer_id = %s
-        """, (lead["customer_id"],))
-        lead_row = cursor.fetchone()
-        lead_name = lead_row["lead_name"] if lead_row else lead_id
-
-        if status_name in ["Expected Site Visit", "Site Visit Done"]:
-            if status_name == "Expected Site Visit":
-                visit_time = normalized_scheduled_at
-                try:
-                    visit_time = datetime.strptime(normalized_scheduled_at, "%Y-%m-%d %H:%M:%S").strftime("%d-%m-%Y %I:%M %p")
-                except Exception:
-                    pass
-
-                message = f"{lead_name} ({lead_id}) is expected to visit the site on {visit_time}."
-            else:
-                message = f"{lead_name} ({lead_id}) has completed the site visit."
-
-            cursor.execute("""
-                SELECT emp_id
-                FROM employee
-                WHERE emp_status = 'Active'
-            """)
-            users = cursor.fetchall()
-
-            for user in users:
-                create_notification(
-                    user["emp_id"],
-                    status_name,
-                    message,
-                    "Leads",
-                    lead_id
-                )
-
-        if status_name in ["Expected Office Visit", "Office Visit Done"]:
-            if status_name == "Expected Office Visit":
-                message = f"{lead_name} ({lead_id}) is expected to visit the office."
-            else:
-                message = f"{lead_name} ({lead_id}) has completed the office visit."
-
-            cursor.execute("""
-                SELECT emp_id
-                FROM employee
-                WHERE emp_status = 'Active'
-                  AND role_id = 'ADMIN'
-            """)
-            admins = cursor.fetchall()
-
-            for admin in admins:
-                create_notification(
-                    admin["emp_id"],
-                    status_name,
-                    message,
-                    "Leads",
-                    lead_id
-                )
-
-        schedule_id = cursor.lastrowid
         conn.commit()
+        dispatch(event)
 
         cursor.execute("""
             SELECT
@@ -0,0 +1,161 @@
+import os
+import json
+import hashlib
+import logging
+from db import get_db, db_cursor
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_TTL_HOURS = int(os.getenv("IDEMPOTENCY_TTL_HOURS", "24"))
+# An in-progress reservation is a lease: if the worker dies mid-request
+# (e.g. killed by gunicorn's timeout) a retry may take it over once it lapses.
+# Keep it longer than the worker timeout.
+IDEMPOTENCY_LEASE_SECONDS = int(os.getenv("IDEMPOTENCY_LEASE_SECONDS", "150"))
+
+IN_PROGRESS = "in_progress"
+COMPLETED = "completed"
+
+_table_ready = False
+
+
+def _ensure_idempotency_table(cursor):
+    global _table_ready
+    if _table_ready:
+        return
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS request_idempotency (
+            scope VARCHAR(50) NOT NULL,
+            idem_key VARCHAR(128) NOT NULL,
+            status VARCHAR(20) NOT NULL,
+            response_code INT NULL,
+            response_body MEDIUMTEXT NULL,
+            created_on DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            locked_until DATETIME NULL,
+            expires_at DATETIME NOT NULL,
+            PRIMARY KEY (scope, idem_key),
+            KEY idx_request_idempotency_expiry (expires_at)
+        )
+    """)
+    _table_ready = True
+
+
+def ensure_idempotency_schema():
+    """Adds the lease column to existing tables. Run by services.schema_service."""
+    with db_cursor() as (db, cursor):
+        _ensure_idempotency_table(cursor)
+        cursor.execute("SHOW COLUMNS FROM request_idempotency LIKE 'locked_until'")
+        if not cursor.fetchall():
+            cursor.execute("ALTER TABLE request_idempotency ADD COLUMN locked_until DATETIME NULL AFTER created_on")
+
+
+def payload_key(data):
+    """Stable hash of a JSON payload, used when the caller sends no Idempotency-Key."""
+    canonical = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def begin_request(scope, key):
+    """
+    Reserve `key` for this request.
+    Returns None when the caller should proceed, otherwise the stored record:
+    {"status": "completed", "response_code", "response_body"} for a replay, or
+    {"status": "in_progress"} while the original request is still running.
+    An in-progress reservation whose lease has lapsed is taken over.
+    """
+    db = get_db()
+    cursor = db.cursor(dictionary=True)
+
+    try:
+        _ensure_idempotency_table(cursor)
+
+        cursor.execute("""
+            DELETE FROM request_idempotency
+            WHERE scope = %s AND idem_key = %s AND expires_at < NOW()
+        """, (scope, key))
+
+        cursor.execute("""
+            INSERT IGNORE INTO request_idempotency (scope, idem_key, status, locked_until, expires_at)
+            VALUES (%s, %s, %s, NOW() + INTERVAL %s SECOND, NOW() + INTERVAL %s HOUR)
+        """, (scope, key, IN_PROGRESS, IDEMPOTENCY_LEASE_SECONDS, IDEMPOTENCY_TTL_HOURS))
+        reserved = cursor.rowcount == 1
+
+        if not reserved:
+            # The original holder died without completing or releasing the key
+            cursor.execute("""
+                UPDATE request_idempotency
+                SET locked_until = NOW() + INTERVAL %s SECOND
+                WHERE scope = %s AND idem_key = %s AND status = %s
+                  AND (locked_until IS NULL OR locked_until < NOW())
+            """, (IDEMPOTENCY_LEASE_SECONDS, scope, key, IN_PROGRESS))
+            reserved = cursor.rowcount == 1
+            if reserved:
+                logger.warning(f"Taking over expired idempotency lease {scope}/{key}")
+
+        db.commit()
+
+        if reserved:
+            return None
+
+        cursor.execute("""
+            SELECT status, response_code, response_body
+            FROM request_idempotency
+            WHERE scope = %s AND idem_key = %s
+        """, (scope, key))
+        return cursor.fetchone() or {"status": IN_PROGRESS}
+
+    finally:
+        cursor.close()
+        db.close()
+
+
+def complete_request(scope, key, response_code, response_body):
+    db = get_db()
+    cursor = db.cursor()
+
+    try:
+        cursor.execute("""
+            UPDATE request_idempotency
+            SET status = %s, response_code = %s, response_body = %s, locked_until = NULL
+            WHERE scope = %s AND idem_key = %s
+        """, (COMPLETED, response_code, response_body, scope, key))
+        db.commit()
+
+    finally:
+        cursor.close()
+        db.close()
+
+
+def release_request(scope, key):
+    """Drop a reservation so the caller can retry (used when the request failed)."""
+    db = get_db()
+    cursor = db.cursor()
+
+    try:
+        cursor.execute("""
+            DELETE FROM request_idempotency
+            WHERE scope = %s AND idem_key = %s AND status = %s
+        """, (scope, key, IN_PROGRESS))
+        db.commit()
+
+    except Exception as e:
+        logger.warning(f"Could not release idempotency key {scope}/{key}: {e}")
+
+    finally:
+        cursor.close()
+        db.close()
+
+
+def purge_expired_keys():
+    db = get_db()
+    cursor = db.cursor()
+
+    try:
+        _ensure_idempotency_table(cursor)
+        cursor.execute("DELETE FROM request_idempotency WHERE expires_at < NOW()")
+        db.commit()
+        return cursor.rowcount
+
+    finally:
+        cursor.close()
+        db.close()
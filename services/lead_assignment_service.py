@@ -0,0 +1,256 @@
+import os
+import time
+import logging
+import threading
+from db import get_db, db_cursor
+
+logger = logging.getLogger(__name__)
+
+# round_robin - alphabetical rotation (default, original behaviour)
+# weighted    - smooth weighted rotation using employee_project_mapping.assignment_weight
+# capacity    - least loaded rep relative to weight, skipping reps at max_open_leads
+ASSIGNMENT_STRATEGY = os.getenv("LEAD_ASSIGNMENT_STRATEGY", "round_robin").lower()
+ASSIGNMENT_STRATEGIES = ("round_robin", "weighted", "capacity")
+
+# Invalidation is in-process only; the TTL bounds staleness across workers.
+ROSTER_CACHE_SECONDS = int(os.getenv("ROSTER_CACHE_SECONDS", "60"))
+
+_roster_cache = {}
+_roster_lock = threading.Lock()
+
+
+def ensure_assignment_schema():
+    """
+    Tracker table plus the weight/capacity columns. Run by
+    services.schema_service, never on a request.
+    """
+    # Lazy: project_assignment_service imports this module
+    from services.project_assignment_service import _ensure_mapping_table
+
+    with db_cursor(dictionary=True) as (conn, cursor):
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS lead_assignment_tracker (
+                project_id VARCHAR(150) PRIMARY KEY,
+                last_emp_id VARCHAR(150) NULL,
+                updated_on DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                CONSTRAINT fk_lead_assignment_tracker_project
+                    FOREIGN KEY (project_id) REFERENCES project_registration(project_id),
+                CONSTRAINT fk_lead_assignment_tracker_emp
+                    FOREIGN KEY (last_emp_id) REFERENCES employee(emp_id)
+            )
+        """)
+        _ensure_mapping_table(cursor)
+        _ensure_column(cursor, "employee_project_mapping", "assignment_weight", "ALTER TABLE employee_project_mapping ADD COLUMN assignment_weight INT NOT NULL DEFAULT 1")
+        _ensure_column(cursor, "employee_project_mapping", "max_open_leads", "ALTER TABLE employee_project_mapping ADD COLUMN max_open_leads INT NULL")
+
+        if _ensure_column(cursor, "lead_assignment_tracker", "assignment_seq", "ALTER TABLE lead_assignment_tracker ADD COLUMN assignment_seq BIGINT NOT NULL DEFAULT 0"):
+            _seed_assignment_seq(cursor)
+            conn.commit()
+
+
+def _seed_assignment_seq(cursor):
+    """
+    Carry each project's rotation over from last_emp_id, so the first
+    assignment after the upgrade goes to the rep after the last one rather
+    than restarting at the top of the list.
+    """
+    cursor.execute("""
+        SELECT project_id, last_emp_id
+        FROM lead_assignment_tracker
+        WHERE last_emp_id IS NOT NULL
+    """)
+    for tracker in cursor.fetchall():
+        emp_ids = [member["emp_id"] for member in _load_roster(cursor, tracker["project_id"])["members"]]
+        if tracker["last_emp_id"] not in emp_ids:
+            continue
+        cursor.execute("""
+            UPDATE lead_assignment_tracker
+            SET assignment_seq = %s
+            WHERE project_id = %s
+        """, (emp_ids.index(tracker["last_emp_id"]) + 1, tracker["project_id"]))
+
+
+def _ensure_column(cursor, table_name, column_name, alter_sql):
+    """Adds the column if missing; True when it was added."""
+    cursor.execute(f"SHOW COLUMNS FROM {table_name} LIKE %s", (column_name,))
+    if cursor.fetchall():
+        return False
+    cursor.execute(alter_sql)
+    return True
+
+
+# -------------------------
+# Roster cache
+# -------------------------
+
+def _smooth_weighted_sequence(roster):
+    """
+    Interleaved weighted order (nginx smooth weighted round robin), e.g.
+    weights A=3, B=1 -> A A B A rather than A A A B.
+    """
+    total = sum(member["weight"] for member in roster)
+    current = {member["emp_id"]: 0 for member in roster}
+    sequence = []
+
+    for _ in range(total):
+        for member in roster:
+            current[member["emp_id"]] += member["weight"]
+        chosen = max(roster, key=lambda member: current[member["emp_id"]])
+        current[chosen["emp_id"]] -= total
+        sequence.append(chosen["emp_id"])
+
+    return sequence
+
+
+def _load_roster(cursor, project_id):
+    cursor.execute("""
+        SELECT
+            e.emp_id,
+            TRIM(CONCAT(e.emp_first_name, ' ', IFNULL(e.emp_last_name, ''))) AS full_name,
+            epm.assignment_weight,
+            epm.max_open_leads
+        FROM employee_project_mapping epm
+        JOIN employee e ON epm.emp_id = e.emp_id
+        WHERE epm.project_id = %s
+          AND epm.is_active = 1
+          AND e.emp_status = 'Active'
+          AND e.role_id = 'SALES_EXEC'
+        ORDER BY e.emp_first_name ASC, e.emp_last_name ASC, e.emp_id ASC
+    """, (project_id,))
+
+    roster = [{
+        "emp_id": row["emp_id"],
+        "full_name": row["full_name"],
+        "weight": max(int(row["assignment_weight"] or 1), 1),
+        "max_open_leads": row["max_open_leads"],
+    } for row in cursor.fetchall()]
+
+    return {
+        "members": roster,
+        "weighted_sequence": _smooth_weighted_sequence(roster) if roster else [],
+        "expires_at": time.monotonic() + ROSTER_CACHE_SECONDS,
+    }
+
+
+def get_project_roster(cursor, project_id):
+    """Eligible SALES_EXEC roster for a project, cached per process."""
+    with _roster_lock:
+        cached = _roster_cache.get(project_id)
+    if cached and cached["expires_at"] > time.monotonic():
+        return cached
+
+    roster = _load_roster(cursor, project_id)
+    with _roster_lock:
+        _roster_cache[project_id] = roster
+    return roster
+
+
+def invalidate_roster(project_id=None):
+    """Drop one project's cached roster, or all of them when project_id is None."""
+    with _roster_lock:
+        if project_id is None:
+            _roster_cache.clear()
+        else:
+            _roster_cache.pop(project_id, None)
+
+
+# -------------------------
+# Assignment
+# -------------------------
+
+def _advance_cursor(cursor, project_id):
+    """
+    Atomically bump the project's assignment counter and return the new value.
+    The upsert takes the tracker row lock, so concurrent callers always see
+    distinct sequence numbers.
+    """
+    cursor.execute("""
+        INSERT INTO lead_assignment_tracker (project_id, assignment_seq)
+        VALUES (%s, LAST_INSERT_ID(1))
+        ON DUPLICATE KEY UPDATE
+            assignment_seq = LAST_INSERT_ID(assignment_seq + 1),
+            updated_on = CURRENT_TIMESTAMP
+    """, (project_id,))
+    cursor.execute("SELECT LAST_INSERT_ID() AS seq")
+    return cursor.fetchone()["seq"]
+
+
+def _open_lead_counts(cursor, project_id, emp_ids):
+    placeholders = ", ".join(["%s"] * len(emp_ids))
+    cursor.execute(f"""
+        SELECT emp_id, COUNT(*) AS open_leads
+        FROM leads
+        WHERE project_id = %s
+          AND is_active = 1
+          AND emp_id IN ({placeholders})
+        GROUP BY emp_id
+    """, (project_id, *emp_ids))
+    return {row["emp_id"]: row["open_leads"] for row in cursor.fetchall()}
+
+
+def _pick_by_capacity(cursor, project_id, members, seq):
+    counts = _open_lead_counts(cursor, project_id, [m["emp_id"] for m in members])
+
+    available = [
+        m for m in members
+        if m["max_open_leads"] is None or counts.get(m["emp_id"], 0) < m["max_open_leads"]
+    ]
+    if not available:
+        logger.warning(f"All reps on project {project_id} are at capacity; assigning least loaded")
+        available = members
+
+    # Rotate the starting point by seq so ties are spread rather than always
+    # landing on the alphabetically first rep.
+    offset = seq % len(available)
+    rotated = available[offset:] + available[:offset]
+    return min(rotated, key=lambda m: counts.get(m["emp_id"], 0) / m["weight"])["emp_id"]
+
+
+def assign_next_employee(project_id, strategy=None):
+    """
+    Pick the next SALES_EXEC for a project and commit the cursor move.
+    The cursor is advanced on its own short transaction so the tracker row
+    lock is never held across lead creation.
+    """
+    if not project_id:
+        raise ValueError("Project is required for automatic lead assignment")
+
+    strategy = (strategy or ASSIGNMENT_STRATEGY).lower()
+    if strategy not in ASSIGNMENT_STRATEGIES:
+        raise ValueError(f"Unknown assignment strategy '{strategy}'")
+
+    conn = get_db()
+    cursor = conn.cursor(dictionary=True)
+
+    try:
+        roster = get_project_roster(cursor, project_id)
+        members = roster["members"]
+        if not members:
+            raise ValueError("No active sales executives are mapped to this project")
+
+        seq = _advance_cursor(cursor, project_id)
+
+        if strategy == "weighted":
+            sequence = roster["weighted_sequence"]
+            emp_id = sequence[(seq - 1) % len(sequence)]
+        elif strategy == "capacity":
+            emp_id = _pick_by_capacity(cursor, project_id, members, seq)
+        else:
+            emp_id = members[(seq - 1) % len(members)]["emp_id"]
+
+        cursor.execute("""
+            UPDATE lead_assignment_tracker
+            SET last_emp_id = %s
+            WHERE project_id = %s
+        """, (emp_id, project_id))
+        conn.commit()
+
+        return emp_id
+
+    except Exception:
+        conn.rollback()
+        raise
+
+    finally:
+        cursor.close()
+        conn.close()
@@ -0,0 +1,271 @@
+"""
+In-process lead event bus.
+
+Write paths stage a LeadEvent in the lead_event_outbox table inside their own
+transaction (stage_event) and hand it to the worker pool once committed
+(dispatch). Subscribers run off the request thread. Anything a crash or a
+failing subscriber leaves behind in the outbox is redelivered by
+recover_pending_events(), which the scheduler runs every minute.
+
+A staged or recovered event is leased to its deliverer for
+DELIVERY_LEASE_SECONDS (claimed_until); recovery only picks it up once the
+lease has lapsed. Each row records the subscribers that already succeeded,
+so a redelivery runs only the ones that failed or never ran.
+
+Delivery is at-least-once, so subscribers should tolerate repeats.
+"""
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from db import get_db, db_cursor
+from services.side_effect_service import run_after_commit
+
+logger = logging.getLogger(__name__)
+
+LEAD_CREATED = "lead.created"
+LEAD_UPDATED = "lead.updated"
+LEAD_STATUS_CHANGED = "lead.status_changed"
+LEADS_TRANSFERRED = "lead.transferred"
+ACTIVITY_SCHEDULED = "lead.activity_scheduled"
+LEAD_REENQUIRED = "lead.reenquired"
+
+EVENT_TYPES = (
+    LEAD_CREATED,
+    LEAD_UPDATED,
+    LEAD_STATUS_CHANGED,
+    LEADS_TRANSFERRED,
+    ACTIVITY_SCHEDULED,
+    LEAD_REENQUIRED,
+)
+
+MAX_DELIVERY_ATTEMPTS = 5
+# Longer than the side-effect queue wait plus the slowest subscriber run
+DELIVERY_LEASE_SECONDS = 300
+RECOVERY_BATCH_SIZE = 100
+
+
+@dataclass
+class LeadEvent:
+    event_type: str
+    lead_id: Optional[str]
+    actor_id: Optional[str] = None
+    payload: Dict[str, Any] = field(default_factory=dict)
+    event_id: Optional[int] = None
+    completed_handlers: List[str] = field(default_factory=list)
+
+    def __post_init__(self):
+        if self.event_type not in EVENT_TYPES:
+            raise ValueError(f"Unknown lead event type '{self.event_type}'")
+
+
+_subscribers: Dict[str, List[Callable[[LeadEvent], None]]] = {}
+_handlers_loaded = False
+
+
+def subscribe(event_type):
+    """Decorator registering a consumer for one event type."""
+    def decorator(handler):
+        _subscribers.setdefault(event_type, []).append(handler)
+        return handler
+
+    return decorator
+
+
+def _load_handlers():
+    global _handlers_loaded
+    if not _handlers_loaded:
+        import services.lead_event_handlers  # noqa: F401  (registers subscribers)
+        _handlers_loaded = True
+
+
+def _handler_name(handler):
+    return f"{handler.__module__}.{handler.__qualname__}"
+
+
+def ensure_lead_event_schema():
+    """Outbox table and its lease columns. Run by services.schema_service."""
+    with db_cursor() as (conn, cursor):
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS lead_event_outbox (
+                event_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+                event_type VARCHAR(50) NOT NULL,
+                lead_id VARCHAR(150) NULL,
+                actor_id VARCHAR(150) NULL,
+                payload MEDIUMTEXT NULL,
+                status VARCHAR(20) NOT NULL DEFAULT 'pending',
+                attempts INT NOT NULL DEFAULT 0,
+                claimed_until DATETIME NULL,
+                completed_handlers TEXT NULL,
+                last_error TEXT NULL,
+                created_on DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                processed_at DATETIME NULL,
+                KEY idx_lead_event_outbox_status (status, created_on)
+            )
+        """)
+
+        for column, definition in (
+            ("claimed_until", "DATETIME NULL AFTER attempts"),
+            ("completed_handlers", "TEXT NULL AFTER claimed_until"),
+        ):
+            cursor.execute("SHOW COLUMNS FROM lead_event_outbox LIKE %s", (column,))
+            if not cursor.fetchall():
+                cursor.execute(f"ALTER TABLE lead_event_outbox ADD COLUMN {column} {definition}")
+
+
+# -------------------------
+# Publishing
+# -------------------------
+
+def stage_event(cursor, event):
+    """
+    Record the event in the caller's transaction. Call dispatch() after
+    commit; the row is leased to that dispatch, so recovery leaves it alone
+    until the lease lapses.
+    """
+    cursor.execute("""
+        INSERT INTO lead_event_outbox (event_type, lead_id, actor_id, payload, claimed_until)
+        VALUES (%s, %s, %s, %s, NOW() + INTERVAL %s SECOND)
+    """, (event.event_type, event.lead_id, event.actor_id,
+          json.dumps(event.payload, default=str), DELIVERY_LEASE_SECONDS))
+    event.event_id = cursor.lastrowid
+    return event
+
+
+def dispatch(*events):
+    """Queue committed events for the subscribers."""
+    for event in events:
+        if event is not None:
+            run_after_commit(deliver, event)
+
+
+def publish(event):
+    """Stage and dispatch on a dedicated connection, for callers without a transaction to join."""
+    conn = get_db()
+    cursor = conn.cursor()
+    try:
+        stage_event(cursor, event)
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
+    dispatch(event)
+    return event
+
+
+# -------------------------
+# Delivery
+# -------------------------
+
+def _mark(event, status, error=None):
+    if not event.event_id:
+        return
+
+    conn = get_db()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            UPDATE lead_event_outbox
+            SET status = %s,
+                last_error = %s,
+                completed_handlers = %s,
+                claimed_until = NULL,
+                processed_at = IF(%s = 'done', NOW(), processed_at)
+            WHERE event_id = %s
+        """, (status, error[:2000] if error else None, json.dumps(event.completed_handlers),
+              status, event.event_id))
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def deliver(event):
+    """
+    Run the subscribers for the event that have not already succeeded for
+    it, and record the outcome in the outbox.
+    """
+    _load_handlers()
+
+    errors = []
+    for handler in _subscribers.get(event.event_type, []):
+        name = _handler_name(handler)
+        if name in event.completed_handlers:
+            continue
+        try:
+            handler(event)
+            event.completed_handlers.append(name)
+        except Exception as e:
+            logger.error(f"Lead event handler {handler.__name__} failed for {event.event_type} {event.lead_id}: {e}")
+            errors.append(f"{handler.__name__}: {e}")
+
+    try:
+        _mark(event, "failed" if errors else "done", "; ".join(errors) or None)
+    except Exception as e:
+        # Left as pending/processing; recovery will redeliver it once the lease lapses
+        logger.error(f"Could not update outbox row {event.event_id}: {e}")
+
+
+def recover_pending_events():
+    """
+    Redeliver events that were staged but never completed (process crash,
+    full queue lost on restart, failing subscriber) and whose lease has
+    lapsed. Returns the count.
+    """
+    conn = get_db()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute("""
+            SELECT event_id, event_type, lead_id, actor_id, payload, completed_handlers
+            FROM lead_event_outbox
+            WHERE status IN ('pending', 'processing', 'failed')
+              AND attempts < %s
+              AND (claimed_until IS NULL OR claimed_until < NOW())
+            ORDER BY event_id
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        """, (MAX_DELIVERY_ATTEMPTS, RECOVERY_BATCH_SIZE))
+        rows = cursor.fetchall()
+
+        if rows:
+            placeholders = ", ".join(["%s"] * len(rows))
+            cursor.execute(f"""
+                UPDATE lead_event_outbox
+                SET status = 'processing',
+                    attempts = attempts + 1,
+                    claimed_until = NOW() + INTERVAL %s SECOND
+                WHERE event_id IN ({placeholders})
+            """, (DELIVERY_LEASE_SECONDS, *(row["event_id"] for row in rows)))
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
+    for row in rows:
+        deliver(LeadEvent(
+            event_type=row["event_type"],
+            lead_id=row["lead_id"],
+            actor_id=row["actor_id"],
+            payload=json.loads(row["payload"] or "{}"),
+            event_id=row["event_id"],
+            completed_handlers=json.loads(row["completed_handlers"] or "[]"),
+        ))
+
+    return len(rows)
+
+
+def purge_delivered_events(days=7):
+    conn = get_db()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            DELETE FROM lead_event_outbox
+            WHERE status = 'done' AND created_on < NOW() - INTERVAL %s DAY
+        """, (days,))
+        conn.commit()
+        return cursor.rowcount
+    finally:
+        cursor.close()
+        conn.close()
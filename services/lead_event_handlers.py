@@ -0,0 +1,401 @@
+"""
+Default subscribers for the lead event bus: the notifications and emails
+that used to run inline on the request thread.
+"""
+import logging
+from datetime import datetime
+
+from db import get_db
+from services.email_service import send_html_email
+from services.notification_service import create_notification, create_notifications
+from services.lead_event_bus import (
+    subscribe,
+    LEAD_CREATED,
+    LEAD_UPDATED,
+    LEAD_STATUS_CHANGED,
+    LEADS_TRANSFERRED,
+    ACTIVITY_SCHEDULED,
+    LEAD_REENQUIRED,
+)
+
+logger = logging.getLogger(__name__)
+
+SITE_VISIT_STATUSES = ("Expected Site Visit", "Site Visit Done")
+OFFICE_VISIT_STATUSES = ("Expected Office Visit", "Office Visit Done")
+
+
+def _fetch_one(cursor, query, params):
+    cursor.execute(query, params)
+    return cursor.fetchone()
+
+
+def _active_employee_ids(cursor, admins_only=False):
+    cursor.execute(f"""
+        SELECT emp_id
+        FROM employee
+        WHERE emp_status = 'Active'
+        {"AND role_id = 'ADMIN'" if admins_only else ""}
+    """)
+    return [row["emp_id"] for row in cursor.fetchall()]
+
+
+def _lead_name(cursor, lead_id):
+    row = _fetch_one(cursor, """
+        SELECT TRIM(CONCAT(c.customer_first_name,' ',IFNULL(c.customer_last_name,''))) AS lead_name
+        FROM leads l
+        JOIN customer c ON l.customer_id = c.customer_id
+        WHERE l.lead_id = %s
+    """, (lead_id,))
+    return row["lead_name"] if row else lead_id
+
+
+def _status_name(cursor, status_id):
+    row = _fetch_one(cursor, """
+        SELECT status_name
+        FROM lead_status
+        WHERE status_id = %s
+    """, (status_id,))
+    return row["status_name"] if row else None
+
+
+def _visit_message(lead_id, lead_name, status_name, expected_site_message=None):
+    if status_name == "Expected Site Visit":
+        return expected_site_message or f"{lead_name} ({lead_id}) is expected to visit the site."
+    if status_name == "Site Visit Done":
+        return f"{lead_name} ({lead_id}) has completed the site visit."
+    if status_name == "Expected Office Visit":
+        return f"{lead_name} ({lead_id}) is expected to visit the office."
+    return f"{lead_name} ({lead_id}) has completed the office visit."
+
+
+def _visit_notifications(cursor, lead_id, lead_name, status_name, expected_site_message=None):
+    """Site visits notify every active user; office visits notify admins."""
+    if status_name not in SITE_VISIT_STATUSES + OFFICE_VISIT_STATUSES:
+        return
+
+    message = _visit_message(lead_id, lead_name, status_name, expected_site_message)
+    recipients = _active_employee_ids(cursor, admins_only=status_name in OFFICE_VISIT_STATUSES)
+    create_notifications(
+        (emp_id, status_name, message, "Leads", lead_id) for emp_id in recipients
+    )
+
+
+# -------------------------
+# Lead created
+# -------------------------
+
+@subscribe(LEAD_CREATED)
+def notify_lead_created(event):
+    lead_id = event.lead_id
+    conn = get_db()
+    cursor = conn.cursor(dictionary=True)
+
+    try:
+        creator = _fetch_one(cursor, """
+            SELECT CONCAT(emp_first_name,' ',IFNULL(emp_last_name,'')) AS name
+            FROM employee
+            WHERE emp_id = %s
+        """, (event.actor_id,))
+        creator_name = creator["name"] if creator else event.actor_id
+
+        cursor.execute("""
+            SELECT emp_id
+            FROM employee
+            WHERE role_id = 'ADMIN'
+            AND emp_status = 'Active'
+            AND emp_id != %s
+        """, (event.actor_id,))
+        admins = [row["emp_id"] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+        conn.close()
+
+    notifications = [(
+        event.payload["emp_id"],
+        "New Lead Assigned",
+        f"Lead {lead_id} has been assigned to you by {creator_name}",
+        "Leads",
+        lead_id
+    )]
+    notifications.extend(
+        (admin_id, "New Lead Created", f"Lead {lead_id} was created by {creator_name}", "Leads", lead_id)
+        for admin_id in admins
+    )
+    create_notifications(notifications)
+
+
+# -------------------------
+# Lead updated (edit form)
+# -------------------------
+
+@subscribe(LEAD_UPDATED)
+def notify_lead_updated(event):
+    lead_id = event.lead_id
+    changes = event.payload
+    notifications = []
+
+    status_name = changes.get("status_name")
+    if status_name in SITE_VISIT_STATUSES:
+        lead_name = changes.get("lead_name") or lead_id
+        if status_name == "Expected Site Visit":
+            message = f"{lead_name} ({lead_id}) is expected to visit the site."
+        else:
+            message = f"{lead_name} ({lead_id}) has completed the site visit."
+
+        conn = get_db()
+        cursor = conn.cursor(dictionary=True)
+        try:
+            notifications.extend(
+                (emp_id, status_name, message, "Leads", lead_id)
+                for emp_id in _active_employee_ids(cursor)
+            )
+        finally:
+            cursor.close()
+            conn.close()
+
+    if changes.get("reassigned_to"):
+        notifications.append((
+            changes["reassigned_to"],
+            "Lead Reassigned",
+            f"Lead {lead_id} has been assigned to you by {changes.get('assigner_name') or 'Admin'}",
+            "Leads",
+            lead_id
+        ))
+
+    create_notifications(notifications)
+
+
+# -------------------------
+# Status changed (activity history)
+# -------------------------
+
+def _lead_names(cursor, lead_ids):
+    placeholders = ", ".join(["%s"] * len(lead_ids))
+    cursor.execute(f"""
+        SELECT l.lead_id,
+               TRIM(CONCAT(c.customer_first_name,' ',IFNULL(c.customer_last_name,''))) AS lead_name
+        FROM leads l
+        JOIN customer c ON l.customer_id = c.customer_id
+        WHERE l.lead_id IN ({placeholders})
+    """, tuple(lead_ids))
+    names = {row["lead_id"]: row["lead_name"] for row in cursor.fetchall()}
+    return {lead_id: names.get(lead_id) or lead_id for lead_id in lead_ids}
+
+
+def _send_manager_alerts(cursor, lead_ids, lead_names, remarks, subject_prefix, banner_color, banner_title, intro, role_label, footer):
+    placeholders = ", ".join(["%s"] * len(lead_ids))
+    cursor.execute(f"""
+        SELECT l.lead_id,
+               COALESCE(p.project_name, 'Unknown') AS project_name,
+               COALESCE(e.emp_first_name, 'Sales Executive') AS exec_name
+        FROM leads l
+        LEFT JOIN project_registration p ON l.project_id = p.project_id
+        LEFT JOIN employee e ON l.emp_id = e.emp_id
+        WHERE l.lead_id IN ({placeholders})
+    """, tuple(lead_ids))
+    extras = {row["lead_id"]: row for row in cursor.fetchall()}
+
+    cursor.execute("""
+        SELECT DISTINCT email FROM employee
+        WHERE role_id IN ('ADMIN', 'SALES_MGR')
+          AND email IS NOT NULL AND email != ''
+    """)
+    mgr_emails = [r['email'] for r in cursor.fetchall()]
+
+    for lead_id in lead_ids:
+        lead_extra = extras.get(lead_id) or {}
+        lead_name = lead_names[lead_id]
+        project_name = lead_extra.get('project_name', 'Unknown')
+        exec_name = lead_extra.get('exec_name', 'Sales Executive')
+
+        html = f"""
+<html><body style="font-family:Arial,sans-serif;color:#333;max-width:600px;margin:auto;">
+<div style="background:{banner_color};color:white;padding:20px;text-align:center;border-radius:6px 6px 0 0;">
+  <h2 style="margin:0;">{banner_title}</h2>
+</div>
+<div style="padding:24px;border:1px solid #e0e0e0;border-top:none;">
+  <p style="font-size:1.1em;">{intro}</p>
+  <p><strong>Lead:</strong> {lead_name}</p>
+  <p><strong>Lead ID:</strong> {lead_id}</p>
+  <p><strong>Project:</strong> {project_name}</p>
+  <p><strong>{role_label}:</strong> {exec_name}</p>
+  <p><strong>Remarks:</strong> {remarks or 'N/A'}</p>
+  <p style="margin-top:20px;font-size:0.9em;color:#666;">{footer}</p>
+</div>
+<div style="background:#f2f2f2;padding:8px;text-align:center;font-size:0.8em;color:#888;">CRM Automated Notification</div>
+</body></html>
+"""
+        for mgr_email in mgr_emails:
+            try:
+                send_html_email(mgr_email, f"{subject_prefix} – {lead_name} ({project_name})", html)
+            except Exception as mail_err:
+                logger.warning(f"Failed to send '{subject_prefix}' email to {mgr_email}: {mail_err}")
+
+
+@subscribe(LEAD_STATUS_CHANGED)
+def notify_status_changed(event):
+    """
+    Handles single status changes (create_history) and bulk ones, where
+    payload["lead_ids"] lists every lead moved to the same status.
+    """
+    lead_ids = event.payload.get("lead_ids") or [event.lead_id]
+    remarks = event.payload.get("remarks")
+
+    conn = get_db()
+    cursor = conn.cursor(dictionary=True)
+
+    try:
+        status_name = _status_name(cursor, event.payload.get("new_status_id"))
+        if status_name not in SITE_VISIT_STATUSES + OFFICE_VISIT_STATUSES + ("Deal Closed", "Re-Enquire"):
+            return
+
+        lead_names = _lead_names(cursor, lead_ids)
+
+        if status_name in SITE_VISIT_STATUSES + OFFICE_VISIT_STATUSES:
+            recipients = _active_employee_ids(cursor, admins_only=status_name in OFFICE_VISIT_STATUSES)
+            notifications = []
+            for lead_id in lead_ids:
+                message = _visit_message(lead_id, lead_names[lead_id], status_name)
+                notifications.extend(
+                    (emp_id, status_name, message, "Leads", lead_id) for emp_id in recipients
+                )
+            create_notifications(notifications)
+
+        # DEAL CLOSED → Congratulations email to Admins & Sales Managers
+        if status_name == "Deal Closed":
+            _send_manager_alerts(
+                cursor, lead_ids, lead_names, remarks,
+                subject_prefix="\U0001f389 Deal Closed",
+                banner_color="#2e7d32",
+                banner_title="&#127881; Deal Closed!",
+                intro="Congratulations! A deal has been closed.",
+                role_label="Closed by",
+                footer="Log in to the CRM to view full lead details."
+            )
+
+        # RE-ENQUIRE → Alert email to Admins & Sales Managers
+        if status_name == "Re-Enquire":
+            _send_manager_alerts(
+                cursor, lead_ids, lead_names, remarks,
+                subject_prefix="\U0001f504 Re-Enquiry",
+                banner_color="#1976d2",
+                banner_title="&#128260; Lead Re-Enquired!",
+                intro="A lead has re-enquired.",
+                role_label="Handled by",
+                footer="Log in to the CRM to view full lead details and take action."
+            )
+    finally:
+        cursor.close()
+        conn.close()
+
+
+# -------------------------
+# Scheduled activity
+# -------------------------
+
+@subscribe(ACTIVITY_SCHEDULED)
+def notify_activity_scheduled(event):
+    lead_id = event.lead_id
+    scheduled_at = event.payload.get("scheduled_at")
+
+    conn = get_db()
+    cursor = conn.cursor(dictionary=True)
+
+    try:
+        status_name = _status_name(cursor, event.payload.get("status_id"))
+        lead_name = _lead_name(cursor, lead_id)
+
+        visit_time = scheduled_at
+        try:
+            visit_time = datetime.strptime(scheduled_at, "%Y-%m-%d %H:%M:%S").strftime("%d-%m-%Y %I:%M %p")
+        except Exception:
+            pass
+
+        _visit_notifications(
+            cursor, lead_id, lead_name, status_name,
+            expected_site_message=f"{lead_name} ({lead_id}) is expected to visit the site on {visit_time}."
+        )
+    finally:
+        cursor.close()
+        conn.close()
+
+
+# -------------------------
+# Transfer
+# -------------------------
+
+@subscribe(LEADS_TRANSFERRED)
+def notify_leads_transferred(event):
+    to_emp_id = event.payload.get("to_emp_id")
+    lead_ids = event.payload.get("lead_ids") or [event.lead_id]
+
+    if to_emp_id and to_emp_id != event.actor_id:
+        create_notification(
+            to_emp_id,
+            "Lead Transfer",
+            f"{len(lead_ids)} lead(s) have been transferred to you",
+            "Leads",
+            lead_ids[0]
+        )
+
+
+# -------------------------
+# Parked lead re-enquiry
+# -------------------------
+
+@subscribe(LEAD_REENQUIRED)
+def notify_admin_reenquiry(event):
+    lead_id = event.lead_id
+    payload = event.payload
+    source_label = payload.get("source_channel")
+    clean_phone = payload.get("phone")
+
+    handler_name = None
+    if payload.get("handling_emp_id"):
+        conn = get_db()
+        cursor = conn.cursor(dictionary=True)
+        try:
+            row = _fetch_one(cursor, """
+                SELECT TRIM(CONCAT(emp_first_name, ' ', IFNULL(emp_last_name, ''))) AS full_name
+                FROM employee
+                WHERE emp_id = %s
+                LIMIT 1
+            """, (payload["handling_emp_id"],))
+            handler_name = row["full_name"] if row and row.get("full_name") else None
+        finally:
+            cursor.close()
+            conn.close()
+    handler_name = handler_name or "an active sales executive"
+
+    message = (
+        f"Parked lead {lead_id} has re-enquired via {source_label} "
+        f"from {clean_phone}. Handled by {handler_name}."
+    )
+
+    try:
+        create_notification(
+            payload["owner_emp_id"],
+            "Parked Lead Re-enquired",
+            message,
+            "Leads",
+            lead_id
+        )
+    except Exception as exc:
+        logger.warning(f"Admin re-enquiry notification failed for {lead_id}: {exc}")
+
+    owner_email = payload.get("owner_email")
+    if owner_email:
+        html = f"""
+        <html><body style="font-family: Arial, sans-serif; color: #333;">
+          <h3>Parked Lead Re-enquiry Alert</h3>
+          <p>Lead <strong>{lead_id}</strong> assigned to admin has re-enquired.</p>
+          <p><strong>Source:</strong> {source_label}</p>
+          <p><strong>Phone:</strong> {clean_phone}</p>
+          <p><strong>Handled by:</strong> {handler_name}</p>
+          <p>Please review and reassign the lead to the appropriate sales executive if needed.</p>
+        </body></html>
+        """
+        try:
+            send_html_email(owner_email, f"Parked Lead Re-enquiry - {lead_id}", html)
+        except Exception as exc:
+            logger.warning(f"Admin re-enquiry email failed for {lead_id}: {exc}")
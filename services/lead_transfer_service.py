@@ -1,6 +1,6 @@
 from db import get_db
-from services.audit_service import log_audit
-from services.notification_service import create_notification
+from services.audit_service import log_audit_batch
+from services.lead_event_bus import LeadEvent, LEADS_TRANSFERRED, stage_event, dispatch
 
 
 def _ensure_transfer_log_table(cursor):
@@ -209,6 +209,7 @@ def transfer_leads(
             raise ValueError("No leads available for transfer with the selected filters")
 
         lead_ids = [row["lead_id"] for row in leads]
+        audit_entries = []
 
         for lead in leads:
             lead_id = lead["lead_id"]
@@ -223,16 +224,16 @@ def transfer_leads(
                 WHERE lead_id = %s
             """, (to_emp_id, to_project_id, to_source_id, to_status_id, actor_id, lead_id))
 
-            log_audit("Leads", lead_id, "emp_id", from_emp_id, to_emp_id, actor_id, "UPDATE")
+            audit_entries.append(("Leads", lead_id, "emp_id", from_emp_id, to_emp_id, actor_id, "UPDATE"))
 
             if to_project_id and to_project_id != lead["project_id"]:
-                log_audit("Leads", lead_id, "project_id", lead["project_id"], to_project_id, actor_id, "UPDATE")
+                audit_entries.append(("Leads", lead_id, "project_id", lead["project_id"], to_project_id, actor_id, "UPDATE"))
 
             if to_source_id and to_source_id != lead["source_id"]:
-                log_audit("Leads", lead_id, "source_id", lead["source_id"], to_source_id, actor_id, "UPDATE")
+                audit_entries.append(("Leads", lead_id, "source_id", lead["source_id"], to_source_id, actor_id, "UPDATE"))
 
             if to_status_id and to_status_id != lead["status_id"]:
-                log_audit("Leads", lead_id, "status_id", lead["status_id"], to_status_id, actor_id, "UPDATE")
+                audit_entries.append(("Leads", lead_id, "status_id", lead["status_id"], to_status_id, actor_id, "UPDATE"))
                 cursor.execute("""
                     INSERT INTO lead_status_history
                     (lead_id, old_status_id, new_status_id, remarks, changed_by)
@@ -272,16 +273,17 @@ def transfer_leads(
         ))
 
         transfer_id = cursor.lastrowid
-        conn.commit()
 
-        if to_emp_id != actor_id:
-            create_notification(
-                to_emp_id,
-                "Lead Transfer",
-                f"{len(lead_ids)} lead(s) have been transferred to you",
-                "Leads",
-                lead_ids[0]
-            )
+        log_audit_batch(cursor, audit_entries)
+        event = stage_event(cursor, LeadEvent(LEADS_TRANSFERRED, lead_ids[0], actor_id, {
+            "transfer_id": transfer_id,
+            "from_emp_id": from_emp_id,
+            "to_emp_id": to_emp_id,
+            "lead_ids": lead_ids
+        }))
+
+        conn.commit()
+        dispatch(event)
 
         return {
             "transfer_id": transfer_id,
@@ -1,9 +1,12 @@
 from services.lead_status_history_service import create_history
-from db import get_db
-from services.audit_service import log_audit
-from services.notification_service import create_notification
+from db import get_db, db_cursor
+from services.audit_service import log_audit, log_audit_batch
+from services.lead_event_bus import LeadEvent, LEAD_CREATED, LEAD_UPDATED, LEAD_STATUS_CHANGED, stage_event, dispatch
+from services.reference_data_service import REFERENCE_TABLES, reference_exists, invalidate_reference
 from utils.phone_utils import get_supported_country_codes, normalize_phone_number
 
+import mysql.connector
+
 import logging
 
 logger = logging.getLogger(__name__)
@@ -45,15 +48,73 @@ def _validate_foreign_key(cursor, table, id_col, id_val, label):
     """
     Validates that a given ID exists in the referenced table.
     Raises ValueError with a clear message if not found.
+    Served from the cached reference sets; the leads foreign keys are the
+    backstop for anything deleted since the cache was loaded.
     """
     if not id_val:
         return  # Allow None for optional fields
 
-    cursor.execute(f"SELECT 1 FROM {table} WHERE {id_col} = %s LIMIT 1", (id_val,))
-    if cursor.fetchone() is None:
+    if not reference_exists(cursor, table, id_val):
         raise ValueError(f"Invalid {label}: '{id_val}' does not exist.")
 
 
+LEAD_FOREIGN_KEYS = {
+    'source_id':  ('lead_sources', 'source'),
+    'status_id':  ('lead_status', 'status'),
+    'emp_id':     ('employee', 'employee'),
+    'project_id': ('project_registration', 'project'),
+}
+
+def ensure_lead_foreign_key_schema():
+    """
+    Database FKs from leads to its reference tables, a backstop behind the
+    cached reference checks. Run by services.schema_service, never on a
+    request.
+    """
+    with db_cursor() as (conn, cursor):
+        for column, (table, _) in LEAD_FOREIGN_KEYS.items():
+            cursor.execute("""
+                SELECT 1
+                FROM information_schema.KEY_COLUMN_USAGE
+                WHERE TABLE_SCHEMA = DATABASE()
+                  AND TABLE_NAME = 'leads'
+                  AND COLUMN_NAME = %s
+                  AND REFERENCED_TABLE_NAME = %s
+                LIMIT 1
+            """, (column, table))
+            if cursor.fetchall():
+                continue
+
+            try:
+                cursor.execute(f"""
+                    ALTER TABLE leads
+                    ADD CONSTRAINT fk_leads_{column}
+                    FOREIGN KEY ({column}) REFERENCES {table}({REFERENCE_TABLES[table]})
+                """)
+            except Exception as e:
+                # Orphaned rows must be fixed before the constraint can be added
+                logger.warning(f"Could not add leads foreign key on {column}: {e}")
+
+
+def _foreign_key_error_message(error, values):
+    """
+    Turn a FK violation (errno 1452) on leads into the same message
+    _validate_foreign_key would have produced. Returns None otherwise.
+    """
+    if getattr(error, "errno", None) != 1452:
+        return None
+
+    text = str(error)
+    for column, (_, label) in LEAD_FOREIGN_KEYS.items():
+        if f"(`{column}`)" in text:
+            return f"Invalid {label}: '{values.get(column)}' does not exist."
+    return None
+
+
+class DuplicateLeadError(ValueError):
+    """An active lead already exists for this phone number."""
+
+
 def _check_duplicate_phone(cursor, phone, exclude_lead_id=None):
     """
     Checks if a lead already exists with this phone number.
@@ -89,12 +150,156 @@ def _check_duplicate_phone(cursor, phone, exclude_lead_id=None):
         else:
             existing_lead_id = existing[0]
 
-        raise ValueError(
+        raise DuplicateLeadError(
             f"A lead with phone number '{phone}' already exists (Lead ID: {existing_lead_id}). "
             f"Use the existing lead instead of creating a duplicate."
         )
 
 
+# Inactive rows (and customers without a phone) generate NULL and never
+# collide. Phones are keyed on their last 10 digits, as _check_duplicate_phone
+# and _get_or_create_customer compare them, so 9876543210 and +919876543210
+# are the same number.
+ACTIVE_PHONE_CONSTRAINTS = [
+    (
+        "customer", "active_phone_local",
+        "ALTER TABLE customer ADD COLUMN active_phone_local VARCHAR(10) "
+        "AS (IF(is_active = 1, NULLIF(RIGHT(REGEXP_REPLACE(IFNULL(phone_num, ''), '[^0-9]', ''), 10), ''), NULL)) STORED",
+        "uq_customer_active_phone_local",
+    ),
+    (
+        "leads", "active_customer_id",
+        "ALTER TABLE leads ADD COLUMN active_customer_id VARCHAR(150) "
+        "AS (IF(is_active = 1, customer_id, NULL)) STORED",
+        "uq_leads_active_customer",
+    ),
+]
+
+DUPLICATE_PHONE_KEYS = tuple(index for _, _, _, index in ACTIVE_PHONE_CONSTRAINTS)
+
+# Earlier customer phone keys, as (column, index), dropped by the migration
+SUPERSEDED_PHONE_KEYS = [
+    ("phone_key", "uq_customer_phone_key"),
+    ("active_phone_key", "uq_customer_active_phone"),
+]
+
+# Lead and customer IDs are MAX+1, so two concurrent creates can pick the same one
+ID_COLLISION_RETRIES = 3
+
+
+def ensure_lead_phone_schema():
+    """
+    One active customer per normalised phone and one active lead per
+    customer, enforced by unique indexes on generated columns so concurrent
+    creates are settled by the database rather than by the duplicate-phone
+    scan. Rebuilds customer and leads, so it runs from
+    services.schema_service, never on a request.
+    """
+    with db_cursor() as (conn, cursor):
+        for column, index_name in SUPERSEDED_PHONE_KEYS:
+            cursor.execute("SHOW COLUMNS FROM customer LIKE %s", (column,))
+            if not cursor.fetchall():
+                continue
+            cursor.execute("SHOW INDEX FROM customer WHERE Key_name = %s", (index_name,))
+            if cursor.fetchall():
+                cursor.execute(f"ALTER TABLE customer DROP INDEX {index_name}")
+            cursor.execute(f"ALTER TABLE customer DROP COLUMN {column}")
+
+        for table, column, alter_sql, index_name in ACTIVE_PHONE_CONSTRAINTS:
+            cursor.execute(f"SHOW COLUMNS FROM {table} LIKE %s", (column,))
+            if not cursor.fetchall():
+                cursor.execute(alter_sql)
+
+            cursor.execute(f"SHOW INDEX FROM {table} WHERE Key_name = %s", (index_name,))
+            if cursor.fetchall():
+                continue
+
+            try:
+                cursor.execute(f"CREATE UNIQUE INDEX {index_name} ON {table} ({column})")
+            except Exception as e:
+                # Existing duplicate rows must be merged before the index can exist
+                logger.warning(f"Could not create {index_name}: {e}")
+
+
+def is_duplicate_phone_error(error):
+    """True when an IntegrityError came from the active-phone unique indexes."""
+    return getattr(error, "errno", None) == 1062 and any(
+        key in str(error) for key in DUPLICATE_PHONE_KEYS
+    )
+
+
+def _is_id_collision(error):
+    return getattr(error, "errno", None) == 1062 and "PRIMARY" in str(error)
+
+
+CUSTOMER_SEARCH_SELECT = """
+    SELECT
+        c.customer_id,
+        LOWER(TRIM(CONCAT_WS(' ', c.customer_first_name, c.customer_middle_name, c.customer_last_name))),
+        REPLACE(REPLACE(REPLACE(IFNULL(c.phone_num, ''), ' ', ''), '-', ''), '+', ''),
+        RIGHT(REPLACE(REPLACE(REPLACE(IFNULL(c.phone_num, ''), ' ', ''), '-', ''), '+', ''), 10)
+    FROM customer c
+"""
+
+# Superseded by ft_customer_search_name_all, built without the stopword list
+LEGACY_CUSTOMER_SEARCH_FULLTEXT = "ft_customer_search_name"
+
+
+def ensure_customer_search_schema():
+    """
+    Side table holding a normalised name (ngram FULLTEXT) and phone digits
+    (B-tree, for prefix matching) per customer, backfilled for customers
+    that have no row yet. Run by services.schema_service, never on a request.
+
+    The FULLTEXT index is built with the stopword list off: with ngram
+    tokens the default list drops bigrams such as "an" or "in", and names
+    containing them would never match.
+    """
+    with db_cursor() as (conn, cursor):
+        cursor.execute("SET SESSION innodb_ft_enable_stopword = OFF")
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS customer_search (
+                customer_id VARCHAR(150) PRIMARY KEY,
+                search_name VARCHAR(300) NOT NULL DEFAULT '',
+                phone_digits VARCHAR(20) NOT NULL DEFAULT '',
+                phone_local VARCHAR(10) NOT NULL DEFAULT '',
+                KEY idx_customer_search_name (search_name),
+                KEY idx_customer_search_phone (phone_digits),
+                KEY idx_customer_search_local (phone_local),
+                FULLTEXT KEY ft_customer_search_name_all (search_name) WITH PARSER ngram
+            )
+        """)
+
+        cursor.execute("SHOW INDEX FROM customer_search WHERE Key_name = %s", (LEGACY_CUSTOMER_SEARCH_FULLTEXT,))
+        if cursor.fetchall():
+            cursor.execute(f"ALTER TABLE customer_search DROP INDEX {LEGACY_CUSTOMER_SEARCH_FULLTEXT}")
+            cursor.execute(
+                "ALTER TABLE customer_search "
+                "ADD FULLTEXT KEY ft_customer_search_name_all (search_name) WITH PARSER ngram"
+            )
+
+        cursor.execute(
+            "INSERT IGNORE INTO customer_search (customer_id, search_name, phone_digits, phone_local) "
+            + CUSTOMER_SEARCH_SELECT
+            + " WHERE NOT EXISTS (SELECT 1 FROM customer_search cs WHERE cs.customer_id = c.customer_id)"
+        )
+        conn.commit()
+
+
+def _index_customer_search(cursor, customer_id):
+    """Refresh one customer's search row from the customer table."""
+    cursor.execute(
+        "INSERT INTO customer_search (customer_id, search_name, phone_digits, phone_local) "
+        + CUSTOMER_SEARCH_SELECT
+        + """ WHERE c.customer_id = %s
+        ON DUPLICATE KEY UPDATE
+            search_name = VALUES(search_name),
+            phone_digits = VALUES(phone_digits),
+            phone_local = VALUES(phone_local)""",
+        (customer_id,)
+    )
+
+
 def _get_or_create_customer(cursor, data, actor_id=None):
     """Find or create a customer by phone number."""
     phone = normalize_phone_number(data.get('phone'))
@@ -131,6 +336,7 @@ def _get_or_create_customer(cursor, data, actor_id=None):
          data.get('profession'),
          actor_id)
     )
+    _index_customer_search(cursor, customer_id)
     return customer_id
 
 
@@ -138,19 +344,211 @@ def _get_or_create_customer(cursor, data, actor_id=None):
 # SERVICE FUNCTIONS (Public API)
 # ---------------------------------------------------------
 
+LEAD_ID_FILTERS = {
+    'source_ids':  'l.source_id',
+    'status_ids':  'l.status_id',
+    'emp_ids':     'l.emp_id',
+    'project_ids': 'l.project_id',
+}
+
+# Legacy name filters, resolved to IDs up front so the predicate lands on leads
+LEAD_NAME_FILTERS = {
+    'source':   ('source_ids',  "SELECT source_id FROM lead_sources WHERE source_name = %s"),
+    'employee': ('emp_ids',     "SELECT emp_id FROM employee WHERE emp_first_name = %s"),
+    'project':  ('project_ids', "SELECT project_id FROM project_registration WHERE project_name = %s"),
+}
+
+
+def _as_list(value):
+    if value is None or value == '':
+        return []
+    if isinstance(value, (list, tuple, set)):
+        return [v for v in value if v not in (None, '')]
+    return [value]
+
+
+def _add_date_range(conditions, params, column, start, end):
+    if start:
+        conditions.append(f"{column} >= %s")
+        params.append(start)
+    if end:
+        if len(str(end)) == 10:
+            # Whole-day upper bound without wrapping the column in DATE()
+            conditions.append(f"{column} < DATE_ADD(%s, INTERVAL 1 DAY)")
+        else:
+            conditions.append(f"{column} <= %s")
+        params.append(end)
+
+
+def _build_lead_filters(cursor, filters):
+    """
+    Translate listing filters into predicates on `leads` columns only, so
+    they can use the leads indexes before any display-name join runs.
+    Returns (conditions, params), or None when a filter can match nothing.
+    """
+    filters = filters or {}
+    conditions = []
+    params = []
+    id_sets = {key: _as_list(filters.get(key)) for key in LEAD_ID_FILTERS}
+
+    for name_key, (id_key, lookup_sql) in LEAD_NAME_FILTERS.items():
+        if not filters.get(name_key):
+            continue
+        cursor.execute(lookup_sql, (filters[name_key],))
+        resolved = [next(iter(row.values())) for row in cursor.fetchall()]
+        if not resolved:
+            return None
+        if id_sets[id_key]:
+            resolved = [v for v in id_sets[id_key] if v in resolved]
+            if not resolved:
+                return None
+        id_sets[id_key] = resolved
+
+    for key, column in LEAD_ID_FILTERS.items():
+        values = id_sets[key]
+        if values:
+            conditions.append(f"{column} IN ({', '.join(['%s'] * len(values))})")
+            params.extend(values)
+
+    if filters.get('customer'):
+        # Substring match, as before customer_search; only the join moved
+        conditions.append("""l.customer_id IN (
+            SELECT cs.customer_id FROM customer_search cs WHERE cs.search_name LIKE %s
+        )""")
+        params.append(f"%{filters['customer'].strip().lower()}%")
+
+    if filters.get('mobile'):
+        digits = ''.join(filter(str.isdigit, filters['mobile']))
+        if not digits:
+            return None
+        # Substring, as before: reps look people up by the last few digits
+        conditions.append("""l.customer_id IN (
+            SELECT cs.customer_id FROM customer_search cs WHERE cs.phone_digits LIKE %s
+        )""")
+        params.append(f"%{digits}%")
+
+    _add_date_range(conditions, params, 'l.created_on',
+                    filters.get('created_from'), filters.get('created_to'))
+    _add_date_range(conditions, params, 'l.modified_on',
+                    filters.get('modified_from'), filters.get('modified_to'))
+
+    return conditions, params
+
+
+MANAGER_ROLES = {"ADMIN", "SALES_MGR"}
+
+# Every listing index ends in created_on, so ORDER BY created_on DESC LIMIT n
+# is a backward index range scan. lead_id (the clustered key) is carried in
+# each secondary index, which makes the page query index-only.
+LEAD_INDEXES = {
+    "idx_leads_active_created":         "is_active, created_on",
+    "idx_leads_emp_active_created":     "emp_id, is_active, created_on",
+    "idx_leads_project_active_created": "project_id, is_active, created_on",
+    "idx_leads_status_active_created":  "status_id, is_active, created_on",
+    "idx_leads_source_active_created":  "source_id, is_active, created_on",
+}
+
+def ensure_lead_index_schema():
+    """Listing indexes on leads. Run by services.schema_service, never on a request."""
+    with db_cursor() as (conn, cursor):
+        for index_name, columns in LEAD_INDEXES.items():
+            cursor.execute("SHOW INDEX FROM leads WHERE Key_name = %s", (index_name,))
+            if not cursor.fetchall():
+                cursor.execute(f"CREATE INDEX {index_name} ON leads ({columns})")
+
+
+def _plan_lead_index(role, filters):
+    """
+    Pick the listing index for a lead read.
+    SALES_EXEC reads are always pinned to their own (emp_id, is_active,
+    created_on) range. Managers use the most selective single-valued ID
+    filter, or the global (is_active, created_on) index when none applies.
+    """
+    if not role or role.upper() not in MANAGER_ROLES:
+        return "idx_leads_emp_active_created"
+
+    for key, index_name in (
+        ('emp_ids',     "idx_leads_emp_active_created"),
+        ('project_ids', "idx_leads_project_active_created"),
+        ('status_ids',  "idx_leads_status_active_created"),
+        ('source_ids',  "idx_leads_source_active_created"),
+    ):
+        if len(_as_list(filters.get(key))) == 1:
+            return index_name
+
+    # Multi-value, text or date-only filters: walk created_on and filter
+    return "idx_leads_active_created"
+
+
+def _empty_lead_page(filters):
+    filters = filters or {}
+    page_size = int(filters['page_size']) if filters.get('page_size') else None
+    page = max(int(filters.get('page') or 1), 1) if page_size else None
+    return {"data": [], "total": 0, "page": page, "page_size": page_size}
+
+
 def fetch_all_leads(filters=None, actor_id=None, role=None):
     """
     Fetches leads with JOINs.
     Returns BOTH IDs and names for foreign keys so the frontend
     can populate dropdowns correctly in edit mode.
+
+    Filtering and paging run against `leads` alone; the customer, source,
+    status, employee and project joins are applied to the final page only.
+
+    Returns {"data", "total", "page", "page_size"}; page and page_size are
+    None (and total is the row count) unless filters has page_size.
     """
-    conn = get_db()
+    conn = get_db(readonly=True)
     if not conn:
-        return []
+        return _empty_lead_page(filters)
 
     try:
         cursor = conn.cursor(dictionary=True)
-        query = """
+        filters = filters or {}
+
+        built = _build_lead_filters(cursor, filters)
+        if built is None:
+            return _empty_lead_page(filters)
+        conditions, params = built
+
+        # --------------------------------------------------
+        # LEAD VISIBILITY CONTROL
+        # --------------------------------------------------
+        # The visibility predicate leads the WHERE clause so it lines up
+        # with the planned index prefix.
+
+        if not role or role.upper() not in MANAGER_ROLES:
+            conditions.insert(0, "l.emp_id = %s")
+            params.insert(0, actor_id)
+
+        index_name = _plan_lead_index(role, filters)
+
+        page_query = f"""
+            SELECT /*+ INDEX(l {index_name}) */ l.lead_id, l.created_on
+            FROM leads l
+            WHERE l.is_active = 1
+            {''.join(f' AND {condition}' for condition in conditions)}
+            ORDER BY l.created_on DESC, l.lead_id DESC
+        """
+
+        page_size = filters.get('page_size')
+        page = None
+        total = None
+        if page_size:
+            page_size = int(page_size)
+            page = max(int(filters.get('page') or 1), 1)
+            cursor.execute(f"""
+                SELECT /*+ INDEX(l {index_name}) */ COUNT(*) AS total
+                FROM leads l
+                WHERE l.is_active = 1
+                {''.join(f' AND {condition}' for condition in conditions)}
+            """, tuple(params))
+            total = cursor.fetchone()["total"]
+            page_query += " LIMIT %s OFFSET %s"
+            params.extend([page_size, (page - 1) * page_size])
+
+        query = f"""
         SELECT
             l.lead_id                                                       AS id,
             TRIM(CONCAT(c.customer_first_name, ' ',
@@ -182,7 +580,8 @@ def fetch_all_leads(filters=None, actor_id=None, role=None):
             l.modified_on                                                   AS modifiedAt,
             ec.emp_first_name                                               AS createdBy,
             em.emp_first_name                                               AS modifiedBy
-        FROM leads l
+        FROM ({page_query}) page
+        JOIN leads l                  ON l.lead_id     = page.lead_id
         LEFT JOIN customer c          ON l.customer_id = c.customer_id
         LEFT JOIN lead_sources ls     ON l.source_id   = ls.source_id
         LEFT JOIN lead_status lst     ON l.status_id   = lst.status_id
@@ -190,42 +589,104 @@ def fetch_all_leads(filters=None, actor_id=None, role=None):
         LEFT JOIN employee ec         ON l.created_by  = ec.emp_id
         LEFT JOIN employee em         ON l.modified_by = em.emp_id
         LEFT JOIN project_registration pr ON l.project_id = pr.project_id
-        WHERE l.is_active = 1
+        ORDER BY page.created_on DESC, page.lead_id DESC
         """
 
-        params = []
-        if filters:
-            if filters.get('customer'):
-                query += " AND (c.customer_first_name LIKE %s OR c.customer_last_name LIKE %s)"
-                term = f"%{filters['customer']}%"
-                params.extend([term, term])
-            if filters.get('mobile'):
-                query += " AND c.phone_num LIKE %s"
-                params.append(f"%{filters['mobile']}%")
-            if filters.get('source'):
-                query += " AND ls.source_name = %s"
-                params.append(filters['source'])
-            if filters.get('employee'):
-                query += " AND e.emp_first_name = %s"
-                params.append(filters['employee'])
-            if filters.get('project'):
-                query += " AND pr.project_name = %s"
-                params.append(filters['project'])
-        
-        # --------------------------------------------------
-        # LEAD VISIBILITY CONTROL
-        # --------------------------------------------------
-
-        if not role or role.upper() not in {"ADMIN", "SALES_MGR"}:
-            query += " AND l.emp_id = %s"
-            params.append(actor_id)
-
-        query += " ORDER BY l.created_on DESC"
         cursor.execute(query, tuple(params))
-        return cursor.fetchall()
+        leads = cursor.fetchall()
+        if total is None:
+            total = len(leads)
+        return {"data": leads, "total": total, "page": page, "page_size": page_size}
 
     except Exception as e:
         logger.error(f"Error fetching leads: {e}")
+        return _empty_lead_page(filters)
+    finally:
+        conn.close()
+
+
+def search_leads(term, actor_id=None, role=None, limit=10):
+    """
+    Ranked type-ahead search over customer name and phone.
+    Digits in the term are matched as a prefix of the local (last 10) or
+    full phone number; the rest is matched against the ngram name index.
+    Phone prefix hits rank above name-only hits.
+    """
+    term = (term or "").strip()
+    if not term:
+        return []
+
+    digits = ''.join(filter(str.isdigit, term))
+    name_term = ''.join(ch for ch in term if not ch.isdigit() and ch != '+').strip().lower()
+
+    if len(digits) < 3 and len(name_term) < 2:
+        return []
+
+    limit = max(1, min(int(limit or 10), 50))
+
+    conn = get_db()
+    if not conn:
+        return []
+
+    try:
+        cursor = conn.cursor(dictionary=True)
+
+        score_parts = []
+        score_params = []
+        match_parts = []
+        match_params = []
+
+        if len(digits) >= 3:
+            score_parts.append("(CASE WHEN cs.phone_local LIKE %s OR cs.phone_digits LIKE %s THEN 10 ELSE 0 END)")
+            score_params.extend([f"{digits}%", f"{digits}%"])
+            match_parts.append("cs.phone_local LIKE %s OR cs.phone_digits LIKE %s")
+            match_params.extend([f"{digits}%", f"{digits}%"])
+
+        if len(name_term) >= 2:
+            score_parts.append("(CASE WHEN cs.search_name LIKE %s THEN 5 ELSE 0 END)")
+            score_params.append(f"{name_term}%")
+            score_parts.append("MATCH(cs.search_name) AGAINST (%s IN NATURAL LANGUAGE MODE)")
+            score_params.append(name_term)
+            match_parts.append("MATCH(cs.search_name) AGAINST (%s IN NATURAL LANGUAGE MODE)")
+            match_params.append(name_term)
+
+        visibility = ""
+        visibility_params = []
+        if not role or role.upper() not in MANAGER_ROLES:
+            visibility = " AND l.emp_id = %s"
+            visibility_params.append(actor_id)
+
+        query = f"""
+        SELECT
+            l.lead_id                                                       AS id,
+            TRIM(CONCAT(c.customer_first_name, ' ',
+                 IFNULL(c.customer_last_name, '')))                         AS name,
+            c.phone_num                                                     AS phone,
+            l.status_id                                                     AS statusId,
+            lst.status_name                                                 AS status,
+            l.emp_id                                                        AS assignedToId,
+            {' + '.join(score_parts)}                                       AS score
+        FROM customer_search cs
+        JOIN leads l              ON l.customer_id = cs.customer_id AND l.is_active = 1{visibility}
+        JOIN customer c           ON c.customer_id = cs.customer_id
+        LEFT JOIN lead_status lst ON l.status_id   = lst.status_id
+        WHERE {' OR '.join(match_parts)}
+        ORDER BY score DESC, l.created_on DESC
+        LIMIT %s
+        """
+
+        cursor.execute(query, tuple(
+            score_params + visibility_params + match_params + [limit]
+        ))
+        rows = cursor.fetchall()
+
+        for row in rows:
+            row["score"] = float(row["score"] or 0)
+
+        return rows
+
+    except Exception as e:
+        logger.error(f"Error searching leads: {e}")
         return []
     finally:
         conn.close()
@@ -328,8 +789,21 @@ def add_new_lead(data, actor_id=None, role=None):
     Creates a new lead.
     Expects IDs for: source, status, assigned_to, project.
     Validates all IDs exist before inserting.
-    Checks for duplicate phone numbers.
+    Checks for duplicate phone numbers (DuplicateLeadError, also raised
+    when a concurrent create wins the race for the same phone).
     """
+    for attempt in range(ID_COLLISION_RETRIES):
+        try:
+            return _insert_new_lead(data, actor_id, role)
+        except mysql.connector.IntegrityError as e:
+            # Another create took the same MAX+1 id; the retry re-reads the
+            # ids and, if it was the same phone, fails the duplicate check
+            if not _is_id_collision(e) or attempt == ID_COLLISION_RETRIES - 1:
+                raise
+            logger.info(f"Lead id collision, retrying create ({attempt + 1}/{ID_COLLISION_RETRIES})")
+
+
+def _insert_new_lead(data, actor_id, role):
     if not data.get('name') or not data.get('phone'):
         raise ValueError("Name and Phone are required fields.")
 
@@ -363,7 +837,7 @@ def add_new_lead(data, actor_id=None, role=None):
         if not emp_id:
             raise ValueError("Assigned employee is required.")
 
-        # --- Validate all foreign keys exist in DB ---
+        # --- Validate all foreign keys (cached reference sets, DB FKs as backstop) ---
         _validate_foreign_key(cursor, 'lead_sources', 'source_id', source_id, 'source')
         _validate_foreign_key(cursor, 'lead_status', 'status_id', status_id, 'status')
         _validate_foreign_key(cursor, 'employee', 'emp_id', emp_id, 'employee')
@@ -399,67 +873,31 @@ def add_new_lead(data, actor_id=None, role=None):
             "remarks": description or "Lead created"
         }
 
-        conn.commit()
-
-        # --------------------------------------------------
-        # Fetch creator name for notification messages
-        # --------------------------------------------------
-        cursor.execute("""
-            SELECT CONCAT(emp_first_name,' ',IFNULL(emp_last_name,'')) 
-            FROM employee 
-            WHERE emp_id = %s
-        """, (actor_id,))
-
-        creator_name = cursor.fetchone()[0]
-
-
-        create_notification(
-            emp_id,
-            "New Lead Assigned",
-            f"Lead {new_lead_id} has been assigned to you by {creator_name}",
-            "Leads",
-            new_lead_id
-        )
-
-        # --------------------------------------------------
-        # Notify ADMIN users that a lead was created
-        # (Exclude the creator if they are also an admin)
-        # --------------------------------------------------
-
-        cursor.execute("""
-            SELECT emp_id
-            FROM employee
-            WHERE role_id = 'ADMIN'
-            AND emp_status = 'Active'
-            AND emp_id != %s
-        """, (actor_id,))
-
-        admins = cursor.fetchall()
-
-        for admin in admins:
-
-            create_notification(
-                admin[0],
-                "New Lead Created",
-                f"Lead {new_lead_id} was created by {creator_name}",
-                "Leads",
-                new_lead_id
-            )
-
-
         # --------------------------------------------------
         # AUDIT TRAIL : LEAD CREATION
         # --------------------------------------------------
-        log_audit("Leads", new_lead_id, "lead_id", None, new_lead_id, actor_id, "INSERT")
-        log_audit("Leads", new_lead_id, "source_id", None, source_id, actor_id, "INSERT")
-        log_audit("Leads", new_lead_id, "status_id", None, status_id, actor_id, "INSERT")
-        log_audit("Leads", new_lead_id, "emp_id", None, emp_id, actor_id, "INSERT")
+        audit_entries = [
+            ("Leads", new_lead_id, "lead_id", None, new_lead_id, actor_id, "INSERT"),
+            ("Leads", new_lead_id, "source_id", None, source_id, actor_id, "INSERT"),
+            ("Leads", new_lead_id, "status_id", None, status_id, actor_id, "INSERT"),
+            ("Leads", new_lead_id, "emp_id", None, emp_id, actor_id, "INSERT"),
+        ]
 
         if project_id:
-            log_audit("Leads", new_lead_id, "project_id", None, project_id, actor_id, "INSERT")
+            audit_entries.append(("Leads", new_lead_id, "project_id", None, project_id, actor_id, "INSERT"))
 
         if description:
-            log_audit("Leads", new_lead_id, "lead_description", None, description, actor_id, "INSERT")
+            audit_entries.append(("Leads", new_lead_id, "lead_description", None, description, actor_id, "INSERT"))
+
+        log_audit_batch(cursor, audit_entries)
+
+        # Assignee / admin notifications are delivered by the event bus
+        created_event = stage_event(cursor, LeadEvent(
+            LEAD_CREATED, new_lead_id, actor_id, {"emp_id": emp_id, "project_id": project_id}
+        ))
+
+        conn.commit()
+        dispatch(created_event)
 
         logger.info(f"Lead {new_lead_id} created by {actor_id}")
         create_history(new_lead_id, initial_history, actor_id)
@@ -468,6 +906,19 @@ def add_new_lead(data, actor_id=None, role=None):
     except ValueError:
         conn.rollback()
         raise
+    except mysql.connector.IntegrityError as e:
+        conn.rollback()
+        if is_duplicate_phone_error(e):
+            raise DuplicateLeadError("A lead with this phone number already exists.")
+        message = _foreign_key_error_message(e, {
+            'source_id': source_id, 'status_id': status_id,
+            'emp_id': emp_id, 'project_id': project_id
+        })
+        if message:
+            raise ValueError(message)
+        if not _is_id_collision(e):
+            logger.error(f"Error creating lead: {e}")
+        raise
     except Exception as e:
         conn.rollback()
         logger.error(f"Error creating lead: {e}")
@@ -481,40 +932,25 @@ def update_existing_lead(lead_id, data, actor_id=None):
     """
     Updates an existing lead.
     Validates foreign keys and logs audit trail + notifications.
+
+    One locking read of the current row (joined with the names the
+    notifications need), the UPDATE, then batched audit/history inserts in
+    the same transaction. Notifications go out as a LEAD_UPDATED event.
     """
 
     conn = get_db()
     if not conn:
         return False
 
+    source_id = data.get('source')
+    status_id = data.get('status')
+    emp_id = data.get('assigned_to') or data.get('assignedToId') or data.get('assignedTo')
+    project_id = data.get('project')
+    description = data.get('description', '')
+
     try:
         cursor = conn.cursor(dictionary=True)
 
-        # --------------------------------------------------
-        # FETCH OLD VALUES
-        # --------------------------------------------------
-
-        cursor.execute("""
-            SELECT source_id, status_id, emp_id, project_id, lead_description
-            FROM leads
-            WHERE lead_id = %s AND is_active = 1
-        """, (lead_id,))
-
-        old_data = cursor.fetchone()
-
-        if not old_data:
-            raise ValueError("Lead not found")
-
-        # --------------------------------------------------
-        # EXTRACT NEW VALUES
-        # --------------------------------------------------
-
-        source_id = data.get('source')
-        status_id = data.get('status')
-        emp_id = data.get('assigned_to') or data.get('assignedToId') or data.get('assignedTo')
-        project_id = data.get('project')
-        description = data.get('description', '')
-
         # --------------------------------------------------
         # VALIDATE FOREIGN KEYS
         # --------------------------------------------------
@@ -531,6 +967,34 @@ def update_existing_lead(lead_id, data, actor_id=None):
         if project_id:
             _validate_foreign_key(cursor, 'project_registration', 'project_id', project_id, 'project')
 
+        # --------------------------------------------------
+        # FETCH OLD VALUES (+ names used by notifications)
+        # --------------------------------------------------
+
+        cursor.execute("""
+            SELECT
+                l.source_id,
+                l.status_id,
+                l.emp_id,
+                l.project_id,
+                l.lead_description,
+                l.customer_id,
+                TRIM(CONCAT(c.customer_first_name,' ',IFNULL(c.customer_last_name,''))) AS lead_name,
+                new_status.status_name AS new_status_name,
+                CONCAT(actor.emp_first_name,' ',IFNULL(actor.emp_last_name,'')) AS assigner_name
+            FROM leads l
+            LEFT JOIN customer c ON l.customer_id = c.customer_id
+            LEFT JOIN lead_status new_status ON new_status.status_id = %s
+            LEFT JOIN employee actor ON actor.emp_id = %s
+            WHERE l.lead_id = %s AND l.is_active = 1
+            FOR UPDATE OF l
+        """, (status_id, actor_id, lead_id))
+
+        old_data = cursor.fetchone()
+
+        if not old_data:
+            raise ValueError("Lead not found")
+
         # --------------------------------------------------
         # UPDATE LEAD
         # --------------------------------------------------
@@ -548,38 +1012,32 @@ def update_existing_lead(lead_id, data, actor_id=None):
         """,
         (source_id, status_id, emp_id, project_id, description, actor_id, lead_id))
 
-        print("NEW ASSIGNED EMPLOYEE:", emp_id)
-
         # --------------------------------------------------
-        # SOURCE CHANGE
+        # AUDIT + HISTORY (same transaction)
         # --------------------------------------------------
 
-        if source_id and source_id != old_data["source_id"]:
-            log_audit(
-                "Leads",
-                lead_id,
-                "source_id",
-                old_data["source_id"],
-                source_id,
-                actor_id,
-                "UPDATE"
-            )
+        audit_entries = []
+        changes = {}
 
-        # --------------------------------------------------
-        # STATUS CHANGE
-        # --------------------------------------------------
+        for column, new_value in (
+            ("source_id", source_id),
+            ("status_id", status_id),
+            ("emp_id", emp_id),
+            ("project_id", project_id),
+        ):
+            if new_value and new_value != old_data[column]:
+                audit_entries.append(
+                    ("Leads", lead_id, column, old_data[column], new_value, actor_id, "UPDATE")
+                )
 
-        if status_id and status_id != old_data["status_id"]:
-            log_audit(
-                "Leads",
-                lead_id,
-                "status_id",
-                old_data["status_id"],
-                status_id,
-                actor_id,
-                "UPDATE"
+        if description != old_data["lead_description"]:
+            audit_entries.append(
+                ("Leads", lead_id, "lead_description", old_data["lead_description"], description, actor_id, "UPDATE")
             )
 
+        log_audit_batch(cursor, audit_entries)
+
+        if status_id and status_id != old_data["status_id"]:
             cursor.execute("""
                 INSERT INTO lead_status_history
                 (lead_id, old_status_id, new_status_id, remarks, changed_by)
@@ -591,132 +1049,21 @@ def update_existing_lead(lead_id, data, actor_id=None):
                 '',
                 actor_id
             ))
-
-            # Fetch status name
-            cursor.execute("""
-                SELECT status_name
-                FROM lead_status
-                WHERE status_id = %s
-            """, (status_id,))
-
-            status_row = cursor.fetchone()
-            status_name = status_row["status_name"] if status_row else None
-
-            # Notifications for site visits
-            if status_name in ["Expected Site Visit", "Site Visit Done"]:
-
-                cursor.execute("""
-                    SELECT TRIM(CONCAT(c.customer_first_name,' ',IFNULL(c.customer_last_name,''))) AS lead_name
-                    FROM leads l
-                    JOIN customer c ON l.customer_id = c.customer_id
-                    WHERE l.lead_id = %s
-                """, (lead_id,))
-
-                lead_row = cursor.fetchone()
-                lead_name = lead_row["lead_name"] if lead_row else lead_id
-
-                if status_name == "Expected Site Visit":
-                    message = f"{lead_name} ({lead_id}) is expected to visit the site."
-
-                else:
-                    message = f"{lead_name} ({lead_id}) has completed the site visit."
-
-                cursor.execute("""
-                    SELECT emp_id
-                    FROM employee
-                    WHERE emp_status = 'Active'
-                """)
-
-                users = cursor.fetchall()
-
-                for user in users:
-                    create_notification(
-                        user["emp_id"],
-                        status_name,
-                        message,
-                        "Leads",
-                        lead_id
-                    )
-
-        # --------------------------------------------------
-        # EMPLOYEE REASSIGNMENT
-        # --------------------------------------------------
+            changes["status_name"] = old_data["new_status_name"]
+            changes["lead_name"] = old_data["lead_name"]
 
         if emp_id and emp_id != old_data["emp_id"]:
-
-            log_audit(
-                "Leads",
-                lead_id,
-                "emp_id",
-                old_data["emp_id"],
-                emp_id,
-                actor_id,
-                "UPDATE"
-            )
-
-            cursor.execute("""
-                SELECT CONCAT(emp_first_name,' ',IFNULL(emp_last_name,'')) AS name
-                FROM employee
-                WHERE emp_id = %s
-            """, (actor_id,))
-
-            assigner = cursor.fetchone()
-            assigner_name = assigner["name"] if assigner else "Admin"
-
-            create_notification(
-                emp_id,
-                "Lead Reassigned",
-                f"Lead {lead_id} has been assigned to you by {assigner_name}",
-                "Leads",
-                lead_id
-            )
-
-        # --------------------------------------------------
-        # PROJECT CHANGE
-        # --------------------------------------------------
-
-        if project_id and project_id != old_data["project_id"]:
-
-            log_audit(
-                "Leads",
-                lead_id,
-                "project_id",
-                old_data["project_id"],
-                project_id,
-                actor_id,
-                "UPDATE"
-            )
-
-        # --------------------------------------------------
-        # DESCRIPTION CHANGE
-        # --------------------------------------------------
-
-        if description != old_data["lead_description"]:
-
-            log_audit(
-                "Leads",
-                lead_id,
-                "lead_description",
-                old_data["lead_description"],
-                description,
-                actor_id,
-                "UPDATE"
-            )
+            changes["reassigned_to"] = emp_id
+            changes["assigner_name"] = old_data["assigner_name"]
 
         # --------------------------------------------------
         # CUSTOMER UPDATE
         # --------------------------------------------------
 
-        cursor.execute(
-            "SELECT customer_id FROM leads WHERE lead_id = %s",
-            (lead_id,)
-        )
-
-        res = cursor.fetchone()
+        cust_id = old_data["customer_id"]
 
-        if res and (data.get('name') or data.get('email')):
+        if cust_id and (data.get('name') or data.get('email')):
 
-            cust_id = res['customer_id']
             names = data.get('name', '').split(' ')
 
             first = names[0] if names else ''
@@ -743,8 +1090,14 @@ def update_existing_lead(lead_id, data, actor_id=None):
                 actor_id,
                 cust_id
             ))
+            _index_customer_search(cursor, cust_id)
+
+        updated_event = None
+        if changes:
+            updated_event = stage_event(cursor, LeadEvent(LEAD_UPDATED, lead_id, actor_id, changes))
 
         conn.commit()
+        dispatch(updated_event)
 
         logger.info(f"Lead {lead_id} updated by {actor_id}")
 
@@ -754,6 +1107,17 @@ def update_existing_lead(lead_id, data, actor_id=None):
         conn.rollback()
         raise
 
+    except mysql.connector.IntegrityError as e:
+        conn.rollback()
+        message = _foreign_key_error_message(e, {
+            'source_id': source_id, 'status_id': status_id,
+            'emp_id': emp_id, 'project_id': project_id
+        })
+        if message:
+            raise ValueError(message)
+        logger.error(f"Error updating lead {lead_id}: {e}")
+        return False
+
     except Exception as e:
         conn.rollback()
         logger.error(f"Error updating lead {lead_id}: {e}")
@@ -763,6 +1127,132 @@ def update_existing_lead(lead_id, data, actor_id=None):
         conn.close()
 
 
+BULK_STATUS_MAX_LEADS = 1000
+BULK_STATUS_CHUNK_SIZE = 200
+
+
+def _apply_status_chunk(cursor, lead_ids, status_id, remarks, actor_id, role):
+    """
+    Move one chunk of leads to status_id on the caller's transaction.
+    Returns ({lead_id: outcome}, event or None).
+    """
+    placeholders = ", ".join(["%s"] * len(lead_ids))
+    visibility = ""
+    params = list(lead_ids)
+    if not role or role.upper() not in MANAGER_ROLES:
+        visibility = " AND emp_id = %s"
+        params.append(actor_id)
+
+    cursor.execute(f"""
+        SELECT lead_id, status_id
+        FROM leads
+        WHERE lead_id IN ({placeholders}) AND is_active = 1{visibility}
+        FOR UPDATE
+    """, tuple(params))
+    current = {row["lead_id"]: row["status_id"] for row in cursor.fetchall()}
+
+    outcomes = {}
+    changed = []
+    for lead_id in lead_ids:
+        if lead_id not in current:
+            outcomes[lead_id] = "not_found"
+        elif current[lead_id] == status_id:
+            outcomes[lead_id] = "unchanged"
+        else:
+            outcomes[lead_id] = "updated"
+            changed.append(lead_id)
+
+    if not changed:
+        return outcomes, None
+
+    placeholders = ", ".join(["%s"] * len(changed))
+    cursor.execute(f"""
+        UPDATE leads
+        SET status_id = %s,
+            lead_description = %s,
+            modified_by = %s,
+            modified_on = NOW()
+        WHERE lead_id IN ({placeholders})
+    """, (status_id, remarks, actor_id, *changed))
+
+    cursor.executemany("""
+        INSERT INTO lead_status_history
+        (lead_id, old_status_id, new_status_id, remarks, changed_by)
+        VALUES (%s, %s, %s, %s, %s)
+    """, [(lead_id, current[lead_id], status_id, remarks, actor_id) for lead_id in changed])
+
+    log_audit_batch(cursor, [
+        ("Leads", lead_id, "status_id", current[lead_id], status_id, actor_id, "UPDATE")
+        for lead_id in changed
+    ])
+
+    event = stage_event(cursor, LeadEvent(LEAD_STATUS_CHANGED, changed[0], actor_id, {
+        "lead_ids": changed,
+        "new_status_id": status_id,
+        "remarks": remarks
+    }))
+    return outcomes, event
+
+
+def bulk_update_lead_status(lead_ids, status_id, remarks="", actor_id=None, role=None):
+    """
+    Move many leads to one status.
+    Leads the actor cannot see are reported as not_found. Each chunk of
+    BULK_STATUS_CHUNK_SIZE leads is its own transaction, so a failing chunk
+    does not undo the ones already applied.
+    Returns {"updated": n, "results": [{"lead_id", "outcome"[, "error"]}]}.
+    """
+    if not actor_id:
+        raise ValueError("Unauthorized: actor not identified from token.")
+    if not status_id:
+        raise ValueError("Status is required.")
+    if not isinstance(lead_ids, (list, tuple)) or not lead_ids:
+        raise ValueError("leadIds must be a non-empty list")
+
+    lead_ids = list(dict.fromkeys(str(lead_id).strip() for lead_id in lead_ids if str(lead_id).strip()))
+    if not lead_ids:
+        raise ValueError("leadIds must be a non-empty list")
+    if len(lead_ids) > BULK_STATUS_MAX_LEADS:
+        raise ValueError(f"At most {BULK_STATUS_MAX_LEADS} leads can be updated at once")
+
+    remarks = remarks or ""
+
+    conn = get_db()
+    if not conn:
+        raise Exception("DB connection failed")
+
+    results = {}
+
+    try:
+        cursor = conn.cursor(dictionary=True)
+        _validate_foreign_key(cursor, 'lead_status', 'status_id', status_id, 'status')
+
+        for start in range(0, len(lead_ids), BULK_STATUS_CHUNK_SIZE):
+            chunk = lead_ids[start:start + BULK_STATUS_CHUNK_SIZE]
+            try:
+                outcomes, event = _apply_status_chunk(cursor, chunk, status_id, remarks, actor_id, role)
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                logger.error(f"Bulk status change failed for leads {chunk[0]}..{chunk[-1]}: {e}")
+                for lead_id in chunk:
+                    results[lead_id] = {"lead_id": lead_id, "outcome": "failed", "error": str(e)}
+                continue
+
+            dispatch(event)
+            for lead_id, outcome in outcomes.items():
+                results[lead_id] = {"lead_id": lead_id, "outcome": outcome}
+
+        ordered = [results[lead_id] for lead_id in lead_ids]
+        updated = sum(1 for row in ordered if row["outcome"] == "updated")
+        logger.info(f"Bulk status change to {status_id} by {actor_id}: {updated}/{len(lead_ids)} updated")
+
+        return {"updated": updated, "results": ordered}
+
+    finally:
+        conn.close()
+
+
 def delete_existing_lead(lead_id):
     """Soft-deletes a lead."""
     conn = get_db()
@@ -911,6 +1401,8 @@ def create_lead_source(data, actor_id=None):
 
         conn.commit()
 
+        invalidate_reference('lead_sources')
+
         log_audit("lead_sources", source_id, "SOURCE_CREATED", None, source_name, actor_id, "INSERT")
 
         return {
@@ -985,6 +1477,8 @@ def create_lead_status(data, actor_id=None):
 
         conn.commit()
 
+        invalidate_reference('lead_status')
+
         log_audit("lead_status", status_id, "STATUS_CREATED", None, status_name, actor_id, "INSERT")
 
         return {
@@ -1031,6 +1525,8 @@ def delete_lead_source(source_id, actor_id=None):
 
         conn.commit()
 
+        invalidate_reference('lead_sources')
+
         log_audit("lead_sources", source_id, "SOURCE_DELETED", source["source_name"], None, actor_id, "DELETE")
         return True
 
@@ -1068,6 +1564,8 @@ def delete_lead_status(status_id, actor_id=None):
 
         conn.commit()
 
+        invalidate_reference('lead_status')
+
         log_audit("lead_status", status_id, "STATUS_DELETED", status["status_name"], None, actor_id, "DELETE")
         return True
 
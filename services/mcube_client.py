@@ -0,0 +1,236 @@
+"""
+Shared HTTP client for the MCube Click2Call API.
+
+One keep-alive requests.Session per process, a small retry loop with jittered
+backoff for failures where MCube cannot have placed the call (connect errors,
+429/503), and a circuit breaker that fails fast while MCube is down.
+"""
+import os
+import time
+import random
+import logging
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+logger = logging.getLogger(__name__)
+
+CONNECT_TIMEOUT = float(os.getenv("MCUBE_CONNECT_TIMEOUT", "3"))
+READ_TIMEOUT = float(os.getenv("MCUBE_READ_TIMEOUT", "10"))
+POOL_SIZE = int(os.getenv("MCUBE_HTTP_POOL_SIZE", "10"))
+MAX_RETRIES = int(os.getenv("MCUBE_HTTP_RETRIES", "2"))
+RETRY_BACKOFF_SECONDS = float(os.getenv("MCUBE_RETRY_BACKOFF", "0.3"))
+BREAKER_THRESHOLD = int(os.getenv("MCUBE_BREAKER_THRESHOLD", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("MCUBE_BREAKER_RESET_SECONDS", "30"))
+
+# Statuses where MCube has explicitly not accepted the request
+RETRYABLE_STATUSES = {429, 503}
+
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class MCubeUnavailableError(Exception):
+    """Raised without contacting MCube while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    closed -> open after `threshold` consecutive failures; after
+    `reset_seconds` one trial request is let through (half-open) and its
+    outcome closes or re-opens the breaker.
+    """
+
+    def __init__(self, threshold, reset_seconds):
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.times_opened = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def allow(self):
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return True
+            if state == "half_open" and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.trial_in_flight or self.failures >= self.threshold:
+                if self.opened_at is None or self.trial_in_flight:
+                    self.times_opened += 1
+                self.opened_at = time.monotonic()
+            self.trial_in_flight = False
+
+
+breaker = CircuitBreaker(BREAKER_THRESHOLD, BREAKER_RESET_SECONDS)
+
+_session = None
+_session_lock = threading.Lock()
+
+_metrics_lock = threading.Lock()
+_metrics = {
+    "requests": {"success": 0, "error": 0, "rejected": 0},
+    "retries": 0,
+    "in_flight": 0,
+    "max_in_flight": 0,
+    "latency_count": 0,
+    "latency_sum": 0.0,
+    "latency_buckets": {bucket: 0 for bucket in LATENCY_BUCKETS},
+}
+
+
+def get_session():
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                # Retries are handled below so they can be limited to safe cases
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE, max_retries=0)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def reset_session():
+    """Drop the pooled connections, e.g. after a fork."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+
+
+def _record(outcome, elapsed=None):
+    with _metrics_lock:
+        _metrics["requests"][outcome] += 1
+        if elapsed is not None:
+            _metrics["latency_count"] += 1
+            _metrics["latency_sum"] += elapsed
+            for bucket in LATENCY_BUCKETS:
+                if elapsed <= bucket:
+                    _metrics["latency_buckets"][bucket] += 1
+
+
+def _track_in_flight(delta):
+    with _metrics_lock:
+        _metrics["in_flight"] += delta
+        _metrics["max_in_flight"] = max(_metrics["max_in_flight"], _metrics["in_flight"])
+
+
+def get_click2call_metrics():
+    with _metrics_lock:
+        snapshot = {
+            "requests": dict(_metrics["requests"]),
+            "retries": _metrics["retries"],
+            "in_flight": _metrics["in_flight"],
+            "max_in_flight": _metrics["max_in_flight"],
+            "latency_seconds": {
+                "count": _metrics["latency_count"],
+                "sum": round(_metrics["latency_sum"], 4),
+                "buckets": {str(bucket): count for bucket, count in _metrics["latency_buckets"].items()},
+            },
+        }
+    snapshot["breaker"] = {"state": breaker.state, "times_opened": breaker.times_opened}
+    return snapshot
+
+
+def _backoff(attempt):
+    # Full jitter: uniform over [0, base * 2^attempt]
+    return random.uniform(0, RETRY_BACKOFF_SECONDS * (2 ** attempt))
+
+
+def _is_retryable(error):
+    """Only failures where MCube cannot have started dialling are retried."""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    if isinstance(error, requests.HTTPError):
+        return error.response is not None and error.response.status_code in RETRYABLE_STATUSES
+    if isinstance(error, requests.ConnectionError):
+        reason = getattr(error.args[0], "reason", None) if error.args else None
+        return isinstance(reason, NewConnectionError)
+    return False
+
+
+def _counts_against_breaker(error):
+    """Client errors (bad number, bad key) say nothing about MCube's health."""
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return error.response.status_code >= 500 or error.response.status_code == 429
+    return isinstance(error, requests.RequestException)
+
+
+def post_json(url, payload):
+    """
+    POST to MCube and return the decoded JSON body.
+    Raises MCubeUnavailableError when the breaker is open and
+    requests.RequestException for anything else that fails.
+    """
+    if not breaker.allow():
+        _record("rejected")
+        raise MCubeUnavailableError("MCube is temporarily unavailable, please try again shortly")
+
+    session = get_session()
+    started = time.perf_counter()
+    _track_in_flight(1)
+
+    try:
+        attempt = 0
+        while True:
+            try:
+                response = session.post(url, json=payload, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+                response.raise_for_status()
+                result = response.json()
+                break
+
+            except requests.RequestException as e:
+                if not _is_retryable(e) or attempt >= MAX_RETRIES:
+                    raise
+
+                attempt += 1
+                with _metrics_lock:
+                    _metrics["retries"] += 1
+                logger.warning(f"MCube request failed ({e}); retry {attempt}/{MAX_RETRIES}")
+                time.sleep(_backoff(attempt))
+
+    except Exception as e:
+        if _counts_against_breaker(e):
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        _record("error", time.perf_counter() - started)
+        raise
+
+    finally:
+        _track_in_flight(-1)
+
+    breaker.record_success()
+    _record("success", time.perf_counter() - started)
+    return result
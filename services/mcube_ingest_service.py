@@ -0,0 +1,281 @@
+import os
+import json
+import logging
+import threading
+from db import get_db, db_cursor
+from services.mcube_service import parse_mcube_payload, resolve_mcube_call
+from services.lead_event_bus import stage_event, dispatch
+
+logger = logging.getLogger(__name__)
+
+# "sync" keeps the old behaviour (process inside the webhook request),
+# "queue" persists the payload and acks immediately.
+MCUBE_INGEST_MODE = os.getenv("MCUBE_INGEST_MODE", "sync").lower()
+MCUBE_WORKERS = int(os.getenv("MCUBE_WORKERS", "2"))
+MCUBE_BATCH_SIZE = int(os.getenv("MCUBE_BATCH_SIZE", "50"))
+MCUBE_POLL_SECONDS = float(os.getenv("MCUBE_POLL_SECONDS", "2"))
+MCUBE_MAX_ATTEMPTS = int(os.getenv("MCUBE_MAX_ATTEMPTS", "5"))
+# Rows stuck in 'processing' longer than this are assumed orphaned by a dead
+# worker. Reclaiming a batch that was only slow is harmless: call_log rows are
+# keyed on the queue id, so the second run inserts nothing new.
+MCUBE_STALE_LOCK_MINUTES = int(os.getenv("MCUBE_STALE_LOCK_MINUTES", "15"))
+
+_wakeup = threading.Event()
+_stop = threading.Event()
+_workers = []
+_table_ready = False
+
+
+def is_queue_mode():
+    return MCUBE_INGEST_MODE == "queue"
+
+
+def _ensure_mcube_queue_table(cursor):
+    global _table_ready
+    if _table_ready:
+        return
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS mcube_call_queue (
+            queue_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            mcube_call_id VARCHAR(100) NULL,
+            payload TEXT NOT NULL,
+            status VARCHAR(20) NOT NULL DEFAULT 'pending',
+            attempts INT NOT NULL DEFAULT 0,
+            last_error TEXT NULL,
+            received_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            locked_at DATETIME NULL,
+            processed_at DATETIME NULL,
+            UNIQUE KEY uq_mcube_call_queue_callid (mcube_call_id),
+            KEY idx_mcube_call_queue_status (status, queue_id)
+        )
+    """)
+    _table_ready = True
+
+
+def _ensure_column(cursor, table_name, column_name, alter_sql):
+    cursor.execute(f"SHOW COLUMNS FROM {table_name} LIKE %s", (column_name,))
+    if not cursor.fetchall():
+        cursor.execute(alter_sql)
+
+
+def ensure_mcube_ingest_schema():
+    """
+    Queue table, plus call_log.mcube_queue_id so a queue row can only ever
+    produce one call_log row. Run by services.schema_service.
+    """
+    with db_cursor() as (db, cursor):
+        _ensure_mcube_queue_table(cursor)
+        _ensure_column(cursor, "call_log", "mcube_queue_id", """
+            ALTER TABLE call_log
+                ADD COLUMN mcube_queue_id BIGINT NULL,
+                ADD UNIQUE KEY uq_call_log_mcube_queue (mcube_queue_id)
+        """)
+
+
+# -------------------------
+# Ingest (request path)
+# -------------------------
+
+def enqueue_mcube_call(data):
+    """
+    Validate and persist the raw webhook payload.
+    Retries of the same MCube callid are absorbed by the unique key.
+    """
+    call = parse_mcube_payload(data)
+
+    if not call["caller_phone"] and not call["agent_phone"]:
+        raise ValueError("caller or agent phone is required")
+
+    db = get_db()
+    cursor = db.cursor(dictionary=True)
+
+    try:
+        _ensure_mcube_queue_table(cursor)
+
+        cursor.execute("""
+            INSERT IGNORE INTO mcube_call_queue (mcube_call_id, payload)
+            VALUES (%s, %s)
+        """, (call["mcube_call_id"], json.dumps(data, default=str)))
+
+        duplicate = cursor.rowcount == 0
+        queue_id = cursor.lastrowid if not duplicate else None
+
+        if duplicate:
+            cursor.execute(
+                "SELECT queue_id FROM mcube_call_queue WHERE mcube_call_id = %s",
+                (call["mcube_call_id"],)
+            )
+            row = cursor.fetchone()
+            queue_id = row["queue_id"] if row else None
+
+        db.commit()
+
+    except Exception:
+        db.rollback()
+        raise
+
+    finally:
+        cursor.close()
+        db.close()
+
+    _wakeup.set()
+
+    return {
+        "queue_id": queue_id,
+        "duplicate": duplicate
+    }
+
+
+# -------------------------
+# Workers
+# -------------------------
+
+def _claim_batch(db, cursor):
+    """Claim up to MCUBE_BATCH_SIZE rows; SKIP LOCKED lets workers run side by side."""
+    cursor.execute("""
+        SELECT queue_id, payload, received_at, attempts
+        FROM mcube_call_queue
+        WHERE status = 'pending'
+           OR (status = 'processing' AND locked_at < NOW() - INTERVAL %s MINUTE)
+        ORDER BY queue_id
+        LIMIT %s
+        FOR UPDATE SKIP LOCKED
+    """, (MCUBE_STALE_LOCK_MINUTES, MCUBE_BATCH_SIZE))
+    rows = cursor.fetchall()
+
+    if rows:
+        placeholders = ", ".join(["%s"] * len(rows))
+        cursor.execute(f"""
+            UPDATE mcube_call_queue
+            SET status = 'processing', locked_at = NOW(), attempts = attempts + 1
+            WHERE queue_id IN ({placeholders})
+        """, tuple(r["queue_id"] for r in rows))
+
+    db.commit()
+    return rows
+
+
+def _process_batch(db, cursor, rows):
+    call_rows = []
+    done_ids = []
+    failures = []
+    staged_events = []
+
+    for row in rows:
+        # A failing row rolls back only its own writes, not the batch's
+        cursor.execute("SAVEPOINT mcube_row")
+        try:
+            call = parse_mcube_payload(json.loads(row["payload"]))
+            row_events = []
+            resolved = resolve_mcube_call(cursor, db, call, row_events)
+            # Staged inside the row's savepoint: a failed row or batch
+            # leaves no event behind, so a retry can't notify twice
+            row_events = [stage_event(cursor, event) for event in row_events]
+            call_rows.append((
+                resolved["lead_id"],
+                resolved["emp_id"],
+                row["received_at"],
+                resolved["duration"],
+                resolved["status"],
+                resolved["source"],
+                resolved["recording_url"],
+                row["queue_id"]
+            ))
+            done_ids.append(row["queue_id"])
+            cursor.execute("RELEASE SAVEPOINT mcube_row")
+            staged_events.extend(row_events)
+        except Exception as e:
+            logger.error(f"MCube queue item {row['queue_id']} failed: {e}")
+            cursor.execute("ROLLBACK TO SAVEPOINT mcube_row")
+            failures.append((row, str(e)))
+
+    # Call rows and their queue completion commit together; the unique
+    # mcube_queue_id makes a re-run of a reclaimed batch a no-op.
+    if call_rows:
+        cursor.executemany("""
+            INSERT IGNORE INTO call_log
+            (lead_id, emp_id, call_time, call_duration, call_status, call_source, recording_url, mcube_queue_id)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        """, call_rows)
+
+        placeholders = ", ".join(["%s"] * len(done_ids))
+        cursor.execute(f"""
+            UPDATE mcube_call_queue
+            SET status = 'done', processed_at = NOW(), last_error = NULL
+            WHERE queue_id IN ({placeholders})
+        """, tuple(done_ids))
+
+    for row, error in failures:
+        next_status = "failed" if row["attempts"] + 1 >= MCUBE_MAX_ATTEMPTS else "pending"
+        cursor.execute("""
+            UPDATE mcube_call_queue
+            SET status = %s, last_error = %s
+            WHERE queue_id = %s
+        """, (next_status, error[:2000], row["queue_id"]))
+
+    db.commit()
+    dispatch(*staged_events)
+
+    if call_rows:
+        logger.info(f"MCube queue: logged {len(call_rows)} call(s), {len(failures)} failed")
+
+
+def process_pending_batch():
+    """Claim and process one batch. Returns the number of rows claimed."""
+    db = get_db()
+    cursor = db.cursor(dictionary=True)
+
+    try:
+        _ensure_mcube_queue_table(cursor)
+        rows = _claim_batch(db, cursor)
+        if rows:
+            _process_batch(db, cursor, rows)
+        return len(rows)
+
+    except Exception:
+        db.rollback()
+        raise
+
+    finally:
+        cursor.close()
+        db.close()
+
+
+def _worker_loop():
+    while not _stop.is_set():
+        try:
+            claimed = process_pending_batch()
+        except Exception as e:
+            logger.error(f"MCube queue worker error: {e}")
+            claimed = 0
+
+        if claimed < MCUBE_BATCH_SIZE:
+            _wakeup.wait(MCUBE_POLL_SECONDS)
+            _wakeup.clear()
+
+
+def init_mcube_workers():
+    """Start the queue workers. No-op unless MCUBE_INGEST_MODE=queue."""
+    if not is_queue_mode() or _workers:
+        return
+
+    for index in range(MCUBE_WORKERS):
+        worker = threading.Thread(
+            target=_worker_loop,
+            name=f"mcube-ingest-{index}",
+            daemon=True
+        )
+        worker.start()
+        _workers.append(worker)
+
+    logger.info(f"MCube ingest queue enabled with {MCUBE_WORKERS} worker(s)")
+
+
+def stop_mcube_workers(timeout=10):
+    _stop.set()
+    _wakeup.set()
+    for worker in _workers:
+        worker.join(timeout)
+    _workers.clear()
+    _stop.clear()
@@ -11,6 +11,7 @@ from services.leads_service import (
 from services.webhook_service import _find_source_by_name, _get_default_status
 from services.notification_service import create_notification
 from services.re_enquiry_service import notify_admin_owned_reenquiry
+from services.mcube_client import post_json
 
 logger = logging.getLogger(__name__)
 
@@ -162,8 +163,9 @@ def _auto_create_lead_from_call(cursor, db, caller_phone, emp_id):
         "description": "Auto-created from inbound IVR call"
     }
 
+    # add_new_lead commits on its own connection; the caller's transaction
+    # (e.g. a queue batch) is left for the caller to commit
     lead_id = add_new_lead(lead_data, actor_id=assigned_to, role="ADMIN")
-    db.commit()
 
     # Notify the assigned employee
     if assigned_to:
@@ -181,9 +183,9 @@ def _auto_create_lead_from_call(cursor, db, caller_phone, emp_id):
     return lead_id
 
 
-def process_mcube_call(data):
+def parse_mcube_payload(data):
     """
-    Process an incoming MCube webhook call record.
+    Normalise an MCube webhook payload.
     Expected fields from MCube:
     - caller: customer phone number
     - agent: agent phone/extension
@@ -193,84 +195,117 @@ def process_mcube_call(data):
     - call_type: inbound/outbound
     - callid: MCube's unique call ID
     """
-    caller_phone = data.get("caller") or data.get("caller_number") or data.get("from")
-    agent_phone = data.get("agent") or data.get("agent_number") or data.get("to")
     duration = data.get("duration") or data.get("call_duration") or 0
-    mcube_status = data.get("status") or data.get("call_status") or ""
-    recording_url = data.get("recording_url") or data.get("recording") or None
-    call_type = data.get("call_type") or data.get("type") or "MCube"
-    mcube_call_id = data.get("callid") or data.get("call_id") or None
 
     try:
         duration = int(duration)
     except (ValueError, TypeError):
         duration = 0
 
-    crm_status = map_mcube_status(mcube_status)
+    mcube_call_id = data.get("callid") or data.get("call_id") or None
+
+    return {
+        "caller_phone": data.get("caller") or data.get("caller_number") or data.get("from"),
+        "agent_phone": data.get("agent") or data.get("agent_number") or data.get("to"),
+        "duration": duration,
+        "mcube_status": data.get("status") or data.get("call_status") or "",
+        "recording_url": data.get("recording_url") or data.get("recording") or None,
+        "call_type": data.get("call_type") or data.get("type") or "MCube",
+        "mcube_call_id": str(mcube_call_id) if mcube_call_id else None,
+    }
+
+
+def resolve_mcube_call(cursor, db, call, events=None):
+    """
+    Match the lead/employee for a parsed MCube call, auto-creating the lead
+    for unknown inbound numbers. Returns the values for the call_log row.
+    Lead events are appended to `events` when given, otherwise published.
+    """
+    caller_phone = call["caller_phone"]
+    agent_phone = call["agent_phone"]
+    call_type = call["call_type"]
+    is_inbound = call_type and call_type.lower() in ["inbound", "incoming"]
+
+    lead_id = _match_lead_by_phone(cursor, caller_phone)
+    emp_id = _match_employee_by_phone(cursor, agent_phone)
+    admin_owned_reenquiry = False
+
+    if not emp_id:
+        logger.warning(f"MCube webhook: no employee found for phone {agent_phone}")
+
+    # Auto-create lead for inbound calls from unknown numbers
+    auto_created = False
+    if not lead_id:
+        if is_inbound:
+            lead_id = _auto_create_lead_from_call(cursor, db, caller_phone, emp_id)
+            if lead_id:
+                auto_created = True
+        else:
+            logger.warning(f"MCube webhook: no lead found for phone {caller_phone}")
+    elif is_inbound:
+        admin_owned_reenquiry = bool(
+            notify_admin_owned_reenquiry(cursor, caller_phone, "MCube Call", emp_id, events)
+        )
+
+    # Determine call source label
+    source_label = "MCube"
+    if is_inbound:
+        source_label = "MCube-Inbound"
+    elif call_type and call_type.lower() in ["outbound", "outgoing"]:
+        source_label = "MCube-Outbound"
+
+    return {
+        "lead_id": lead_id,
+        "emp_id": emp_id,
+        "duration": call["duration"],
+        "status": map_mcube_status(call["mcube_status"]),
+        "source": source_label,
+        "recording_url": call["recording_url"],
+        "auto_created": auto_created,
+        "admin_owned_reenquiry": admin_owned_reenquiry
+    }
+
+
+def process_mcube_call(data):
+    """Process an incoming MCube webhook call record synchronously."""
+    call = parse_mcube_payload(data)
 
     db = get_db()
     cursor = db.cursor(dictionary=True)
 
     try:
-        lead_id = _match_lead_by_phone(cursor, caller_phone)
-        emp_id = _match_employee_by_phone(cursor, agent_phone)
-        admin_owned_reenquiry = False
-
-        if not emp_id:
-            logger.warning(f"MCube webhook: no employee found for phone {agent_phone}")
-
-        # Auto-create lead for inbound calls from unknown numbers
-        auto_created = False
-        if not lead_id:
-            is_inbound = call_type and call_type.lower() in ["inbound", "incoming"]
-            if is_inbound:
-                lead_id = _auto_create_lead_from_call(cursor, db, caller_phone, emp_id)
-                if lead_id:
-                    auto_created = True
-            else:
-                logger.warning(f"MCube webhook: no lead found for phone {caller_phone}")
-        elif call_type and call_type.lower() in ["inbound", "incoming"]:
-            admin_owned_reenquiry = bool(
-                notify_admin_owned_reenquiry(cursor, caller_phone, "MCube Call", emp_id)
-            )
-
-        # Determine call source label
-        source_label = "MCube"
-        if call_type and call_type.lower() in ["inbound", "incoming"]:
-            source_label = "MCube-Inbound"
-        elif call_type and call_type.lower() in ["outbound", "outgoing"]:
-            source_label = "MCube-Outbound"
+        resolved = resolve_mcube_call(cursor, db, call)
 
         cursor.execute("""
             INSERT INTO call_log
             (lead_id, emp_id, call_time, call_duration, call_status, call_source, recording_url)
             VALUES (%s, %s, NOW(), %s, %s, %s, %s)
         """, (
-            lead_id,
-            emp_id,
-            duration,
-            crm_status,
-            source_label,
-            recording_url
+            resolved["lead_id"],
+            resolved["emp_id"],
+            resolved["duration"],
+            resolved["status"],
+            resolved["source"],
+            resolved["recording_url"]
         ))
 
         db.commit()
         call_id = cursor.lastrowid
 
         logger.info(
-            f"MCube call logged: call_id={call_id}, lead={lead_id}, "
-            f"emp={emp_id}, status={crm_status}, duration={duration}s"
-            f"{', auto_created=True' if auto_created else ''}"
+            f"MCube call logged: call_id={call_id}, lead={resolved['lead_id']}, "
+            f"emp={resolved['emp_id']}, status={resolved['status']}, duration={resolved['duration']}s"
+            f"{', auto_created=True' if resolved['auto_created'] else ''}"
         )
 
         return {
             "call_id": call_id,
-            "lead_id": lead_id,
-            "emp_id": emp_id,
-            "status": crm_status,
-            "matched": bool(lead_id),
-            "auto_created": auto_created,
-            "admin_owned_reenquiry": admin_owned_reenquiry
+            "lead_id": resolved["lead_id"],
+            "emp_id": resolved["emp_id"],
+            "status": resolved["status"],
+            "matched": bool(resolved["lead_id"]),
+            "auto_created": resolved["auto_created"],
+            "admin_owned_reenquiry": resolved["admin_owned_reenquiry"]
         }
 
     except Exception as e:
@@ -301,10 +336,7 @@ def initiate_click2call(agent_phone, customer_phone):
     }
 
     try:
-        response = requests.post(click2call_url, json=payload, timeout=10)
-        response.raise_for_status()
-
-        result = response.json()
+        result = post_json(click2call_url, payload)
         logger.info(f"Click2Call initiated: agent={agent_phone}, customer={customer_phone}")
         return result
 
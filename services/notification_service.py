@@ -15,4 +15,29 @@ def create_notification(emp_id, title, message, object_name=None, object_id=None
     conn.commit()
 
     cursor.close()
-    conn.close()
\ No newline at end of file
+    conn.close()
+
+
+def create_notifications(notifications):
+    """
+    Insert many notifications on one connection.
+    notifications: iterable of (emp_id, title, message, object_name, object_id)
+    """
+    rows = list(notifications)
+    if not rows:
+        return
+
+    conn = get_db()
+    cursor = conn.cursor()
+
+    try:
+        cursor.executemany("""
+            INSERT INTO notifications
+            (emp_id, title, message, object_name, object_id)
+            VALUES (%s,%s,%s,%s,%s)
+        """, rows)
+        conn.commit()
+
+    finally:
+        cursor.close()
+        conn.close()
@@ -1,5 +1,6 @@
 from db import get_db
 from services.audit_service import log_audit
+from services.lead_assignment_service import invalidate_roster
 
 
 def _ensure_mapping_table(cursor):
@@ -11,6 +12,8 @@ def _ensure_mapping_table(cursor):
             created_on DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
             created_by VARCHAR(150) NULL,
             is_active TINYINT(1) NOT NULL DEFAULT 1,
+            assignment_weight INT NOT NULL DEFAULT 1,
+            max_open_leads INT NULL,
             UNIQUE KEY uq_employee_project (emp_id, project_id),
             CONSTRAINT fk_employee_project_mapping_emp
                 FOREIGN KEY (emp_id) REFERENCES employee(emp_id),
@@ -33,6 +36,8 @@ def get_project_assignments():
                 m.project_id,
                 m.created_on,
                 m.created_by,
+                m.assignment_weight,
+                m.max_open_leads,
                 TRIM(CONCAT(e.emp_first_name, ' ', IFNULL(e.emp_last_name, ''))) AS employee_name,
                 p.project_name
             FROM employee_project_mapping m
@@ -47,7 +52,7 @@ def get_project_assignments():
         conn.close()
 
 
-def create_project_assignment(project_id, emp_id, created_by):
+def create_project_assignment(project_id, emp_id, created_by, assignment_weight=None, max_open_leads=None):
     conn = get_db()
     cursor = conn.cursor(dictionary=True)
 
@@ -88,24 +93,33 @@ def create_project_assignment(project_id, emp_id, created_by):
         if existing and existing["is_active"] == 1:
             raise ValueError("This employee is already mapped to the selected project")
 
+        assignment_weight = int(assignment_weight or 1)
+        if assignment_weight < 1:
+            raise ValueError("assignment_weight must be at least 1")
+        if max_open_leads is not None and int(max_open_leads) < 1:
+            raise ValueError("max_open_leads must be at least 1")
+
         if existing and existing["is_active"] == 0:
             cursor.execute("""
                 UPDATE employee_project_mapping
                 SET is_active = 1,
                     created_by = %s,
-                    created_on = NOW()
+                    created_on = NOW(),
+                    assignment_weight = %s,
+                    max_open_leads = %s
                 WHERE mapping_id = %s
-            """, (created_by, existing["mapping_id"]))
+            """, (created_by, assignment_weight, max_open_leads, existing["mapping_id"]))
             mapping_id = existing["mapping_id"]
         else:
             cursor.execute("""
                 INSERT INTO employee_project_mapping
-                    (emp_id, project_id, created_by, is_active)
-                VALUES (%s, %s, %s, 1)
-            """, (emp_id, project_id, created_by))
+                    (emp_id, project_id, created_by, is_active, assignment_weight, max_open_leads)
+                VALUES (%s, %s, %s, 1, %s, %s)
+            """, (emp_id, project_id, created_by, assignment_weight, max_open_leads))
             mapping_id = cursor.lastrowid
 
         conn.commit()
+        invalidate_roster(project_id)
 
         log_audit(
             object_name="employee_project_mapping",
@@ -124,6 +138,8 @@ def create_project_assignment(project_id, emp_id, created_by):
                 m.project_id,
                 m.created_on,
                 m.created_by,
+                m.assignment_weight,
+                m.max_open_leads,
                 TRIM(CONCAT(e.emp_first_name, ' ', IFNULL(e.emp_last_name, ''))) AS employee_name,
                 p.project_name
             FROM employee_project_mapping m
@@ -165,6 +181,7 @@ def delete_project_assignment(mapping_id, deleted_by):
             WHERE mapping_id = %s
         """, (mapping_id,))
         conn.commit()
+        invalidate_roster(mapping["project_id"])
 
         log_audit(
             object_name="employee_project_mapping",
@@ -1,10 +1,16 @@
-from db import get_db
+from db import get_db, db_cursor
 import logging
+import mysql.connector
 from services.audit_service import log_audit
+from services.reference_data_service import invalidate_reference
 
 logger = logging.getLogger(__name__)
 
 
+class ProjectInUseError(Exception):
+    """The project is still referenced by leads or other records."""
+
+
 def _generate_next_project_id(cursor):
 
     cursor.execute(
@@ -99,6 +105,7 @@ class ProjectService:
 
             cursor.execute(sql, values)
             db.commit()
+            invalidate_reference("project_registration")
 
             log_audit(
                 object_name="project_registration",
@@ -118,6 +125,7 @@ class ProjectService:
             raise
 
         finally:
+            cursor.close()
             db.close()
 
     # -----------------------------
@@ -125,53 +133,43 @@ class ProjectService:
     # -----------------------------
     def get_all_projects(self):
 
-        db = get_db()
-        cursor = db.cursor(dictionary=True)
-
-        cursor.execute(
-            """
-            SELECT
-                project_id,
-                project_name,
-                project_type,
-                location,
-                city,
-                state,
-                status,
-                created_on
-            FROM project_registration
-            ORDER BY created_on DESC
-            """
-        )
+        with db_cursor(dictionary=True, readonly=True) as (db, cursor):
 
-        projects = cursor.fetchall()
-
-        db.close()
+            cursor.execute(
+                """
+                SELECT
+                    project_id,
+                    project_name,
+                    project_type,
+                    location,
+                    city,
+                    state,
+                    status,
+                    created_on
+                FROM project_registration
+                ORDER BY created_on DESC
+                """
+            )
 
-        return projects
+            return cursor.fetchall()
 
     # -----------------------------
     # Get Project By ID
     # -----------------------------
     def get_project_by_id(self, project_id):
 
-        db = get_db()
-        cursor = db.cursor(dictionary=True)
-
-        cursor.execute(
-            """
-            SELECT *
-            FROM project_registration
-            WHERE project_id = %s
-            """,
-            (project_id,),
-        )
-
-        project = cursor.fetchone()
+        with db_cursor(dictionary=True) as (db, cursor):
 
-        db.close()
+            cursor.execute(
+                """
+                SELECT *
+                FROM project_registration
+                WHERE project_id = %s
+                """,
+                (project_id,),
+            )
 
-        return project
+            return cursor.fetchone()
 
     # -----------------------------
     # Update Project
@@ -257,6 +255,7 @@ class ProjectService:
             raise
 
         finally:
+            cursor.close()
             db.close()
 
     # -----------------------------
@@ -321,6 +320,7 @@ class ProjectService:
             raise
 
         finally:
+            cursor.close()
             db.close()
 
     # -----------------------------
@@ -341,11 +341,20 @@ class ProjectService:
             if not project:
                 return False
 
-            cursor.execute(
-                "DELETE FROM project_registration WHERE project_id = %s",
-                (project_id,)
-            )
+            try:
+                cursor.execute(
+                    "DELETE FROM project_registration WHERE project_id = %s",
+                    (project_id,)
+                )
+            except mysql.connector.IntegrityError as e:
+                if getattr(e, "errno", None) != 1451:
+                    raise
+                raise ProjectInUseError(
+                    f"Project '{project['project_name']}' still has leads or assignments "
+                    f"linked to it. Reassign or remove them before deleting the project."
+                )
             db.commit()
+            invalidate_reference("project_registration")
 
             log_audit(
                 object_name="project_registration",
@@ -364,6 +373,7 @@ class ProjectService:
             raise
 
         finally:
+            cursor.close()
             db.close()
 
 
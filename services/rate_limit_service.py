@@ -0,0 +1,285 @@
+"""
+Token-bucket rate limiting for the public ingestion endpoints.
+
+Each bucket holds up to `burst` tokens and refills at `rate` per second; a
+request takes one token. A request carrying a valid API key is counted only
+against its (scope, API key) bucket; anything else against its (scope,
+client IP) bucket.
+
+Client IP is the socket address unless RATE_LIMIT_TRUSTED_PROXY_HOPS is
+set. Behind a load balancer or reverse proxy it MUST be set to the number
+of proxies that append to X-Forwarded-For; left at 0 there, every client
+shares the proxy's address and one IP bucket. Set it no higher than the
+real hop count, or clients can pick their own bucket by sending a forged
+X-Forwarded-For.
+
+RATE_LIMIT_STORE=memory   per process; cheap, but each gunicorn worker
+                          counts separately (effective limit x workers)
+RATE_LIMIT_STORE=db       shared through the rate_limit_buckets table; one
+                          short row-locked transaction per bucket checked
+
+Ingestion also sheds load before touching the database: requests are
+refused while this process's primary pool is above LOAD_SHED_POOL_UTILIZATION,
+and at most INGESTION_MAX_CONCURRENCY run at once, so the pool stays
+available to the CRM UI.
+
+The DB store fails open: if MySQL is unavailable the request is allowed and
+counted as a store error, so a limiter problem never blocks lead intake.
+"""
+import os
+import time
+import hashlib
+import logging
+import threading
+
+from flask import request
+
+from db import get_db, pool_utilization, DB_POOL_SIZE
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_STORE = os.getenv("RATE_LIMIT_STORE", "memory").lower()
+KEY_PER_MINUTE = float(os.getenv("RATE_LIMIT_KEY_PER_MINUTE", "300"))
+KEY_BURST = float(os.getenv("RATE_LIMIT_KEY_BURST", "60"))
+IP_PER_MINUTE = float(os.getenv("RATE_LIMIT_IP_PER_MINUTE", "60"))
+IP_BURST = float(os.getenv("RATE_LIMIT_IP_BURST", "20"))
+# Proxies in front of the app that append to X-Forwarded-For (0: use the socket address).
+# Must be set when running behind a proxy; see the module docstring.
+TRUSTED_PROXY_HOPS = int(os.getenv("RATE_LIMIT_TRUSTED_PROXY_HOPS", "0"))
+DB_STORE_TIMEOUT = float(os.getenv("RATE_LIMIT_DB_TIMEOUT", "0.5"))
+MEMORY_MAX_BUCKETS = 50000
+
+LOAD_SHED_POOL_UTILIZATION = float(os.getenv("LOAD_SHED_POOL_UTILIZATION", "0.8"))
+LOAD_SHED_RETRY_AFTER = int(os.getenv("LOAD_SHED_RETRY_AFTER", "5"))
+INGESTION_MAX_CONCURRENCY = int(os.getenv("INGESTION_MAX_CONCURRENCY", max(2, DB_POOL_SIZE // 4)))
+INGESTION_QUEUE_SECONDS = float(os.getenv("INGESTION_QUEUE_SECONDS", "0.5"))
+
+_table_ready = False
+_memory_buckets = {}    # bucket key -> [tokens, updated (monotonic)]
+_memory_lock = threading.Lock()
+
+_ingestion_slots = threading.BoundedSemaphore(INGESTION_MAX_CONCURRENCY)
+_in_flight = 0
+
+_stats_lock = threading.Lock()
+_stats = {}             # (scope, reason) -> count
+_store_errors = 0
+
+
+def record_rejection(scope, reason):
+    with _stats_lock:
+        _stats[(scope, reason)] = _stats.get((scope, reason), 0) + 1
+
+
+def _record_store_error():
+    global _store_errors
+    with _stats_lock:
+        _store_errors += 1
+
+
+def get_rate_limit_stats():
+    with _stats_lock:
+        return {
+            "rejected": {f"{scope}:{reason}": count for (scope, reason), count in sorted(_stats.items())},
+            "in_flight": _in_flight,
+            "store_errors": _store_errors,
+        }
+
+
+def render_rate_limit_metrics():
+    """Prometheus lines for /metrics."""
+    with _stats_lock:
+        stats = sorted(_stats.items())
+        in_flight = _in_flight
+        store_errors = _store_errors
+    lines = [
+        "# HELP ingestion_rejected_total Ingestion requests rejected, by reason.",
+        "# TYPE ingestion_rejected_total counter",
+    ]
+    for (scope, reason), count in stats:
+        lines.append(f'ingestion_rejected_total{{scope="{scope}",reason="{reason}"}} {count}')
+    lines += [
+        "# HELP ingestion_in_flight Ingestion requests currently being processed.",
+        "# TYPE ingestion_in_flight gauge",
+        f"ingestion_in_flight {in_flight}",
+        "# HELP rate_limit_store_errors_total Rate limit checks allowed because the store failed.",
+        "# TYPE rate_limit_store_errors_total counter",
+        f"rate_limit_store_errors_total {store_errors}",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+# -------------------------
+# Load shedding
+# -------------------------
+def should_shed_load():
+    """True while the primary pool is too busy to take ingestion work."""
+    return pool_utilization() >= LOAD_SHED_POOL_UTILIZATION
+
+
+def acquire_ingestion_slot():
+    """Wait up to INGESTION_QUEUE_SECONDS for a slot; False if none freed up."""
+    global _in_flight
+    if not _ingestion_slots.acquire(timeout=INGESTION_QUEUE_SECONDS):
+        return False
+    with _stats_lock:
+        _in_flight += 1
+    return True
+
+
+def release_ingestion_slot():
+    global _in_flight
+    with _stats_lock:
+        _in_flight -= 1
+    _ingestion_slots.release()
+
+
+# -------------------------
+# Identity
+# -------------------------
+def client_ip():
+    if TRUSTED_PROXY_HOPS:
+        forwarded = [part.strip() for part in request.headers.get("X-Forwarded-For", "").split(",") if part.strip()]
+        if len(forwarded) >= TRUSTED_PROXY_HOPS:
+            return forwarded[-TRUSTED_PROXY_HOPS]
+    return request.remote_addr or "unknown"
+
+
+def key_fingerprint(api_key):
+    """Bucket id for an API key; the key itself is never stored."""
+    return hashlib.sha256(api_key.strip().encode("utf-8")).hexdigest()[:16]
+
+
+# -------------------------
+# Stores
+# -------------------------
+def _refill(tokens, elapsed, rate, burst):
+    return min(burst, tokens + max(elapsed, 0) * rate)
+
+
+def _refill_seconds():
+    """Longest time any bucket takes to go from empty to full."""
+    return max(
+        KEY_BURST * 60 / KEY_PER_MINUTE if KEY_PER_MINUTE > 0 else 0,
+        IP_BURST * 60 / IP_PER_MINUTE if IP_PER_MINUTE > 0 else 0,
+    )
+
+
+def _take_memory(bucket_key, rate, burst):
+    now = time.monotonic()
+    with _memory_lock:
+        bucket = _memory_buckets.get(bucket_key)
+        tokens = burst if bucket is None else _refill(bucket[0], now - bucket[1], rate, burst)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        _memory_buckets[bucket_key] = [tokens, now]
+
+        if len(_memory_buckets) > MEMORY_MAX_BUCKETS:
+            # A bucket idle long enough to have refilled is equivalent to no bucket
+            for key in [k for k, (_, updated) in _memory_buckets.items() if now - updated > _refill_seconds()]:
+                del _memory_buckets[key]
+    return allowed, tokens
+
+
+def _ensure_bucket_table(cursor):
+    global _table_ready
+    if _table_ready:
+        return
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS rate_limit_buckets (
+            bucket_key VARCHAR(191) NOT NULL PRIMARY KEY,
+            tokens DOUBLE NOT NULL,
+            updated_at DOUBLE NOT NULL,
+            KEY idx_rate_limit_buckets_updated (updated_at)
+        )
+    """)
+    _table_ready = True
+
+
+def _take_db(bucket_key, rate, burst):
+    db = get_db(timeout=DB_STORE_TIMEOUT)
+    cursor = db.cursor()
+
+    try:
+        _ensure_bucket_table(cursor)
+        now = time.time()
+
+        cursor.execute("""
+            INSERT IGNORE INTO rate_limit_buckets (bucket_key, tokens, updated_at)
+            VALUES (%s, %s, %s)
+        """, (bucket_key, burst, now))
+        cursor.execute("""
+            SELECT tokens, updated_at FROM rate_limit_buckets
+            WHERE bucket_key = %s FOR UPDATE
+        """, (bucket_key,))
+        tokens, updated_at = cursor.fetchone()
+
+        tokens = _refill(tokens, now - updated_at, rate, burst)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        cursor.execute("""
+            UPDATE rate_limit_buckets SET tokens = %s, updated_at = %s
+            WHERE bucket_key = %s
+        """, (tokens, now, bucket_key))
+        db.commit()
+        return allowed, tokens
+
+    except Exception:
+        db.rollback()
+        raise
+
+    finally:
+        cursor.close()
+        db.close()
+
+
+def take_token(bucket_key, per_minute, burst):
+    """
+    Take one token from `bucket_key`.
+    Returns (allowed, retry_after_seconds).
+    """
+    rate = per_minute / 60.0
+    if rate <= 0:
+        return True, 0
+
+    if RATE_LIMIT_STORE == "db":
+        try:
+            allowed, tokens = _take_db(bucket_key, rate, burst)
+        except Exception as e:
+            logger.error(f"Rate limit store unavailable, allowing request: {e}")
+            _record_store_error()
+            return True, 0
+    else:
+        allowed, tokens = _take_memory(bucket_key, rate, burst)
+
+    return allowed, 0 if allowed else (1 - tokens) / rate
+
+
+def check_rate_limit(scope, api_key=None):
+    """
+    Check one bucket for `scope`: the API key's when the caller has already
+    verified the key, otherwise the client IP's.
+    Returns (allowed, retry_after_seconds).
+    """
+    if api_key:
+        return take_token(f"{scope}:key:{key_fingerprint(api_key)}", KEY_PER_MINUTE, KEY_BURST)
+    return take_token(f"{scope}:ip:{client_ip()}", IP_PER_MINUTE, IP_BURST)
+
+
+def purge_idle_buckets():
+    """Drop DB buckets idle long enough to be full again; returns rows removed."""
+    db = get_db()
+    cursor = db.cursor()
+
+    try:
+        _ensure_bucket_table(cursor)
+        cursor.execute("DELETE FROM rate_limit_buckets WHERE updated_at < %s", (time.time() - _refill_seconds(),))
+        db.commit()
+        return cursor.rowcount
+
+    finally:
+        cursor.close()
+        db.close()
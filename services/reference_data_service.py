@@ -0,0 +1,65 @@
+import os
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# table -> primary key column for the reference data leads point at
+REFERENCE_TABLES = {
+    "lead_sources": "source_id",
+    "lead_status": "status_id",
+    "employee": "emp_id",
+    "project_registration": "project_id",
+}
+
+REFERENCE_CACHE_SECONDS = int(os.getenv("REFERENCE_CACHE_SECONDS", "300"))
+# A miss triggers a reload so rows created by other workers are picked up,
+# but never more often than this per table.
+MISS_RELOAD_SECONDS = 1.0
+
+_reference_sets = {}
+_lock = threading.Lock()
+
+
+def _load(cursor, table):
+    column = REFERENCE_TABLES[table]
+    cursor.execute(f"SELECT {column} FROM {table}")
+    ids = set()
+    for row in cursor.fetchall():
+        ids.add(next(iter(row.values())) if isinstance(row, dict) else row[0])
+
+    entry = {"ids": ids, "loaded_at": time.monotonic()}
+    with _lock:
+        _reference_sets[table] = entry
+    return entry
+
+
+def reference_exists(cursor, table, id_val):
+    """
+    Membership check against the cached id set for a reference table.
+    `cursor` is only used when the set has to be (re)loaded.
+    """
+    with _lock:
+        entry = _reference_sets.get(table)
+
+    now = time.monotonic()
+    if not entry or now - entry["loaded_at"] > REFERENCE_CACHE_SECONDS:
+        entry = _load(cursor, table)
+
+    if id_val in entry["ids"]:
+        return True
+
+    if now - entry["loaded_at"] > MISS_RELOAD_SECONDS:
+        entry = _load(cursor, table)
+        return id_val in entry["ids"]
+
+    return False
+
+
+def invalidate_reference(table=None):
+    with _lock:
+        if table is None:
+            _reference_sets.clear()
+        else:
+            _reference_sets.pop(table, None)
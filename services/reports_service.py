@@ -25,12 +25,39 @@ def build_filters(start_date, end_date, project_id=None, user_id=None, source_id
     if status_id:
         condition += " AND l.status_id = %s "
         params.append(status_id)
-        
+
     return condition, params
 
+EXPORT_BATCH_SIZE = 1000
+
+def _iter_rows(query, params=(), batch_size=EXPORT_BATCH_SIZE):
+    """
+    Yields dict rows from an unbuffered (server-side) cursor, batch_size at a time,
+    so large exports never hold the full result set in memory.
+    """
+    conn = get_db(readonly=True)
+    cursor = conn.cursor(dictionary=True, buffered=False)
+    try:
+        cursor.execute(query, tuple(params))
+        while True:
+            batch = cursor.fetchmany(batch_size)
+            if not batch:
+                break
+            for row in batch:
+                yield row
+    finally:
+        # Drain anything left if the consumer stopped early
+        try:
+            if conn.unread_result:
+                conn.consume_results()
+        except Exception:
+            pass
+        cursor.close()
+        conn.close()
+
 def get_weekly_leads(start_date=None, end_date=None, project_id=None, user_id=None, source_id=None, status_id=None):
     try:
-        conn = get_db()
+        conn = get_db(readonly=True)
         cursor = conn.cursor(dictionary=True)
         
         import datetime
@@ -80,7 +107,7 @@ def get_weekly_leads(start_date=None, end_date=None, project_id=None, user_id=No
 
 def get_daily_leads_hourly(project_id=None, user_id=None, source_id=None, status_id=None):
     try:
-        conn = get_db()
+        conn = get_db(readonly=True)
         cursor = conn.cursor(dictionary=True)
         
         # Today's date filter
@@ -129,7 +156,7 @@ def get_daily_leads_hourly(project_id=None, user_id=None, source_id=None, status
 
 def get_monthly_leads(start_date=None, end_date=None, project_id=None, user_id=None, source_id=None, status_id=None):
     try:
-        conn = get_db()
+        conn = get_db(readonly=True)
         cursor = conn.cursor(dictionary=True)
         
         import datetime
@@ -181,7 +208,7 @@ def get_monthly_leads(start_date=None, end_date=None, project_id=None, user_id=N
 
 def get_annual_leads(start_date=None, end_date=None, project_id=None, user_id=None, source_id=None, status_id=None):
     try:
-        conn = get_db()
+        conn = get_db(readonly=True)
         cursor = conn.cursor(dictionary=True)
         
         import datetime
@@ -243,7 +270,7 @@ def get_annual_leads(start_date=None, end_date=None, project_id=None, user_id=No
 
 def get_leads_by_status(start_date=None, end_date=None, project_id=None, user_id=None, source_id=None, status_id=None):
     try:
-        conn = get_db()
+        conn = get_db(readonly=True)
         cursor = conn.cursor(dictionary=True)
         
         date_cond, params = build_filters(start_date, end_date, project_id, user_id, source_id, status_id)
@@ -269,7 +296,7 @@ def get_leads_by_status(start_date=None, end_date=None, project_id=None, user_id
 
 def get_user_performance(start_date=None, end_date=None, project_id=None, user_id=None, source_id=None, status_id=None):
     try:
-        conn = get_db()
+        conn = get_db(readonly=True)
         cursor = conn.cursor(dictionary=True)
 
         date_cond, params = build_filters(start_date, end_date, project_id, user_id, source_id, status_id)
@@ -385,7 +412,7 @@ def get_fy_date_range():
 
 def get_reports_summary(start_date=None, end_date=None, project_id=None, user_id=None, source_id=None, status_id=None):
     try:
-        conn = get_db()
+        conn = get_db(readonly=True)
         cursor = conn.cursor(dictionary=True)
 
         # Default to Financial Year if no dates given (REMOVED)
@@ -478,93 +505,92 @@ def get_reports_summary(start_date=None, end_date=None, project_id=None, user_id
         if 'conn' in locals() and conn:
             conn.close()
 
-def get_summary_leads(summary_type, start_date=None, end_date=None, project_id=None, user_id=None, source_id=None, status_id=None):
-    try:
-        conn = get_db()
-        cursor = conn.cursor(dictionary=True)
-
-        # Default to Financial Year if no dates given (REMOVED)
-
-        # ── 'Closed' uses lead_status_history for immutable deal-closed records ──
-        if summary_type == 'Closed':
-            hist_cond = "WHERE 1=1"
-            hist_params = []
-            if start_date:
-                hist_cond += " AND DATE(h.changed_at) >= %s"
-                hist_params.append(start_date)
-            if end_date:
-                end_date_time = f"{end_date} 23:59:59" if len(end_date) == 10 else end_date
-                hist_cond += " AND h.changed_at <= %s"
-                hist_params.append(end_date_time)
-            if project_id:
-                hist_cond += " AND l.project_id = %s"
-                hist_params.append(project_id)
-            if user_id:
-                hist_cond += " AND l.emp_id = %s"
-                hist_params.append(user_id)
-            if source_id:
-                hist_cond += " AND l.source_id = %s"
-                hist_params.append(source_id)
-
-            query = f"""
-                SELECT
-                    h.lead_id,
-                    CONCAT(COALESCE(c.customer_first_name, ''), ' ', COALESCE(c.customer_last_name, '')) AS lead_name,
-                    l.lead_description,
-                    COALESCE(e.emp_first_name, 'Unassigned') AS employee_name,
-                    COALESCE(p.project_name, 'Unknown') AS project_name,
-                    'Deal Closed' AS label,
-                    MAX(h.changed_at) AS created_on,
-                    curr_s.status_name AS current_status
-                FROM lead_status_history h
-                JOIN leads l ON h.lead_id = l.lead_id
-                JOIN lead_status ns ON h.new_status_id = ns.status_id
-                LEFT JOIN lead_status curr_s ON l.status_id = curr_s.status_id
-                LEFT JOIN customer c ON l.customer_id = c.customer_id
-                LEFT JOIN employee e ON l.emp_id = e.emp_id
-                LEFT JOIN project_registration p ON l.project_id = p.project_id
-                {hist_cond}
-                AND ns.status_name = 'Deal Closed'
-                GROUP BY h.lead_id
-                ORDER BY created_on DESC
-            """
-            cursor.execute(query, tuple(hist_params))
-            result = cursor.fetchall()
-            for row in result:
-                if row.get('created_on'):
-                    row['created_on'] = str(row['created_on'])
-            return {"success": True, "data": result}
-        # ─────────────────────────────────────────────────────────────────────
-
-        date_cond, params = build_filters(start_date, end_date, project_id, user_id, source_id, status_id)
-
-        if summary_type == 'Active':
-            date_cond += " AND ls.status_name IN ('New Enquiry', 'Phone Call', 'WhatsApp', 'Offline Lead', 'NRI', 'Expected Site Visit', 'Site Visit Done', 'Office Visit Done', 'Pipeline')"
-        elif summary_type == 'Lost':
-            date_cond += " AND ls.status_name IN ('Spam','Low Budget','OOS','Old Lead')"
-        elif summary_type == 'Today' or summary_type == 'Total':
-            date_cond += " AND ls.status_name NOT IN ('Spam', 'Testing', 'Not interested')"
-            if summary_type == 'Today':
-                date_cond += " AND DATE(l.created_on) = CURDATE()"
+def _summary_leads_query(summary_type, start_date=None, end_date=None, project_id=None, user_id=None, source_id=None, status_id=None):
+    # ── 'Closed' uses lead_status_history for immutable deal-closed records ──
+    if summary_type == 'Closed':
+        hist_cond = "WHERE 1=1"
+        hist_params = []
+        if start_date:
+            hist_cond += " AND DATE(h.changed_at) >= %s"
+            hist_params.append(start_date)
+        if end_date:
+            end_date_time = f"{end_date} 23:59:59" if len(end_date) == 10 else end_date
+            hist_cond += " AND h.changed_at <= %s"
+            hist_params.append(end_date_time)
+        if project_id:
+            hist_cond += " AND l.project_id = %s"
+            hist_params.append(project_id)
+        if user_id:
+            hist_cond += " AND l.emp_id = %s"
+            hist_params.append(user_id)
+        if source_id:
+            hist_cond += " AND l.source_id = %s"
+            hist_params.append(source_id)
 
         query = f"""
             SELECT
-                l.lead_id,
-                CONCAT(COALESCE(c.customer_first_name, ''), ' ', COALESCE(c.customer_last_name, '')) as lead_name,
+                h.lead_id,
+                CONCAT(COALESCE(c.customer_first_name, ''), ' ', COALESCE(c.customer_last_name, '')) AS lead_name,
                 l.lead_description,
-                COALESCE(e.emp_first_name, 'Unassigned') as employee_name,
-                COALESCE(p.project_name, 'Unknown') as project_name,
-                ls.status_name as label,
-                ls.status_name as current_status,
-                l.created_on
-            FROM leads l
+                COALESCE(e.emp_first_name, 'Unassigned') AS employee_name,
+                COALESCE(p.project_name, 'Unknown') AS project_name,
+                'Deal Closed' AS label,
+                MAX(h.changed_at) AS created_on,
+                curr_s.status_name AS current_status
+            FROM lead_status_history h
+            JOIN leads l ON h.lead_id = l.lead_id
+            JOIN lead_status ns ON h.new_status_id = ns.status_id
+            LEFT JOIN lead_status curr_s ON l.status_id = curr_s.status_id
             LEFT JOIN customer c ON l.customer_id = c.customer_id
             LEFT JOIN employee e ON l.emp_id = e.emp_id
             LEFT JOIN project_registration p ON l.project_id = p.project_id
-            LEFT JOIN lead_status ls ON l.status_id = ls.status_id
-            WHERE 1=1 {date_cond}
-            ORDER BY l.created_on DESC
+            {hist_cond}
+            AND ns.status_name = 'Deal Closed'
+            GROUP BY h.lead_id
+            ORDER BY created_on DESC
         """
+        return query, hist_params
+    # ─────────────────────────────────────────────────────────────────────
+
+    date_cond, params = build_filters(start_date, end_date, project_id, user_id, source_id, status_id)
+
+    if summary_type == 'Active':
+        date_cond += " AND ls.status_name IN ('New Enquiry', 'Phone Call', 'WhatsApp', 'Offline Lead', 'NRI', 'Expected Site Visit', 'Site Visit Done', 'Office Visit Done', 'Pipeline')"
+    elif summary_type == 'Lost':
+        date_cond += " AND ls.status_name IN ('Spam','Low Budget','OOS','Old Lead')"
+    elif summary_type == 'Today' or summary_type == 'Total':
+        date_cond += " AND ls.status_name NOT IN ('Spam', 'Testing', 'Not interested')"
+        if summary_type == 'Today':
+            date_cond += " AND DATE(l.created_on) = CURDATE()"
+
+    query = f"""
+        SELECT
+            l.lead_id,
+            CONCAT(COALESCE(c.customer_first_name, ''), ' ', COALESCE(c.customer_last_name, '')) as lead_name,
+            l.lead_description,
+            COALESCE(e.emp_first_name, 'Unassigned') as employee_name,
+            COALESCE(p.project_name, 'Unknown') as project_name,
+            ls.status_name as label,
+            ls.status_name as current_status,
+            l.created_on
+        FROM leads l
+        LEFT JOIN customer c ON l.customer_id = c.customer_id
+        LEFT JOIN employee e ON l.emp_id = e.emp_id
+        LEFT JOIN project_registration p ON l.project_id = p.project_id
+        LEFT JOIN lead_status ls ON l.status_id = ls.status_id
+        WHERE 1=1 {date_cond}
+        ORDER BY l.created_on DESC
+    """
+    return query, params
+
+def get_summary_leads(summary_type, start_date=None, end_date=None, project_id=None, user_id=None, source_id=None, status_id=None):
+    try:
+        conn = get_db(readonly=True)
+        cursor = conn.cursor(dictionary=True)
+
+        # Default to Financial Year if no dates given (REMOVED)
+
+        query, params = _summary_leads_query(summary_type, start_date, end_date, project_id, user_id, source_id, status_id)
         cursor.execute(query, tuple(params))
         result = cursor.fetchall()
 
@@ -583,26 +609,32 @@ def get_summary_leads(summary_type, start_date=None, end_date=None, project_id=N
         if 'conn' in locals() and conn:
             conn.close()
 
+def iter_summary_leads(summary_type, start_date=None, end_date=None, project_id=None, user_id=None, source_id=None, status_id=None):
+    """Streaming variant of get_summary_leads for file exports (raw datetimes)."""
+    query, params = _summary_leads_query(summary_type, start_date, end_date, project_id, user_id, source_id, status_id)
+    return _iter_rows(query, params)
+
+ACTIVE_LEADS_DOWNLOAD_QUERY = """
+    SELECT 
+        l.lead_id, 
+        CONCAT(COALESCE(c.customer_first_name, ''), ' ', COALESCE(c.customer_last_name, '')) as lead_name,
+        l.lead_description, 
+        e.emp_first_name, 
+        p.project_name, 
+        l.created_on
+    FROM leads l
+    LEFT JOIN customer c ON l.customer_id = c.customer_id
+    LEFT JOIN employee e ON l.emp_id = e.emp_id
+    LEFT JOIN project_registration p ON l.project_id = p.project_id
+    WHERE l.is_active = 1
+"""
+
 def get_active_leads_for_download():
     # We return a tuple representing (columns, rows) where rows is an iterable/generator
     try:
-        conn = get_db()
+        conn = get_db(readonly=True)
         cursor = conn.cursor()
-        query = """
-            SELECT 
-                l.lead_id, 
-                CONCAT(COALESCE(c.customer_first_name, ''), ' ', COALESCE(c.customer_last_name, '')) as lead_name,
-                l.lead_description, 
-                e.emp_first_name, 
-                p.project_name, 
-                l.created_on
-            FROM leads l
-            LEFT JOIN customer c ON l.customer_id = c.customer_id
-            LEFT JOIN employee e ON l.emp_id = e.emp_id
-            LEFT JOIN project_registration p ON l.project_id = p.project_id
-            WHERE l.is_active = 1
-        """
-        cursor.execute(query)
+        cursor.execute(ACTIVE_LEADS_DOWNLOAD_QUERY)
         rows = cursor.fetchall()
         
         return {"success": True, "columns": ["Lead ID", "Lead Name", "Description", "Employee", "Project", "Created On"], "data": rows}
@@ -615,30 +647,38 @@ def get_active_leads_for_download():
         if 'conn' in locals() and conn:
             conn.close()
 
+def iter_active_leads_for_download():
+    """Streaming variant of get_active_leads_for_download yielding dict rows."""
+    return _iter_rows(ACTIVE_LEADS_DOWNLOAD_QUERY)
+
+def _daily_log_query(project_id=None, user_id=None, source_id=None, status_id=None):
+    # We only pass None for dates since we force today's date in query
+    date_cond, params = build_filters(None, None, project_id, user_id, source_id, status_id)
+
+    query = f"""
+        SELECT 
+            l.lead_id,
+            CONCAT(COALESCE(c.customer_first_name, ''), ' ', COALESCE(c.customer_last_name, '')) as lead_name,
+            l.created_on,
+            COALESCE(e.emp_first_name, 'Unassigned') as employee_name,
+            COALESCE(p.project_name, 'Unknown') as project_name,
+            ls.status_name as label
+        FROM leads l
+        LEFT JOIN customer c ON l.customer_id = c.customer_id
+        LEFT JOIN employee e ON l.emp_id = e.emp_id
+        LEFT JOIN project_registration p ON l.project_id = p.project_id
+        LEFT JOIN lead_status ls ON l.status_id = ls.status_id
+        WHERE DATE(l.created_on) = CURDATE() {date_cond}
+        ORDER BY l.created_on DESC
+    """
+    return query, params
+
 def get_daily_log(project_id=None, user_id=None, source_id=None, status_id=None):
     try:
-        conn = get_db()
+        conn = get_db(readonly=True)
         cursor = conn.cursor(dictionary=True)
         
-        # We only pass None for dates since we force today's date in query
-        date_cond, params = build_filters(None, None, project_id, user_id, source_id, status_id)
-        
-        query = f"""
-            SELECT 
-                l.lead_id,
-                CONCAT(COALESCE(c.customer_first_name, ''), ' ', COALESCE(c.customer_last_name, '')) as lead_name,
-                l.created_on,
-                COALESCE(e.emp_first_name, 'Unassigned') as employee_name,
-                COALESCE(p.project_name, 'Unknown') as project_name,
-                ls.status_name as label
-            FROM leads l
-            LEFT JOIN customer c ON l.customer_id = c.customer_id
-            LEFT JOIN employee e ON l.emp_id = e.emp_id
-            LEFT JOIN project_registration p ON l.project_id = p.project_id
-            LEFT JOIN lead_status ls ON l.status_id = ls.status_id
-            WHERE DATE(l.created_on) = CURDATE() {date_cond}
-            ORDER BY l.created_on DESC
-        """
+        query, params = _daily_log_query(project_id, user_id, source_id, status_id)
         cursor.execute(query, tuple(params))
         result = cursor.fetchall()
         
@@ -658,39 +698,47 @@ def get_daily_log(project_id=None, user_id=None, source_id=None, status_id=None)
         if 'conn' in locals() and conn:
             conn.close()
 
+def iter_daily_log(project_id=None, user_id=None, source_id=None, status_id=None):
+    query, params = _daily_log_query(project_id, user_id, source_id, status_id)
+    return _iter_rows(query, params)
+
+def _user_leads_export_query(emp_id, activity, start_date=None, end_date=None, project_id=None, source_id=None, status_id=None):
+    date_cond, params = build_filters(start_date, end_date, project_id, emp_id, source_id, status_id)
+    
+    if activity == 'Site Visit Done':
+        date_cond += " AND ls.status_name = 'Site Visit Done' "
+    elif activity == 'Office Visit Done':
+        date_cond += " AND ls.status_name = 'Office Visit Done' "
+    elif activity == 'Deal Closed' or activity == 'Deals Closed':
+        date_cond += " AND ls.status_name = 'Deal Closed' "
+    elif activity == 'Pipeline':
+        date_cond += " AND ls.status_name NOT IN ('Site Visit Done', 'Office Visit Done', 'Deal Closed', 'Spam', 'Low Budget', 'OOS', 'Old Lead', 'Not Answered', 'Not Interested') "
+    elif activity == 'Spam':
+        date_cond += " AND ls.status_name IN ('Spam', 'Low Budget', 'OOS', 'Old Lead', 'Not Answered', 'Not Interested') "
+        
+    query = f"""
+        SELECT 
+            l.lead_id,
+            CONCAT(COALESCE(c.customer_first_name, ''), ' ', COALESCE(c.customer_last_name, '')) as lead_name,
+            l.lead_description,
+            COALESCE(p.project_name, 'Unknown') as project_name,
+            l.created_on,
+            ls.status_name
+        FROM leads l
+        LEFT JOIN customer c ON l.customer_id = c.customer_id
+        LEFT JOIN lead_status ls ON l.status_id = ls.status_id
+        LEFT JOIN project_registration p ON l.project_id = p.project_id
+        WHERE 1=1 {date_cond}
+        ORDER BY l.created_on DESC
+    """
+    return query, params
+
 def get_user_leads_export(emp_id, activity, start_date=None, end_date=None, project_id=None, source_id=None, status_id=None):
     try:
-        conn = get_db()
+        conn = get_db(readonly=True)
         cursor = conn.cursor(dictionary=True)
         
-        date_cond, params = build_filters(start_date, end_date, project_id, emp_id, source_id, status_id)
-        
-        if activity == 'Site Visit Done':
-            date_cond += " AND ls.status_name = 'Site Visit Done' "
-        elif activity == 'Office Visit Done':
-            date_cond += " AND ls.status_name = 'Office Visit Done' "
-        elif activity == 'Deal Closed' or activity == 'Deals Closed':
-            date_cond += " AND ls.status_name = 'Deal Closed' "
-        elif activity == 'Pipeline':
-            date_cond += " AND ls.status_name NOT IN ('Site Visit Done', 'Office Visit Done', 'Deal Closed', 'Spam', 'Low Budget', 'OOS', 'Old Lead', 'Not Answered', 'Not Interested') "
-        elif activity == 'Spam':
-            date_cond += " AND ls.status_name IN ('Spam', 'Low Budget', 'OOS', 'Old Lead', 'Not Answered', 'Not Interested') "
-            
-        query = f"""
-            SELECT 
-                l.lead_id,
-                CONCAT(COALESCE(c.customer_first_name, ''), ' ', COALESCE(c.customer_last_name, '')) as lead_name,
-                l.lead_description,
-                COALESCE(p.project_name, 'Unknown') as project_name,
-                l.created_on,
-                ls.status_name
-            FROM leads l
-            LEFT JOIN customer c ON l.customer_id = c.customer_id
-            LEFT JOIN lead_status ls ON l.status_id = ls.status_id
-            LEFT JOIN project_registration p ON l.project_id = p.project_id
-            WHERE 1=1 {date_cond}
-            ORDER BY l.created_on DESC
-        """
+        query, params = _user_leads_export_query(emp_id, activity, start_date, end_date, project_id, source_id, status_id)
         cursor.execute(query, tuple(params))
         result = cursor.fetchall()
         
@@ -709,40 +757,48 @@ def get_user_leads_export(emp_id, activity, start_date=None, end_date=None, proj
         if 'conn' in locals() and conn:
             conn.close()
 
+def iter_user_leads_export(emp_id, activity, start_date=None, end_date=None, project_id=None, source_id=None, status_id=None):
+    query, params = _user_leads_export_query(emp_id, activity, start_date, end_date, project_id, source_id, status_id)
+    return _iter_rows(query, params)
+
+def _weekly_report_log_query(start_date=None, end_date=None, project_id=None, user_id=None, source_id=None, status_id=None):
+    import datetime
+    now = datetime.datetime.now().date()
+    
+    if start_date and end_date:
+        date_cond, params = build_filters(start_date, end_date, project_id, user_id, source_id, status_id)
+    else:
+        # Current Week (Monday to Sunday)
+        start = now - datetime.timedelta(days=now.weekday())
+        end = start + datetime.timedelta(days=6)
+        date_cond, params = build_filters(str(start), str(end), project_id, user_id, source_id, status_id)
+        
+    query = f"""
+        SELECT 
+            l.lead_id,
+            l.created_on,
+            CONCAT(COALESCE(c.customer_first_name, ''), ' ', COALESCE(c.customer_last_name, '')) as customer_name,
+            COALESCE(p.project_name, 'Unknown') as project_name,
+            COALESCE(src.source_name, 'Web') as source_name,
+            COALESCE(e.emp_first_name, 'Unassigned') as employee_name,
+            ls.status_name as status
+        FROM leads l
+        LEFT JOIN customer c ON l.customer_id = c.customer_id
+        LEFT JOIN project_registration p ON l.project_id = p.project_id
+        LEFT JOIN lead_sources src ON l.source_id = src.source_id
+        LEFT JOIN employee e ON l.emp_id = e.emp_id
+        LEFT JOIN lead_status ls ON l.status_id = ls.status_id
+        WHERE 1=1 {date_cond}
+        ORDER BY l.created_on DESC
+    """
+    return query, params
+
 def get_weekly_report_log(start_date=None, end_date=None, project_id=None, user_id=None, source_id=None, status_id=None):
     try:
-        conn = get_db()
+        conn = get_db(readonly=True)
         cursor = conn.cursor(dictionary=True)
         
-        import datetime
-        now = datetime.datetime.now().date()
-        
-        if start_date and end_date:
-            date_cond, params = build_filters(start_date, end_date, project_id, user_id, source_id, status_id)
-        else:
-            # Current Week (Monday to Sunday)
-            start = now - datetime.timedelta(days=now.weekday())
-            end = start + datetime.timedelta(days=6)
-            date_cond, params = build_filters(str(start), str(end), project_id, user_id, source_id, status_id)
-            
-        query = f"""
-            SELECT 
-                l.lead_id,
-                l.created_on,
-                CONCAT(COALESCE(c.customer_first_name, ''), ' ', COALESCE(c.customer_last_name, '')) as customer_name,
-                COALESCE(p.project_name, 'Unknown') as project_name,
-                COALESCE(src.source_name, 'Web') as source_name,
-                COALESCE(e.emp_first_name, 'Unassigned') as employee_name,
-                ls.status_name as status
-            FROM leads l
-            LEFT JOIN customer c ON l.customer_id = c.customer_id
-            LEFT JOIN project_registration p ON l.project_id = p.project_id
-            LEFT JOIN lead_sources src ON l.source_id = src.source_id
-            LEFT JOIN employee e ON l.emp_id = e.emp_id
-            LEFT JOIN lead_status ls ON l.status_id = ls.status_id
-            WHERE 1=1 {date_cond}
-            ORDER BY l.created_on DESC
-        """
+        query, params = _weekly_report_log_query(start_date, end_date, project_id, user_id, source_id, status_id)
         cursor.execute(query, tuple(params))
         result = cursor.fetchall()
         
@@ -761,46 +817,54 @@ def get_weekly_report_log(start_date=None, end_date=None, project_id=None, user_
         if 'conn' in locals() and conn:
             conn.close()
 
+def iter_weekly_report_log(start_date=None, end_date=None, project_id=None, user_id=None, source_id=None, status_id=None):
+    query, params = _weekly_report_log_query(start_date, end_date, project_id, user_id, source_id, status_id)
+    return _iter_rows(query, params)
+
+def _monthly_report_log_query(month=None, year=None, project_id=None, user_id=None, source_id=None, status_id=None):
+    import datetime
+    now = datetime.datetime.now().date()
+    
+    if month and year:
+        target_month = int(month)
+        target_year = int(year)
+        date_cond = f" AND MONTH(l.created_on) = {target_month} AND YEAR(l.created_on) = {target_year} "
+        params = []
+    else:
+        # Full Current Month
+        start = now.replace(day=1)
+        import calendar
+        _, last_day = calendar.monthrange(now.year, now.month)
+        end = now.replace(day=last_day)
+        date_cond, params = build_filters(str(start), str(end), project_id, user_id, source_id, status_id)
+        
+    query = f"""
+        SELECT 
+            l.lead_id,
+            l.created_on,
+            l.lead_description as lead_name,
+            CONCAT(COALESCE(c.customer_first_name, ''), ' ', COALESCE(c.customer_last_name, '')) as customer_name,
+            COALESCE(p.project_name, 'Unknown') as project_name,
+            COALESCE(src.source_name, 'Web') as source_name,
+            COALESCE(e.emp_first_name, 'Unassigned') as employee_name,
+            ls.status_name as status
+        FROM leads l
+        LEFT JOIN customer c ON l.customer_id = c.customer_id
+        LEFT JOIN project_registration p ON l.project_id = p.project_id
+        LEFT JOIN lead_sources src ON l.source_id = src.source_id
+        LEFT JOIN employee e ON l.emp_id = e.emp_id
+        LEFT JOIN lead_status ls ON l.status_id = ls.status_id
+        WHERE 1=1 {date_cond}
+        ORDER BY l.created_on DESC
+    """
+    return query, params
+
 def get_monthly_report_log(month=None, year=None, project_id=None, user_id=None, source_id=None, status_id=None):
     try:
-        conn = get_db()
+        conn = get_db(readonly=True)
         cursor = conn.cursor(dictionary=True)
         
-        import datetime
-        now = datetime.datetime.now().date()
-        
-        if month and year:
-            target_month = int(month)
-            target_year = int(year)
-            date_cond = f" AND MONTH(l.created_on) = {target_month} AND YEAR(l.created_on) = {target_year} "
-            params = []
-        else:
-            # Full Current Month
-            start = now.replace(day=1)
-            import calendar
-            _, last_day = calendar.monthrange(now.year, now.month)
-            end = now.replace(day=last_day)
-            date_cond, params = build_filters(str(start), str(end), project_id, user_id, source_id, status_id)
-            
-        query = f"""
-            SELECT 
-                l.lead_id,
-                l.created_on,
-                l.lead_description as lead_name,
-                CONCAT(COALESCE(c.customer_first_name, ''), ' ', COALESCE(c.customer_last_name, '')) as customer_name,
-                COALESCE(p.project_name, 'Unknown') as project_name,
-                COALESCE(src.source_name, 'Web') as source_name,
-                COALESCE(e.emp_first_name, 'Unassigned') as employee_name,
-                ls.status_name as status
-            FROM leads l
-            LEFT JOIN customer c ON l.customer_id = c.customer_id
-            LEFT JOIN project_registration p ON l.project_id = p.project_id
-            LEFT JOIN lead_sources src ON l.source_id = src.source_id
-            LEFT JOIN employee e ON l.emp_id = e.emp_id
-            LEFT JOIN lead_status ls ON l.status_id = ls.status_id
-            WHERE 1=1 {date_cond}
-            ORDER BY l.created_on DESC
-        """
+        query, params = _monthly_report_log_query(month, year, project_id, user_id, source_id, status_id)
         cursor.execute(query, tuple(params))
         result = cursor.fetchall()
         
@@ -817,9 +881,13 @@ def get_monthly_report_log(month=None, year=None, project_id=None, user_id=None,
         if 'cursor' in locals() and cursor: cursor.close()
         if 'conn' in locals() and conn: conn.close()
 
+def iter_monthly_report_log(month=None, year=None, project_id=None, user_id=None, source_id=None, status_id=None):
+    query, params = _monthly_report_log_query(month, year, project_id, user_id, source_id, status_id)
+    return _iter_rows(query, params)
+
 def get_monthly_performance_report(target_month=None, target_year=None, project_id=None):
     try:
-        conn = get_db()
+        conn = get_db(readonly=True)
         cursor = conn.cursor(dictionary=True)
         
         # Build base filters
@@ -1032,7 +1100,7 @@ def get_monthly_performance_report(target_month=None, target_year=None, project_
 def get_weekly_performance_report(project_id=None):
     """Fetches performance stats for the last 7 days (current) vs previous 7 days (previous)."""
     try:
-        conn = get_db()
+        conn = get_db(readonly=True)
         cursor = conn.cursor(dictionary=True)
         
         base_cond = " AND l.is_active = 1 "
@@ -1171,7 +1239,7 @@ def get_weekly_performance_report(project_id=None):
 def get_annual_performance_report(year, project_id=None):
     """Fetches performance stats for a given year vs previous year."""
     try:
-        conn = get_db()
+        conn = get_db(readonly=True)
         cursor = conn.cursor(dictionary=True)
         
         base_cond = " AND l.is_active = 1 "
@@ -1296,7 +1364,7 @@ def get_annual_performance_report(year, project_id=None):
 def get_daily_site_visits():
     """Returns today's 'Site Visit Done' events grouped by employee, queried from lead_status_history."""
     try:
-        conn = get_db()
+        conn = get_db(readonly=True)
         cursor = conn.cursor(dictionary=True)
         cursor.execute("""
             SELECT
@@ -1333,7 +1401,7 @@ def get_daily_site_visits():
 def get_daily_calls_and_fresh_leads():
     """Returns today's call attempts and fresh leads for the EOD report."""
     try:
-        conn = get_db()
+        conn = get_db(readonly=True)
         cursor = conn.cursor(dictionary=True)
 
         # Calls attempted today by employee
@@ -1393,7 +1461,7 @@ def get_daily_calls_and_fresh_leads():
 def get_weekly_performance_report(project_id=None):
     """Returns user performance comparison for the current 7 days vs the previous 7 days."""
     try:
-        conn = get_db()
+        conn = get_db(readonly=True)
         cursor = conn.cursor(dictionary=True)
         
         base_cond = ""
@@ -1534,7 +1602,7 @@ def get_weekly_performance_report(project_id=None):
 def get_annual_performance_report(target_year=None, project_id=None):
     """Returns user performance comparison for the target year vs the previous year."""
     try:
-        conn = get_db()
+        conn = get_db(readonly=True)
         cursor = conn.cursor(dictionary=True)
         
         base_cond = ""
@@ -1669,6 +1737,47 @@ def get_annual_performance_report(target_year=None, project_id=None):
         if 'conn' in locals() and conn: conn.close()
 
 
+def _immutable_history_query(status_name, start_date=None, end_date=None, project_id=None, user_id=None):
+    cond = "WHERE ns.status_name = %s"
+    params = [status_name]
+
+    if start_date:
+        cond += " AND DATE(h.changed_at) >= %s"
+        params.append(start_date)
+    if end_date:
+        end_date_time = f"{end_date} 23:59:59" if len(end_date) == 10 else end_date
+        cond += " AND h.changed_at <= %s"
+        params.append(end_date_time)
+    if project_id:
+        cond += " AND l.project_id = %s"
+        params.append(project_id)
+    if user_id:
+        cond += " AND l.emp_id = %s"
+        params.append(user_id)
+
+    query = f"""
+        SELECT
+            h.history_id,
+            h.lead_id,
+            TRIM(CONCAT(COALESCE(c.customer_first_name,''), ' ', COALESCE(c.customer_last_name,''))) AS lead_name,
+            COALESCE(e.emp_first_name, 'Unassigned') AS employee_name,
+            COALESCE(p.project_name, 'Unknown') AS project_name,
+            h.changed_at,
+            curr_s.status_name AS current_status,
+            h.remarks
+        FROM lead_status_history h
+        JOIN leads l ON h.lead_id = l.lead_id
+        JOIN lead_status ns ON h.new_status_id = ns.status_id
+        LEFT JOIN lead_status curr_s ON l.status_id = curr_s.status_id
+        LEFT JOIN customer c ON l.customer_id = c.customer_id
+        LEFT JOIN employee e ON l.emp_id = e.emp_id
+        LEFT JOIN project_registration p ON l.project_id = p.project_id
+        {cond}
+        ORDER BY h.changed_at DESC
+    """
+    return query, params
+
+
 def get_immutable_history_report(status_name, start_date=None, end_date=None, project_id=None, user_id=None):
     """
     Returns every lead that ever reached `status_name` ('Site Visit Done' or 'Deal Closed'),
@@ -1676,46 +1785,11 @@ def get_immutable_history_report(status_name, start_date=None, end_date=None, pr
     how the lead progressed after the milestone.
     """
     try:
-        conn = get_db()
+        conn = get_db(readonly=True)
         cursor = conn.cursor(dictionary=True)
 
-        cond = "WHERE ns.status_name = %s"
-        params = [status_name]
-
-        if start_date:
-            cond += " AND DATE(h.changed_at) >= %s"
-            params.append(start_date)
-        if end_date:
-            end_date_time = f"{end_date} 23:59:59" if len(end_date) == 10 else end_date
-            cond += " AND h.changed_at <= %s"
-            params.append(end_date_time)
-        if project_id:
-            cond += " AND l.project_id = %s"
-            params.append(project_id)
-        if user_id:
-            cond += " AND l.emp_id = %s"
-            params.append(user_id)
-
-        cursor.execute(f"""
-            SELECT
-                h.history_id,
-                h.lead_id,
-                TRIM(CONCAT(COALESCE(c.customer_first_name,''), ' ', COALESCE(c.customer_last_name,''))) AS lead_name,
-                COALESCE(e.emp_first_name, 'Unassigned') AS employee_name,
-                COALESCE(p.project_name, 'Unknown') AS project_name,
-                h.changed_at,
-                curr_s.status_name AS current_status,
-                h.remarks
-            FROM lead_status_history h
-            JOIN leads l ON h.lead_id = l.lead_id
-            JOIN lead_status ns ON h.new_status_id = ns.status_id
-            LEFT JOIN lead_status curr_s ON l.status_id = curr_s.status_id
-            LEFT JOIN customer c ON l.customer_id = c.customer_id
-            LEFT JOIN employee e ON l.emp_id = e.emp_id
-            LEFT JOIN project_registration p ON l.project_id = p.project_id
-            {cond}
-            ORDER BY h.changed_at DESC
-        """, tuple(params))
+        query, params = _immutable_history_query(status_name, start_date, end_date, project_id, user_id)
+        cursor.execute(query, tuple(params))
 
         rows = cursor.fetchall()
         for row in rows:
@@ -1731,3 +1805,9 @@ def get_immutable_history_report(status_name, start_date=None, end_date=None, pr
             cursor.close()
         if 'conn' in locals() and conn:
             conn.close()
+
+
+def iter_immutable_history_report(status_name, start_date=None, end_date=None, project_id=None, user_id=None):
+    """Streaming variant of get_immutable_history_report for file exports."""
+    query, params = _immutable_history_query(status_name, start_date, end_date, project_id, user_id)
+    return _iter_rows(query, params)
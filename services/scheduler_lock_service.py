@@ -0,0 +1,133 @@
+"""
+Scheduler leader election.
+
+Every process that starts the scheduler competes for a MySQL advisory lock
+(GET_LOCK) held on a dedicated connection. Only the holder runs jobs. The
+lock dies with its connection, so if the leader process exits or loses the
+database, another process picks it up on its next poll.
+"""
+import os
+import socket
+import logging
+import threading
+
+import mysql.connector
+
+from db import DB_CONFIG
+
+logger = logging.getLogger(__name__)
+
+LEADER_ELECTION_ENABLED = os.getenv("SCHEDULER_LEADER_ELECTION", "true").lower() == "true"
+LOCK_NAME = os.getenv("SCHEDULER_LOCK_NAME", "presales_scheduler_leader")
+POLL_SECONDS = int(os.getenv("SCHEDULER_LEADER_POLL_SECONDS", "15"))
+
+INSTANCE_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+_lock_conn = None
+_is_leader = False
+_state_lock = threading.Lock()
+_stop = threading.Event()
+_thread = None
+
+
+def is_leader():
+    if not LEADER_ELECTION_ENABLED:
+        return True
+    return _is_leader
+
+
+def _close_lock_conn():
+    global _lock_conn
+    if _lock_conn is not None:
+        try:
+            _lock_conn.close()
+        except Exception:
+            pass
+    _lock_conn = None
+
+
+def _try_acquire():
+    """Returns True when this process now holds the lock."""
+    global _lock_conn
+
+    # Not from the pool: the connection is held for as long as we lead
+    conn = mysql.connector.connect(**DB_CONFIG)
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT GET_LOCK(%s, 0)", (LOCK_NAME,))
+        acquired = cursor.fetchone()[0] == 1
+    finally:
+        cursor.close()
+
+    if acquired:
+        _lock_conn = conn
+    else:
+        conn.close()
+    return acquired
+
+
+def _still_holding():
+    cursor = _lock_conn.cursor()
+    try:
+        cursor.execute("SELECT IS_USED_LOCK(%s) = CONNECTION_ID()", (LOCK_NAME,))
+        row = cursor.fetchone()
+        return bool(row and row[0])
+    finally:
+        cursor.close()
+
+
+def _poll_once():
+    global _is_leader
+
+    with _state_lock:
+        try:
+            if _is_leader:
+                if not _still_holding():
+                    raise RuntimeError("advisory lock no longer held")
+            elif _try_acquire():
+                _is_leader = True
+                logger.info(f"Scheduler leadership acquired by {INSTANCE_ID}")
+                print(f"Scheduler leader: {INSTANCE_ID}")
+
+        except Exception as e:
+            if _is_leader:
+                logger.warning(f"Scheduler leadership lost by {INSTANCE_ID}: {e}")
+                print(f"Scheduler leadership lost by {INSTANCE_ID}: {e}")
+            _is_leader = False
+            _close_lock_conn()
+
+
+def _loop():
+    while not _stop.is_set():
+        _poll_once()
+        _stop.wait(POLL_SECONDS)
+
+
+def start_leader_election():
+    """Start competing for leadership in the background (idempotent)."""
+    global _thread
+    if not LEADER_ELECTION_ENABLED or (_thread and _thread.is_alive()):
+        return
+
+    _stop.clear()
+    _poll_once()
+    _thread = threading.Thread(target=_loop, name="scheduler-leader", daemon=True)
+    _thread.start()
+
+
+def stop_leader_election():
+    """Give up leadership so another process can take over immediately."""
+    global _is_leader
+    _stop.set()
+
+    with _state_lock:
+        if _lock_conn is not None:
+            try:
+                cursor = _lock_conn.cursor()
+                cursor.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+                cursor.fetchone()
+                cursor.close()
+            except Exception:
+                pass
+        _is_leader = False
+        _close_lock_conn()
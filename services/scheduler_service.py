@@ -11,7 +11,14 @@ from services.reports_service import (
 from services.email_service import send_html_email
 from services.report_email_service import get_recipients_for_report
 from services.notification_service import create_notification
+from services.idempotency_service import purge_expired_keys
+from services.rate_limit_service import RATE_LIMIT_STORE, purge_idle_buckets
+from services.lead_event_bus import recover_pending_events, purge_delivered_events
+from services.scheduler_lock_service import INSTANCE_ID, is_leader, start_leader_election
+from utils.request_profiler import profile_block
 from datetime import datetime, timedelta
+from functools import wraps
+import time
 import traceback
 
 scheduler = APScheduler()
@@ -535,59 +542,223 @@ def send_site_visit_reminders_one_day_before():
 def send_site_visit_reminders_visit_day():
     send_site_visit_reminders("VISIT_DAY_MORNING")
 
+def purge_idempotency_keys():
+    try:
+        removed = purge_expired_keys()
+        print(f"Purged {removed} expired idempotency keys")
+    except Exception:
+        print(f"Error purging idempotency keys: {traceback.format_exc()}")
+
+
+def purge_rate_limit_buckets():
+    try:
+        removed = purge_idle_buckets()
+        print(f"Purged {removed} idle rate limit buckets")
+    except Exception:
+        print(f"Error purging rate limit buckets: {traceback.format_exc()}")
+
+
+def redeliver_lead_events():
+    try:
+        redelivered = recover_pending_events()
+        if redelivered:
+            print(f"Redelivered {redelivered} pending lead events")
+    except Exception:
+        print(f"Error redelivering lead events: {traceback.format_exc()}")
+
+
+def purge_lead_events():
+    try:
+        removed = purge_delivered_events()
+        print(f"Purged {removed} delivered lead events")
+    except Exception:
+        print(f"Error purging lead events: {traceback.format_exc()}")
+
+
+# -------------------------
+# Leader-only execution + run history
+# -------------------------
+_job_runs_table_ready = False
+
+
+def _ensure_job_runs_table(cursor):
+    global _job_runs_table_ready
+    if _job_runs_table_ready:
+        return
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS scheduler_job_runs (
+            run_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            job_id VARCHAR(100) NOT NULL,
+            instance_id VARCHAR(150) NOT NULL,
+            started_at DATETIME NOT NULL,
+            finished_at DATETIME NULL,
+            duration_ms INT NULL,
+            status VARCHAR(20) NOT NULL DEFAULT 'running',
+            error TEXT NULL,
+            KEY idx_scheduler_job_runs_job (job_id, started_at)
+        )
+    """)
+    _job_runs_table_ready = True
+
+
+def _record_job_start(job_id, started_at):
+    conn = get_db()
+    cursor = conn.cursor()
+    try:
+        _ensure_job_runs_table(cursor)
+        cursor.execute("""
+            INSERT INTO scheduler_job_runs (job_id, instance_id, started_at)
+            VALUES (%s, %s, %s)
+        """, (job_id, INSTANCE_ID, started_at))
+        conn.commit()
+        return cursor.lastrowid
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def _record_job_end(run_id, duration_ms, status, error=None):
+    conn = get_db()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            UPDATE scheduler_job_runs
+            SET finished_at = NOW(), duration_ms = %s, status = %s, error = %s
+            WHERE run_id = %s
+        """, (duration_ms, status, error, run_id))
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def _leader_job(job_id, func, record_runs=True):
+    """
+    Run func only on the elected scheduler leader and record the run.
+    High-frequency housekeeping jobs pass record_runs=False.
+    """
+    @wraps(func)
+    def run():
+        if not is_leader():
+            return
+
+        run_id = None
+        if record_runs:
+            try:
+                run_id = _record_job_start(job_id, datetime.now())
+            except Exception:
+                print(f"Could not record start of job {job_id}: {traceback.format_exc()}")
+
+        started = time.perf_counter()
+        status, error = "success", None
+        try:
+            with profile_block(f"job {job_id}"):
+                func()
+        except Exception:
+            status, error = "failed", traceback.format_exc()
+            print(f"Scheduled job {job_id} failed: {error}")
+        finally:
+            duration_ms = int((time.perf_counter() - started) * 1000)
+            if run_id:
+                try:
+                    _record_job_end(run_id, duration_ms, status, error)
+                except Exception:
+                    print(f"Could not record end of job {job_id}: {traceback.format_exc()}")
+
+    return run
+
+
+def get_job_runs(job_id=None, limit=100):
+    conn = get_db()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        _ensure_job_runs_table(cursor)
+        query = """
+            SELECT run_id, job_id, instance_id, started_at, finished_at, duration_ms, status, error
+            FROM scheduler_job_runs
+        """
+        params = []
+        if job_id:
+            query += " WHERE job_id = %s"
+            params.append(job_id)
+        query += " ORDER BY started_at DESC, run_id DESC LIMIT %s"
+        params.append(limit)
+
+        cursor.execute(query, tuple(params))
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+
+
 def init_scheduler(app):
+    """
+    Register the jobs and start APScheduler. Every process that calls this
+    competes for leadership; only the leader actually runs jobs.
+    """
+    start_leader_election()
     scheduler.init_app(app)
     
     # Daily: Site Visit Report at 7:30 PM
-    scheduler.add_job(id='daily_site_visit_report', func=send_daily_site_visit_report, trigger='cron', hour=19, minute=30)
+    scheduler.add_job(id='daily_site_visit_report', func=_leader_job('daily_site_visit_report', send_daily_site_visit_report), trigger='cron', hour=19, minute=30)
 
     # Daily: EOD Calls + Fresh Leads at 11:59 PM
-    scheduler.add_job(id='daily_eod_report', func=send_daily_eod_report, trigger='cron', hour=23, minute=59)
+    scheduler.add_job(id='daily_eod_report', func=_leader_job('daily_eod_report', send_daily_eod_report), trigger='cron', hour=23, minute=59)
 
     # Weekly: Every Sunday at 19:00 (7:00 PM)
-    scheduler.add_job(id='weekly_report', func=send_weekly_report, trigger='cron', day_of_week='sun', hour=19, minute=0)
+    scheduler.add_job(id='weekly_report', func=_leader_job('weekly_report', send_weekly_report), trigger='cron', day_of_week='sun', hour=19, minute=0)
     
     # Monthly: Last day of the month at 23:59
     try:
-        scheduler.add_job(id='monthly_report', func=send_monthly_report, trigger='cron', day='last', hour=23, minute=59)
+        scheduler.add_job(id='monthly_report', func=_leader_job('monthly_report', send_monthly_report), trigger='cron', day='last', hour=23, minute=59)
     except:
-        scheduler.add_job(id='monthly_report', func=send_monthly_report, trigger='cron', day=1, hour=0, minute=5)
+        scheduler.add_job(id='monthly_report', func=_leader_job('monthly_report', send_monthly_report), trigger='cron', day=1, hour=0, minute=5)
     
     # Quarterly: Last day of Mar, Jun, Sep, Dec at 23:59
     try:
-        scheduler.add_job(id='quarterly_report', func=send_quarterly_report, trigger='cron', month='3,6,9,12', day='last', hour=23, minute=59)
+        scheduler.add_job(id='quarterly_report', func=_leader_job('quarterly_report', send_quarterly_report), trigger='cron', month='3,6,9,12', day='last', hour=23, minute=59)
     except:
         # Fallback to 1st of Jan, Apr, Jul, Oct
-        scheduler.add_job(id='quarterly_report', func=send_quarterly_report, trigger='cron', month='1,4,7,10', day=1, hour=0, minute=10)
+        scheduler.add_job(id='quarterly_report', func=_leader_job('quarterly_report', send_quarterly_report), trigger='cron', month='1,4,7,10', day=1, hour=0, minute=10)
 
     # Annual: March 31st at 23:59 (Financial Year End)
     try:
-        scheduler.add_job(id='annual_report', func=send_annual_report, trigger='cron', month=3, day='last', hour=23, minute=59)
+        scheduler.add_job(id='annual_report', func=_leader_job('annual_report', send_annual_report), trigger='cron', month=3, day='last', hour=23, minute=59)
     except:
         # Fallback to Apr 1st
-        scheduler.add_job(id='annual_report', func=send_annual_report, trigger='cron', month=4, day=1, hour=0, minute=15)
+        scheduler.add_job(id='annual_report', func=_leader_job('annual_report', send_annual_report), trigger='cron', month=4, day=1, hour=0, minute=15)
 
     scheduler.add_job(
         id='site_visit_reminder_two_days_before',
-        func=send_site_visit_reminders_two_days_before,
+        func=_leader_job('site_visit_reminder_two_days_before', send_site_visit_reminders_two_days_before),
         trigger='cron',
         hour=19,
         minute=30
     )
     scheduler.add_job(
         id='site_visit_reminder_one_day_before',
-        func=send_site_visit_reminders_one_day_before,
+        func=_leader_job('site_visit_reminder_one_day_before', send_site_visit_reminders_one_day_before),
         trigger='cron',
         hour=19,
         minute=30
     )
     scheduler.add_job(
         id='site_visit_reminder_visit_day',
-        func=send_site_visit_reminders_visit_day,
+        func=_leader_job('site_visit_reminder_visit_day', send_site_visit_reminders_visit_day),
         trigger='cron',
         hour=9,
         minute=30
     )
+
+    # Daily: drop expired webhook idempotency keys at 3:00 AM
+    scheduler.add_job(id='purge_idempotency_keys', func=_leader_job('purge_idempotency_keys', purge_idempotency_keys), trigger='cron', hour=3, minute=0)
+    if RATE_LIMIT_STORE == "db":
+        scheduler.add_job(id='purge_rate_limit_buckets', func=_leader_job('purge_rate_limit_buckets', purge_rate_limit_buckets), trigger='cron', minute=45)
+
+    # Lead event outbox: redeliver stragglers every minute, prune delivered rows nightly
+    scheduler.add_job(id='redeliver_lead_events', func=_leader_job('redeliver_lead_events', redeliver_lead_events, record_runs=False), trigger='interval', minutes=1, max_instances=1, coalesce=True)
+    scheduler.add_job(id='purge_lead_events', func=_leader_job('purge_lead_events', purge_lead_events), trigger='cron', hour=3, minute=15)
         
     scheduler.start()
 
@@ -0,0 +1,84 @@
+"""
+Schema migrations.
+
+Every ALTER TABLE / CREATE INDEX the services depend on lives in one of the
+ensure_*_schema() functions listed in MIGRATIONS, never on a request path.
+They are idempotent (each checks information_schema or SHOW INDEX first) and
+run:
+
+- at web startup, from create_app() (init_services=True), and
+- as a deploy step, ahead of the rollout:
+
+    python -m services.schema_service
+
+A MySQL advisory lock makes concurrent workers run them one at a time, so a
+table rebuild happens once rather than once per worker.
+"""
+import logging
+from importlib import import_module
+
+from db import get_db
+
+logger = logging.getLogger(__name__)
+
+LOCK_NAME = "presales_schema_migrations"
+LOCK_TIMEOUT_SECONDS = 600
+
+# (module, function), in the order they must run
+MIGRATIONS = [
+    ("db", "ensure_replica_session_schema"),
+    ("services.user_service", "ensure_user_schema"),
+    ("services.call_logs_service", "ensure_call_log_schema"),
+    ("services.mcube_ingest_service", "ensure_mcube_ingest_schema"),
+    ("services.idempotency_service", "ensure_idempotency_schema"),
+    ("services.leads_service", "ensure_lead_index_schema"),
+    ("services.leads_service", "ensure_lead_foreign_key_schema"),
+    ("services.leads_service", "ensure_lead_phone_schema"),
+    ("services.leads_service", "ensure_customer_search_schema"),
+    ("services.lead_assignment_service", "ensure_assignment_schema"),
+    ("services.lead_event_bus", "ensure_lead_event_schema"),
+]
+
+
+def run_schema_migrations():
+    """Run every migration; returns the names of the ones that failed."""
+    conn = get_db()
+    cursor = conn.cursor()
+    failed = []
+
+    try:
+        cursor.execute("SELECT GET_LOCK(%s, %s)", (LOCK_NAME, LOCK_TIMEOUT_SECONDS))
+        if cursor.fetchone()[0] != 1:
+            raise RuntimeError("Timed out waiting for another process to finish schema migrations")
+
+        try:
+            for module_name, function_name in MIGRATIONS:
+                try:
+                    getattr(import_module(module_name), function_name)()
+                except Exception as e:
+                    logger.error(f"Schema migration {module_name}.{function_name} failed: {e}")
+                    failed.append(f"{module_name}.{function_name}")
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+            cursor.fetchone()
+
+        return failed
+
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    import sys
+
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+
+    failures = run_schema_migrations()
+    if failures:
+        print(f"Failed: {', '.join(failures)}")
+        sys.exit(1)
+    print("Schema up to date")
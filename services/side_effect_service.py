@@ -0,0 +1,67 @@
+import os
+import queue
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+SIDE_EFFECT_WORKERS = int(os.getenv("SIDE_EFFECT_WORKERS", "4"))
+SIDE_EFFECT_QUEUE_SIZE = int(os.getenv("SIDE_EFFECT_QUEUE_SIZE", "1000"))
+
+_queue = queue.Queue(maxsize=SIDE_EFFECT_QUEUE_SIZE)
+_workers = []
+_start_lock = threading.Lock()
+
+
+def _run(func, args, kwargs):
+    try:
+        func(*args, **kwargs)
+    except Exception as e:
+        logger.error(f"Side effect {getattr(func, '__name__', func)} failed: {e}")
+
+
+def _worker_loop():
+    while True:
+        func, args, kwargs = _queue.get()
+        try:
+            _run(func, args, kwargs)
+        finally:
+            _queue.task_done()
+
+
+def _ensure_workers():
+    if _workers:
+        return
+    with _start_lock:
+        if _workers:
+            return
+        for index in range(SIDE_EFFECT_WORKERS):
+            worker = threading.Thread(target=_worker_loop, name=f"side-effects-{index}", daemon=True)
+            worker.start()
+            _workers.append(worker)
+
+
+def run_after_commit(func, *args, **kwargs):
+    """
+    Hand a post-commit side effect (notifications, emails) to the worker
+    pool. Call only after the transaction that justifies it has committed.
+    When the queue is full the work runs inline, which applies
+    backpressure instead of dropping it.
+    """
+    _ensure_workers()
+    try:
+        _queue.put_nowait((func, args, kwargs))
+    except queue.Full:
+        logger.warning("Side effect queue full; running inline")
+        _run(func, args, kwargs)
+
+
+def drain(timeout=None):
+    """Block until queued side effects have run (used on shutdown)."""
+    if timeout is None:
+        _queue.join()
+        return True
+
+    done = threading.Event()
+    threading.Thread(target=lambda: (_queue.join(), done.set()), daemon=True).start()
+    return done.wait(timeout)
@@ -1,10 +1,15 @@
+import os
+import time
+import threading
 from db import get_db
 from datetime import datetime
 import mysql.connector
 from werkzeug.security import generate_password_hash
 import secrets
-from services.audit_service import log_audit
+from services.audit_service import log_audit, log_audit_batch
 from services.email_service import send_temp_password_email
+from services.lead_assignment_service import invalidate_roster
+from services.reference_data_service import invalidate_reference
 
 
 # -------------------------
@@ -43,6 +48,99 @@ def _ensure_resigned_status_supported(cursor):
     """)
 
 
+# Indexes behind the user directory filters and its created_on ordering
+EMPLOYEE_INDEXES = {
+    "idx_employee_role_status": "role_id, emp_status, created_on",
+    "idx_employee_status_created": "emp_status, created_on",
+    "idx_employee_created": "created_on",
+}
+
+_user_schema_ready = False
+
+
+def ensure_user_schema():
+    """
+    Schema changes the user module depends on (Resigned status, directory
+    indexes). Run once at startup so no ALTER happens on a request.
+    """
+    global _user_schema_ready
+    if _user_schema_ready:
+        return
+
+    conn = get_db()
+    cursor = conn.cursor()
+
+    try:
+        _ensure_resigned_status_supported(cursor)
+
+        for index_name, columns in EMPLOYEE_INDEXES.items():
+            cursor.execute("SHOW INDEX FROM employee WHERE Key_name = %s", (index_name,))
+            if not cursor.fetchall():
+                cursor.execute(f"CREATE INDEX {index_name} ON employee ({columns})")
+
+        _user_schema_ready = True
+
+    finally:
+        cursor.close()
+        conn.close()
+
+
+# -------------------------
+# ROLE / STATUS COUNTS (cached)
+# -------------------------
+USER_COUNTS_CACHE_SECONDS = int(os.getenv("USER_COUNTS_CACHE_SECONDS", "60"))
+
+_user_counts = None
+_user_counts_lock = threading.Lock()
+
+
+def invalidate_user_counts():
+    global _user_counts
+    with _user_counts_lock:
+        _user_counts = None
+
+
+def get_user_counts():
+    """
+    Employee counts per role and status for the admin dashboard, e.g.
+    {"SALES_EXEC": {"Active": 12, "Inactive": 1, "total": 13}, ...}.
+    Cached per process; user writes in this module invalidate it.
+    """
+    global _user_counts
+    with _user_counts_lock:
+        cached = _user_counts
+    if cached and cached["expires_at"] > time.monotonic():
+        return cached["counts"]
+
+    conn = get_db()
+    cursor = conn.cursor(dictionary=True)
+
+    try:
+        cursor.execute("""
+            SELECT role_id, emp_status, COUNT(*) AS user_count
+            FROM employee
+            GROUP BY role_id, emp_status
+        """)
+        counts = {}
+        for row in cursor.fetchall():
+            role_counts = counts.setdefault(row["role_id"] or "UNKNOWN", {"total": 0})
+            role_counts[row["emp_status"] or "Unknown"] = row["user_count"]
+            role_counts["total"] += row["user_count"]
+    finally:
+        cursor.close()
+        conn.close()
+
+    with _user_counts_lock:
+        _user_counts = {"counts": counts, "expires_at": time.monotonic() + USER_COUNTS_CACHE_SECONDS}
+    return counts
+
+
+def _user_changed():
+    # Role, status and name all feed the project assignment rosters and counts
+    invalidate_roster()
+    invalidate_user_counts()
+
+
 # -------------------------
 # GENERATE NEXT EMPLOYEE ID (RACE-CONDITION SAFE)
 # -------------------------
@@ -131,6 +229,8 @@ def register_user(data, created_by='ADMIN'):
 
         cursor.execute(query, values)
         conn.commit()
+        invalidate_reference("employee")
+        invalidate_user_counts()
 
         # Send temporary password email
         try:
@@ -185,36 +285,90 @@ def register_user(data, created_by='ADMIN'):
 # -------------------------
 # GET ALL USERS
 # -------------------------
+USER_COLUMNS = """
+    emp_id,
+    emp_first_name,
+    emp_middle_name,
+    emp_last_name,
+    role_id,
+    emp_status,
+    phone_num,
+    created_by,
+    created_on,
+    modified_by,
+    modified_on,
+    username,
+    email
+"""
+
+DEFAULT_USER_PAGE_SIZE = 25
+MAX_USER_PAGE_SIZE = 100
+
+
 def get_all_users():
+    return search_users()["data"]
+
+
+def search_users(search=None, role_id=None, emp_status=None, page=None, page_size=None):
+    """
+    User directory query. search is a prefix match on name, username,
+    email, emp_id or phone. Without page every matching row is returned.
+    Returns {"data", "total", "page", "page_size"}.
+    """
+    conditions = []
+    params = []
+
+    if role_id:
+        conditions.append("role_id = %s")
+        params.append(role_id)
+
+    if emp_status:
+        conditions.append("emp_status = %s")
+        params.append(emp_status)
+
+    search = (search or "").strip()
+    if search:
+        like = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        conditions.append("""(
+            emp_first_name LIKE %s
+            OR emp_last_name LIKE %s
+            OR CONCAT(emp_first_name, ' ', IFNULL(emp_last_name, '')) LIKE %s
+            OR username LIKE %s
+            OR email LIKE %s
+            OR emp_id LIKE %s
+            OR phone_num LIKE %s
+        )""")
+        params.extend([like] * 7)
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
     conn = None
     cursor = None
 
     try:
-        conn = get_db()
+        conn = get_db(readonly=True)
         cursor = conn.cursor(dictionary=True)
 
-        query = """
-            SELECT
-                emp_id,
-                emp_first_name,
-                emp_middle_name,
-                emp_last_name,
-                role_id,
-                emp_status,
-                phone_num,
-                created_by,
-                created_on,
-                modified_by,
-                modified_on,
-                username,
-                email
+        query = f"""
+            SELECT {USER_COLUMNS}
             FROM employee
-            ORDER BY created_on DESC
+            {where}
+            ORDER BY created_on DESC, emp_id DESC
         """
 
-        cursor.execute(query)
-        users = cursor.fetchall()
-        return users
+        if page is None:
+            cursor.execute(query, tuple(params))
+            users = cursor.fetchall()
+            return {"data": users, "total": len(users), "page": None, "page_size": None}
+
+        page = max(int(page), 1)
+        page_size = min(max(int(page_size or DEFAULT_USER_PAGE_SIZE), 1), MAX_USER_PAGE_SIZE)
+
+        cursor.execute(f"SELECT COUNT(*) AS total FROM employee {where}", tuple(params))
+        total = cursor.fetchone()["total"]
+
+        cursor.execute(query + " LIMIT %s OFFSET %s", (*params, page_size, (page - 1) * page_size))
+        return {"data": cursor.fetchall(), "total": total, "page": page, "page_size": page_size}
 
     except Exception as e:
         raise Exception(f"Failed to fetch users: {str(e)}")
@@ -284,16 +438,18 @@ def update_user(emp_id, data, modified_by='ADMIN'):
         cursor = conn.cursor(dictionary=True)
 
         # Fetch old values for audit trail
-        cursor.execute("SELECT * FROM employee WHERE emp_id = %s", (emp_id,))
+        cursor.execute("""
+            SELECT emp_first_name, emp_middle_name, emp_last_name,
+                   role_id, emp_status, phone_num, email
+            FROM employee
+            WHERE emp_id = %s
+            FOR UPDATE
+        """, (emp_id,))
         old_record = cursor.fetchone()
 
         if not old_record:
             raise Exception(f"User {emp_id} not found")
 
-        # Switch to plain cursor for UPDATE
-        cursor.close()
-        cursor = conn.cursor()
-
         query = """
             UPDATE employee
             SET
@@ -323,12 +479,11 @@ def update_user(emp_id, data, modified_by='ADMIN'):
         )
 
         cursor.execute(query, values)
-        conn.commit()
-
         updated = cursor.rowcount > 0
 
         if updated:
-            # Log each changed field for a meaningful audit trail
+            # Log each changed field for a meaningful audit trail, in the
+            # same transaction as the update
             tracked_fields = {
                 'emp_first_name': 'First Name',
                 'emp_last_name': 'Last Name',
@@ -339,23 +494,28 @@ def update_user(emp_id, data, modified_by='ADMIN'):
                 'email': 'Email'
             }
 
-            for db_field, display_name in tracked_fields.items():
+            audit_entries = []
+            for db_field in tracked_fields:
                 old_val = old_record.get(db_field)
                 new_val = data.get(db_field)
 
                 if str(old_val or '') != str(new_val or ''):
-                    try:
-                        log_audit(
-                            object_name="employee",
-                            object_id=emp_id,
-                            property_name=db_field,
-                            old_value=str(old_val) if old_val else None,
-                            new_value=str(new_val) if new_val else None,
-                            modified_by=modified_by,
-                            action_type="UPDATE"
-                        )
-                    except Exception as e:
-                        print(f"Audit log failed for {db_field}: {e}")
+                    audit_entries.append((
+                        "employee",
+                        emp_id,
+                        db_field,
+                        str(old_val) if old_val else None,
+                        str(new_val) if new_val else None,
+                        modified_by,
+                        "UPDATE"
+                    ))
+
+            log_audit_batch(cursor, audit_entries)
+
+        conn.commit()
+
+        if updated:
+            _user_changed()
 
         return updated
 
@@ -418,6 +578,7 @@ def update_user_status(emp_id, new_status, modified_by='ADMIN'):
         conn.commit()
 
         updated = cursor.rowcount > 0
+        _user_changed()
 
         if updated:
             try:
@@ -490,6 +651,7 @@ def delete_user_by_id(emp_id, modified_by='ADMIN'):
         conn.commit()
 
         deleted = cursor.rowcount > 0
+        _user_changed()
 
         if deleted:
             try:
@@ -562,7 +724,8 @@ def resign_user(emp_id, modified_by='ADMIN'):
         cursor.close()
         cursor = conn.cursor()
 
-        _ensure_resigned_status_supported(cursor)
+        # Normally done at startup; only runs here if that failed
+        ensure_user_schema()
 
         cursor.execute("""
             UPDATE employee
@@ -579,6 +742,7 @@ def resign_user(emp_id, modified_by='ADMIN'):
         conn.commit()
 
         updated = cursor.rowcount > 0
+        _user_changed()
 
         if updated:
             try:
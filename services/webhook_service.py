@@ -4,28 +4,16 @@ from services.leads_service import (
     _generate_id,
     _check_duplicate_phone,
     _get_or_create_customer,
+    DuplicateLeadError,
     add_new_lead
 )
 from services.notification_service import create_notification
+from services.lead_assignment_service import assign_next_employee
 from services.re_enquiry_service import notify_admin_owned_reenquiry
 
 logger = logging.getLogger(__name__)
 
 
-def _ensure_assignment_tracker_table(cursor):
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS lead_assignment_tracker (
-            project_id VARCHAR(150) PRIMARY KEY,
-            last_emp_id VARCHAR(150) NULL,
-            updated_on DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-            CONSTRAINT fk_lead_assignment_tracker_project
-                FOREIGN KEY (project_id) REFERENCES project_registration(project_id),
-            CONSTRAINT fk_lead_assignment_tracker_emp
-                FOREIGN KEY (last_emp_id) REFERENCES employee(emp_id)
-        )
-    """)
-
-
 def _find_source_by_name(cursor, source_name):
     """Find a lead source by name, or return a default."""
     if not source_name:
@@ -90,62 +78,29 @@ def _get_default_status(cursor):
     return result["status_id"] if result else None
 
 
-def _auto_assign_employee(cursor, project_id=None):
+def _auto_assign_employee(project_id=None):
     """
-    Auto-assign a sales exec project-wise in round robin alphabetical order.
+    Auto-assign a sales exec project-wise (round robin alphabetical order by
+    default, see LEAD_ASSIGNMENT_STRATEGY).
     Only active SALES_EXEC users mapped to the selected project are eligible.
     """
-    if not project_id:
-        raise ValueError("Project is required for automatic lead assignment")
-
-    _ensure_assignment_tracker_table(cursor)
-
-    cursor.execute("""
-        SELECT
-            e.emp_id,
-            TRIM(CONCAT(e.emp_first_name, ' ', IFNULL(e.emp_last_name, ''))) AS full_name
-        FROM employee_project_mapping epm
-        JOIN employee e ON epm.emp_id = e.emp_id
-        WHERE epm.project_id = %s
-          AND epm.is_active = 1
-          AND e.emp_status = 'Active'
-          AND e.role_id = 'SALES_EXEC'
-        ORDER BY e.emp_first_name ASC, e.emp_last_name ASC, e.emp_id ASC
-    """, (project_id,))
-    eligible_employees = cursor.fetchall()
-
-    if not eligible_employees:
-        raise ValueError("No active sales executives are mapped to this project")
-
-    cursor.execute("""
-        SELECT last_emp_id
-        FROM lead_assignment_tracker
-        WHERE project_id = %s
-    """, (project_id,))
-    tracker = cursor.fetchone()
-    last_emp_id = tracker["last_emp_id"] if tracker else None
-
-    employee_ids = [employee["emp_id"] for employee in eligible_employees]
-
-    if last_emp_id in employee_ids:
-        last_index = employee_ids.index(last_emp_id)
-        next_index = (last_index + 1) % len(employee_ids)
-    else:
-        next_index = 0
-
-    next_emp_id = employee_ids[next_index]
-    return next_emp_id
-
-
-def _update_assignment_tracker(cursor, project_id, emp_id):
-    _ensure_assignment_tracker_table(cursor)
-    cursor.execute("""
-        INSERT INTO lead_assignment_tracker (project_id, last_emp_id)
-        VALUES (%s, %s)
-        ON DUPLICATE KEY UPDATE
-            last_emp_id = VALUES(last_emp_id),
-            updated_on = CURRENT_TIMESTAMP
-    """, (project_id, emp_id))
+    return assign_next_employee(project_id)
+
+
+def _duplicate_result(cursor, phone, source_name, message):
+    admin_reenquiry = notify_admin_owned_reenquiry(
+        cursor,
+        phone,
+        source_name or "Webhook",
+        None
+    )
+    logger.info(f"Webhook duplicate lead: {message}")
+    return {
+        "status": "duplicate",
+        "message": message,
+        "admin_owned_reenquiry": bool(admin_reenquiry),
+        "admin_owned_lead_id": admin_reenquiry["lead_id"] if admin_reenquiry else None
+    }
 
 
 def process_webhook_lead(data):
@@ -184,19 +139,7 @@ def process_webhook_lead(data):
         try:
             _check_duplicate_phone(cursor, phone)
         except ValueError as e:
-            admin_reenquiry = notify_admin_owned_reenquiry(
-                cursor,
-                phone,
-                source_name or "Webhook",
-                None
-            )
-            logger.info(f"Webhook duplicate lead: {e}")
-            return {
-                "status": "duplicate",
-                "message": str(e),
-                "admin_owned_reenquiry": bool(admin_reenquiry),
-                "admin_owned_lead_id": admin_reenquiry["lead_id"] if admin_reenquiry else None
-            }
+            return _duplicate_result(cursor, phone, source_name, str(e))
 
         # Match source
         source_id = _find_source_by_name(cursor, source_name)
@@ -225,7 +168,7 @@ def process_webhook_lead(data):
             raise ValueError("No lead statuses configured in the system")
 
         # Auto-assign employee
-        emp_id = _auto_assign_employee(cursor, project_id)
+        emp_id = _auto_assign_employee(project_id)
 
         # Build lead data for existing add_new_lead function
         lead_data = {
@@ -241,8 +184,13 @@ def process_webhook_lead(data):
 
         # Use the existing lead creation (which handles customer, audit, notifications)
         # We pass actor_id as the assigned emp and role as ADMIN to bypass visibility checks
-        lead_id = add_new_lead(lead_data, actor_id=emp_id, role="ADMIN")
-        _update_assignment_tracker(cursor, project_id, emp_id)
+        try:
+            lead_id = add_new_lead(lead_data, actor_id=emp_id, role="ADMIN")
+        except DuplicateLeadError as e:
+            # A concurrent request created this phone's lead between our
+            # duplicate check and insert; the unique index settled the race.
+            return _duplicate_result(cursor, phone, source_name, str(e))
+
         db.commit()
 
         logger.info(
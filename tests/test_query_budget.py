@@ -0,0 +1,92 @@
+"""
+The query budget plugin, exercised through inner pytest runs. Queries go
+through db.ProfiledCursor over a fake cursor, so no database is needed.
+"""
+import os
+
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FAKE_CURSOR = '''
+from db import ProfiledCursor, current_profile
+
+
+class FakeCursor:
+    def execute(self, operation, params=None):
+        return None
+
+
+def run_queries(count):
+    cursor = ProfiledCursor(FakeCursor(), current_profile.get())
+    for lead_id in range(count):
+        cursor.execute("SELECT * FROM leads WHERE lead_id = %s", (lead_id,))
+'''
+
+
+@pytest.fixture
+def inner(pytester):
+    pytester.syspathinsert(PROJECT_ROOT)
+    pytester.makeconftest('pytest_plugins = ["utils.pytest_query_budget"]')
+    pytester.makepyfile(fake_queries=FAKE_CURSOR)
+    return pytester
+
+
+def test_marker_budget_fails_when_exceeded(inner):
+    inner.makepyfile(test_marker='''
+        import pytest
+        from fake_queries import run_queries
+
+        @pytest.mark.query_budget(max_queries=2)
+        def test_over_budget():
+            run_queries(3)
+
+        @pytest.mark.query_budget(max_queries=3)
+        def test_within_budget():
+            run_queries(3)
+    ''')
+
+    result = inner.runpytest_inprocess()
+
+    result.assert_outcomes(passed=1, failed=1)
+    result.stdout.fnmatch_lines([
+        "*test test_over_budget: 3 queries, budget 2*",
+        "*SELECT * FROM leads WHERE lead_id = ?*",
+    ])
+
+
+def test_ini_endpoint_budget_fails_when_exceeded(inner):
+    inner.makeini('''
+        [pytest]
+        query_budgets =
+            GET /leads 2
+    ''')
+    inner.makepyfile(test_endpoint='''
+        from flask import Flask
+        from utils.request_profiler import init_request_profiling
+        from fake_queries import run_queries
+
+        app = Flask(__name__)
+        init_request_profiling(app)
+
+        @app.route("/leads")
+        def leads():
+            run_queries(3)
+            return "ok"
+
+        @app.route("/projects")
+        def projects():
+            run_queries(3)
+            return "ok"
+
+        def test_endpoint_over_budget():
+            assert app.test_client().get("/leads").status_code == 200
+
+        def test_endpoint_without_budget():
+            assert app.test_client().get("/projects").status_code == 200
+    ''')
+
+    result = inner.runpytest_inprocess()
+
+    result.assert_outcomes(passed=1, failed=1)
+    result.stdout.fnmatch_lines(["*GET /leads: 3 queries, budget 2*"])
@@ -0,0 +1,181 @@
+"""
+Response compression (brotli when the `brotli` package is installed and
+the client accepts it, gzip otherwise).
+
+Buffered responses are compressed only above COMPRESSION_MIN_BYTES.
+Streamed responses (CSV exports, json_stream_response) are always
+compressed, chunk by chunk: output is flushed to the client at least
+every COMPRESSION_FLUSH_BYTES of input so downloads keep moving.
+"""
+import os
+import time
+import zlib
+import threading
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency, gzip only
+    brotli = None
+
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+FLUSH_BYTES = int(os.getenv("COMPRESSION_FLUSH_BYTES", str(64 * 1024)))
+COMPRESSIBLE_MIMETYPES = {
+    mimetype.strip()
+    for mimetype in os.getenv(
+        "COMPRESSION_MIMETYPES",
+        "application/json,text/csv,text/plain,text/html,application/javascript,text/css",
+    ).split(",")
+    if mimetype.strip()
+}
+
+_stats_lock = threading.Lock()
+_stats = {}     # encoding -> {"responses", "bytes_in", "bytes_out", "cpu_seconds"}
+
+
+def _record(encoding, bytes_in, bytes_out, cpu_seconds):
+    with _stats_lock:
+        entry = _stats.setdefault(encoding, {"responses": 0, "bytes_in": 0, "bytes_out": 0, "cpu_seconds": 0.0})
+        entry["responses"] += 1
+        entry["bytes_in"] += bytes_in
+        entry["bytes_out"] += bytes_out
+        entry["cpu_seconds"] += cpu_seconds
+
+
+def get_compression_stats():
+    with _stats_lock:
+        stats = {encoding: dict(entry) for encoding, entry in _stats.items()}
+    for entry in stats.values():
+        entry["ratio"] = round(entry["bytes_in"] / entry["bytes_out"], 2) if entry["bytes_out"] else None
+    return stats
+
+
+def render_compression_metrics():
+    """Prometheus lines for /metrics."""
+    stats = get_compression_stats()
+    lines = []
+    for metric, key, kind, help_text in (
+        ("http_compressed_responses_total", "responses", "counter", "Responses compressed."),
+        ("http_compression_bytes_in_total", "bytes_in", "counter", "Bytes before compression."),
+        ("http_compression_bytes_out_total", "bytes_out", "counter", "Bytes after compression."),
+        ("http_compression_cpu_seconds_total", "cpu_seconds", "counter", "CPU time spent compressing."),
+    ):
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} {kind}"]
+        for encoding, entry in sorted(stats.items()):
+            lines.append(f'{metric}{{encoding="{encoding}"}} {entry[key]}')
+    return "\n".join(lines) + "\n"
+
+
+# -------------------------
+# Compressors
+# -------------------------
+class _Gzip:
+    encoding = "gzip"
+
+    def __init__(self):
+        self._obj = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._obj.compress(data)
+
+    def flush(self):
+        return self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._obj.flush(zlib.Z_FINISH)
+
+
+class _Brotli:
+    encoding = "br"
+
+    def __init__(self):
+        self._obj = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data):
+        return self._obj.process(data)
+
+    def flush(self):
+        return self._obj.flush()
+
+    def finish(self):
+        return self._obj.finish()
+
+
+def _choose_compressor():
+    accepted = request.accept_encodings
+    if brotli is not None and accepted["br"]:
+        return _Brotli()
+    if accepted["gzip"]:
+        return _Gzip()
+    return None
+
+
+def _compress_stream(chunks, compressor):
+    bytes_in = bytes_out = pending = 0
+    cpu = 0.0
+    try:
+        for chunk in chunks:
+            if not chunk:
+                continue
+            started = time.thread_time()
+            out = compressor.compress(chunk)
+            bytes_in += len(chunk)
+            pending += len(chunk)
+            if pending >= FLUSH_BYTES:
+                out += compressor.flush()
+                pending = 0
+            cpu += time.thread_time() - started
+            if out:
+                bytes_out += len(out)
+                yield out
+
+        started = time.thread_time()
+        out = compressor.finish()
+        cpu += time.thread_time() - started
+        bytes_out += len(out)
+        yield out
+    finally:
+        _record(compressor.encoding, bytes_in, bytes_out, cpu)
+
+
+def compress_response(response):
+    if (
+        response.status_code < 200
+        or response.status_code in (204, 304)
+        or response.direct_passthrough
+        or "Content-Encoding" in response.headers
+        or "Range" in request.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+    ):
+        return response
+
+    response.vary.add("Accept-Encoding")
+
+    if not response.is_streamed and (response.content_length or 0) < MIN_BYTES:
+        return response
+
+    compressor = _choose_compressor()
+    if compressor is None:
+        return response
+
+    if response.is_streamed:
+        response.response = _compress_stream(response.iter_encoded(), compressor)
+        response.headers.pop("Content-Length", None)
+    else:
+        data = response.get_data()
+        started = time.thread_time()
+        compressed = compressor.compress(data) + compressor.finish()
+        _record(compressor.encoding, len(data), len(compressed), time.thread_time() - started)
+        response.set_data(compressed)
+
+    response.headers["Content-Encoding"] = compressor.encoding
+    return response
+
+
+def init_compression(app):
+    if COMPRESSION_ENABLED:
+        app.after_request(compress_response)
@@ -0,0 +1,181 @@
+"""
+Fast JSON output for large list responses.
+
+FastJSONProvider   Flask JSON provider backed by orjson when it is installed,
+                   falling back to the stdlib provider. Output matches
+                   Flask's default (HTTP dates, Decimal as string, sorted keys).
+field / RowMapper  Column-oriented row mapping: the key plan is built once
+                   per result set and each column converted in one pass.
+json_stream_response
+                   Streams a row iterator out as a JSON array (optionally
+                   inside an envelope such as {"success": true, "data": [...]})
+                   without building the whole list in memory.
+"""
+import logging
+from itertools import islice
+from operator import itemgetter
+
+from flask import Response, current_app
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency, stdlib json is used instead
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+STREAM_CHUNK_ROWS = 500
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    orjson serialises str/int/float/list/dict/UUID/dataclasses natively;
+    datetimes are passed through to Flask's default() so they keep the
+    HTTP-date format the frontend already parses.
+    """
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None:
+            return super().dumps(obj, **kwargs)
+
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if kwargs.get("sort_keys", self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get("indent"):
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(obj, default=self.default, option=option).decode()
+        except (TypeError, orjson.JSONEncodeError):
+            # e.g. integers beyond 64 bits; the stdlib encoder copes
+            return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+
+# -------------------------
+# Row mapping
+# -------------------------
+def field(name, key=None, convert=None, default=None):
+    """
+    Describes one output key.
+    key      - source column, or a tuple of columns (first truthy wins);
+               defaults to name
+    convert  - applied to non-None values, e.g. a datetime formatter
+    default  - used when the value is falsy (mirrors `row.get(k) or default`)
+    """
+    return {"name": name, "key": key or name, "convert": convert, "default": default}
+
+
+class RowMapper:
+    """
+    Maps dict rows to response dicts column by column. With no fields every
+    column is kept; `convert` maps column names to converters applied on top.
+    """
+
+    def __init__(self, fields=None, convert=None):
+        self.fields = fields
+        self.convert = convert or {}
+
+    def _plan(self, row):
+        if self.fields is None:
+            return [field(name, convert=self.convert.get(name)) for name in row]
+        return self.fields
+
+    def _column(self, rows, keys, present):
+        keys = keys if isinstance(keys, tuple) else (keys,)
+        columns = [
+            list(map(itemgetter(key), rows)) if key in present else [None] * len(rows)
+            for key in keys
+        ]
+        if len(columns) == 1:
+            return columns[0]
+        merged = columns[0]
+        for extra in columns[1:]:
+            merged = [a or b for a, b in zip(merged, extra)]
+        return merged
+
+    def map(self, rows):
+        if not rows:
+            return []
+        rows = rows if isinstance(rows, list) else list(rows)
+        present = rows[0].keys()
+        plan = self._plan(rows[0])
+
+        names = []
+        columns = []
+        for spec in plan:
+            values = self._column(rows, spec["key"], present)
+            if spec["convert"] is not None:
+                convert = spec["convert"]
+                values = [convert(v) if v is not None else v for v in values]
+            if spec["default"] is not None:
+                default = spec["default"]
+                values = [v or default for v in values]
+            names.append(spec["name"])
+            columns.append(values)
+
+        return [dict(zip(names, values)) for values in zip(*columns)]
+
+
+def map_rows(rows, fields=None, convert=None):
+    return RowMapper(fields, convert).map(rows)
+
+
+# -------------------------
+# Streaming
+# -------------------------
+def _encode_chunks(rows, mapper, dumps):
+    while True:
+        chunk = list(islice(rows, STREAM_CHUNK_ROWS))
+        if not chunk:
+            return
+        if mapper is not None:
+            chunk = mapper.map(chunk)
+        # One encoder call per chunk; drop its brackets to splice into the array
+        yield dumps(chunk)[1:-1]
+
+
+def json_stream_response(rows, mapper=None, envelope=None, key="data", status=200):
+    """
+    Stream `rows` as a JSON array, or as envelope[key] inside `envelope`.
+    The first row is fetched before returning so a failing query still
+    raises here (and can become a normal error response) rather than
+    mid-stream.
+    """
+    rows = iter(rows)
+    first = next(rows, None)
+    dumps = current_app.json.dumps
+
+    if envelope is not None:
+        head = dumps({**envelope, key: []})
+        # Splice the array in where the empty placeholder sits
+        marker = dumps({key: []})[1:-1]
+        prefix, suffix = head.split(marker, 1)
+        prefix += marker[:-1]
+        suffix = "]" + suffix
+    else:
+        prefix, suffix = "[", "]"
+
+    def generate():
+        yield prefix
+        if first is not None:
+            separator = ""
+            for encoded in _encode_chunks(_prepend(first, rows), mapper, dumps):
+                yield separator + encoded
+                separator = ","
+        yield suffix
+
+    return Response(generate(), status=status, mimetype="application/json")
+
+
+def _prepend(first, rest):
+    yield first
+    try:
+        yield from rest
+    except Exception:
+        logger.exception("JSON stream aborted after partial output")
+        raise
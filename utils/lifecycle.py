@@ -0,0 +1,42 @@
+"""
+Process lifecycle for the web workers: drain state for the readiness probe
+and orderly shutdown of the background threads this process started.
+"""
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+_draining = threading.Event()
+
+
+def begin_drain():
+    """Fail readiness so the load balancer stops routing new requests here."""
+    if not _draining.is_set():
+        logger.info("Draining: readiness now reports 503")
+    _draining.set()
+
+
+def is_draining():
+    return _draining.is_set()
+
+
+def shutdown_background_work():
+    """Stop the scheduler, leader election, queue workers and pools, best effort."""
+    from db import close_pools
+    from services.mcube_ingest_service import stop_mcube_workers
+    from services.scheduler_lock_service import stop_leader_election
+    from services.scheduler_service import scheduler
+
+    steps = (
+        ("scheduler", lambda: scheduler.running and scheduler.shutdown(wait=False)),
+        # Hand leadership over now rather than when the lock connection times out
+        ("leader election", stop_leader_election),
+        ("mcube workers", lambda: stop_mcube_workers(timeout=5)),
+        ("db pools", close_pools),
+    )
+    for name, step in steps:
+        try:
+            step()
+        except Exception as e:
+            logger.warning(f"Stopping {name} failed: {e}")
@@ -0,0 +1,143 @@
+"""
+pytest plugin: fail tests that run more SQL than they are allowed to.
+
+Registered for the whole suite by the root conftest.py
+(`pytest_plugins = ["utils.pytest_query_budget"]`); tests/test_query_budget.py
+covers it.
+
+Per-endpoint budgets, checked for every request a test makes through the
+Flask test client (route template as registered, so path params stay
+as <lead_id> etc.):
+
+    [pytest]
+    query_budgets =
+        GET /api/leads 8
+        POST /api/leads/bulk-status 12
+    # optional: fail any request/job repeating one statement shape this often
+    query_budget_max_repeats = 10
+
+Per-test budgets:
+
+    @pytest.mark.query_budget(max_queries=5, max_repeats=2, max_checkouts=1)
+    def test_lead_list(client): ...
+
+    def test_transfer(query_budget):
+        with query_budget(max_queries=4):
+            transfer_leads(...)
+
+Failures list the offending statement shapes with their call sites.
+"""
+from contextlib import contextmanager
+
+import pytest
+
+from utils import request_profiler
+from utils.request_profiler import (
+    RequestProfile,
+    add_profile_listener,
+    remove_profile_listener,
+    profile_block,
+)
+from db import current_profile
+
+
+def pytest_addoption(parser):
+    parser.addini("query_budgets", type="linelist", default=[],
+                  help="'METHOD /route max_queries' per line")
+    parser.addini("query_budget_max_repeats", default="",
+                  help="fail any request or job running one statement shape more often than this")
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "query_budget(max_queries=None, max_repeats=None, max_checkouts=None): "
+        "fail the test if it exceeds these SQL budgets",
+    )
+    # Call sites make the failure reports actionable
+    request_profiler.N_PLUS_ONE_DETECTION = True
+
+    budgets = {}
+    for line in config.getini("query_budgets"):
+        method, route, limit = line.split()
+        budgets[f"{method.upper()} {route}"] = int(limit)
+    config._query_budgets = budgets
+
+    max_repeats = config.getini("query_budget_max_repeats")
+    config._query_budget_max_repeats = int(max_repeats) if max_repeats else None
+
+
+def _describe(findings):
+    lines = []
+    for finding in findings:
+        lines.append(f"  {finding['calls']}x {finding['statement'][:300]}")
+        lines += [f"      {calls}x from {site}" for site, calls in finding["call_sites"]]
+    return "\n".join(lines)
+
+
+def check_budget(label, profile, max_queries=None, max_repeats=None, max_checkouts=None):
+    """Problems with `profile` against the given limits, as readable strings."""
+    problems = []
+    if max_queries is not None and profile.query_count > max_queries:
+        problems.append(
+            f"{label}: {profile.query_count} queries, budget {max_queries}\n"
+            + _describe(profile.repeated_statements(threshold=1))
+        )
+    if max_repeats is not None:
+        findings = profile.repeated_statements(threshold=max_repeats + 1)
+        if findings:
+            problems.append(f"{label}: statement repeated more than {max_repeats} times\n" + _describe(findings))
+    if max_checkouts is not None and profile.checkouts > max_checkouts:
+        sites = "\n".join(f"      {calls}x from {site}" for site, calls in profile.checkout_sites.most_common(5))
+        problems.append(f"{label}: {profile.checkouts} connection checkouts, budget {max_checkouts}\n{sites}")
+    return problems
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    config = item.config
+    problems = []
+
+    def on_profile_closed(label, profile):
+        if not profile.request_scoped and not label.startswith("job "):
+            return
+        problems.extend(check_budget(
+            label, profile,
+            max_queries=config._query_budgets.get(label),
+            max_repeats=config._query_budget_max_repeats,
+        ))
+
+    add_profile_listener(on_profile_closed)
+    try:
+        with profile_block(f"test {item.nodeid}") as profile:
+            result = yield
+    finally:
+        remove_profile_listener(on_profile_closed)
+
+    marker = item.get_closest_marker("query_budget")
+    if marker is not None and profile is not None:
+        problems.extend(check_budget(f"test {item.name}", profile, **marker.kwargs))
+
+    if problems:
+        pytest.fail("Query budget exceeded:\n" + "\n\n".join(problems), pytrace=False)
+    return result
+
+
+@pytest.fixture
+def query_budget():
+    """Context manager asserting a block stays within a query budget."""
+
+    @contextmanager
+    def budget(max_queries=None, max_repeats=None, max_checkouts=None):
+        profile = RequestProfile(parent=current_profile.get())
+        token = current_profile.set(profile)
+        try:
+            yield profile
+        finally:
+            current_profile.reset(token)
+
+        problems = check_budget("block", profile, max_queries, max_repeats, max_checkouts)
+        if problems:
+            pytest.fail("Query budget exceeded:\n" + "\n\n".join(problems), pytrace=False)
+
+    return budget
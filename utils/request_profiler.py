@@ -0,0 +1,573 @@
+"""
+Per-request profiling: wall time, DB time, query count, rows fetched, pool
+wait and the slowest statements of every request, aggregated per endpoint
+for /metrics (Prometheus text format).
+
+Optional extras, all off by default:
+    SERVER_TIMING_ENABLED=true   adds a Server-Timing header
+    PROFILE_SAMPLING=true        samples the stacks of requests in flight and
+                                 dumps requests slower than PROFILE_SLOW_REQUEST_MS
+                                 to PROFILE_DUMP_DIR as folded stacks (feed to
+                                 flamegraph.pl / speedscope)
+    QUERY_N_PLUS_ONE_DETECTION=true
+                                 dev/test: warn when one request or scheduled job
+                                 runs the same statement shape, or checks out a
+                                 connection, N_PLUS_ONE_THRESHOLD times or more,
+                                 with the call sites responsible
+"""
+import os
+import re
+import sys
+import time
+import sysconfig
+import heapq
+import random
+import logging
+import threading
+import traceback
+from collections import Counter
+from contextlib import contextmanager
+from functools import lru_cache
+
+from flask import request
+
+from db import current_profile, get_pool_stats, HISTOGRAM_BUCKETS
+
+logger = logging.getLogger(__name__)
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "true").lower() == "true"
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "false").lower() == "true"
+SLOW_REQUEST_MS = float(os.getenv("PROFILE_SLOW_REQUEST_MS", "1000"))
+TOP_STATEMENTS = int(os.getenv("PROFILE_TOP_STATEMENTS", "5"))
+MAX_TRACKED_STATEMENTS = int(os.getenv("PROFILE_MAX_TRACKED_STATEMENTS", "200"))
+
+SAMPLING_ENABLED = os.getenv("PROFILE_SAMPLING", "false").lower() == "true"
+SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "1.0"))
+SAMPLE_INTERVAL_SECONDS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5")) / 1000
+DUMP_DIR = os.getenv("PROFILE_DUMP_DIR", "profiles")
+
+N_PLUS_ONE_DETECTION = os.getenv("QUERY_N_PLUS_ONE_DETECTION", "false").lower() == "true"
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "5"))
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Frames in these files are plumbing, not the code that issued the query
+_PLUMBING_FILES = {os.path.join(PROJECT_ROOT, "db.py"), os.path.abspath(__file__)}
+_LIBRARY_PATHS = tuple({sysconfig.get_paths()["stdlib"], sysconfig.get_paths()["purelib"]})
+
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+# -------------------------
+# SQL normalisation
+# -------------------------
+_COMMENT = re.compile(r"/\*.*?\*/|--[^\n]*", re.S)
+_STRING = re.compile(r"'(?:[^'\\]|\\.)*'")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_TUPLE = r"\(\s*\?(?:\s*,\s*\?)*\s*\)"
+_VALUES_LIST = re.compile(rf"({_TUPLE})(?:\s*,\s*{_TUPLE})+")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def normalize_sql(statement):
+    """
+    Collapse a statement to its shape so calls differing only in literals,
+    IN-list length or row count aggregate together.
+    """
+    if isinstance(statement, (bytes, bytearray)):
+        statement = statement.decode("utf-8", "replace")
+    sql = _COMMENT.sub(" ", statement)
+    sql = _STRING.sub("?", sql)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _VALUES_LIST.sub(r"\1, ...", sql)
+    sql = _IN_LIST.sub("(...)", sql)
+    return _WHITESPACE.sub(" ", sql).strip()[:400]
+
+
+# -------------------------
+# Request profile
+# -------------------------
+def _call_site():
+    """
+    Innermost frame outside the DB/profiling plumbing, the standard library
+    and installed packages; frames in this project win.
+    """
+    fallback = None
+    for frame in reversed(traceback.extract_stack(limit=40)):
+        filename = os.path.abspath(frame.filename)
+        if filename in _PLUMBING_FILES or filename.startswith(_LIBRARY_PATHS) or "site-packages" in filename:
+            continue
+        if filename.startswith(PROJECT_ROOT):
+            return f"{os.path.relpath(filename, PROJECT_ROOT)}:{frame.lineno} in {frame.name}"
+        if fallback is None:
+            fallback = f"{filename}:{frame.lineno} in {frame.name}"
+    return fallback or "unknown"
+
+
+class RequestProfile:
+    """
+    Query counters for one request or job. A profile opened while another
+    is active (a request inside a test's query budget, say) forwards
+    everything to that parent as well.
+    """
+
+    def __init__(self, parent=None):
+        self.parent = parent
+        self.request_scoped = False
+        self.started = time.perf_counter()
+        self.db_seconds = 0.0
+        self.fetch_seconds = 0.0
+        self.pool_wait_seconds = 0.0
+        self.query_count = 0
+        self.rows = 0
+        self.checkouts = 0
+        self.statements = {}
+        self.call_sites = {}        # raw statement -> Counter of call sites
+        self.checkout_sites = Counter()
+        self.samples = Counter() if _should_sample() else None
+
+    # Called from db.ProfiledCursor / db._checkout
+    def record_query(self, statement, elapsed, site=None):
+        if site is None and N_PLUS_ONE_DETECTION:
+            site = _call_site()
+
+        self.db_seconds += elapsed
+        self.query_count += 1
+        entry = self.statements.get(statement)
+        if entry is None:
+            self.statements[statement] = [1, elapsed, elapsed]
+        else:
+            entry[0] += 1
+            entry[1] += elapsed
+            entry[2] = max(entry[2], elapsed)
+        if site is not None:
+            self.call_sites.setdefault(statement, Counter())[site] += 1
+
+        if self.parent is not None:
+            self.parent.record_query(statement, elapsed, site)
+
+    def record_fetch(self, elapsed):
+        self.db_seconds += elapsed
+        self.fetch_seconds += elapsed
+        if self.parent is not None:
+            self.parent.record_fetch(elapsed)
+
+    def record_rows(self, count):
+        self.rows += count
+        if self.parent is not None:
+            self.parent.record_rows(count)
+
+    def record_pool_wait(self, elapsed, site=None):
+        if site is None and N_PLUS_ONE_DETECTION:
+            site = _call_site()
+
+        self.pool_wait_seconds += elapsed
+        self.checkouts += 1
+        if site is not None:
+            self.checkout_sites[site] += 1
+
+        if self.parent is not None:
+            self.parent.record_pool_wait(elapsed, site)
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def normalized_statements(self):
+        """{normalised_sql: [calls, seconds, max_seconds]} for this request."""
+        merged = {}
+        for statement, (calls, seconds, slowest) in self.statements.items():
+            entry = merged.setdefault(normalize_sql(statement), [0, 0.0, 0.0])
+            entry[0] += calls
+            entry[1] += seconds
+            entry[2] = max(entry[2], slowest)
+        return merged
+
+    def top_statements(self, n=TOP_STATEMENTS):
+        return heapq.nlargest(n, self.normalized_statements().items(), key=lambda item: item[1][1])
+
+    def repeated_statements(self, threshold=None):
+        """
+        Statement shapes run at least `threshold` times, most repeated first:
+        [{"statement", "calls", "call_sites": [(site, calls), ...]}]
+        """
+        threshold = N_PLUS_ONE_THRESHOLD if threshold is None else threshold
+        shapes = {}
+        for statement, (calls, _, _) in self.statements.items():
+            shape = shapes.setdefault(normalize_sql(statement), {"calls": 0, "call_sites": Counter()})
+            shape["calls"] += calls
+            shape["call_sites"].update(self.call_sites.get(statement, {}))
+
+        return sorted(
+            (
+                {"statement": sql, "calls": shape["calls"], "call_sites": shape["call_sites"].most_common(3)}
+                for sql, shape in shapes.items()
+                if shape["calls"] >= threshold
+            ),
+            key=lambda finding: finding["calls"],
+            reverse=True,
+        )
+
+
+# -------------------------
+# Aggregated metrics
+# -------------------------
+_metrics_lock = threading.Lock()
+_request_counts = Counter()     # (method, endpoint, status) -> requests
+_request_durations = {}         # (method, endpoint) -> histogram
+_endpoint_db = {}               # (method, endpoint) -> totals
+_statement_totals = {}          # normalised sql -> [calls, seconds, max]
+
+
+def _new_histogram(buckets):
+    return {"count": 0, "sum": 0.0, "buckets": {bucket: 0 for bucket in buckets}}
+
+
+def _record_request(method, endpoint, status, profile, wall):
+    statements = profile.normalized_statements()
+
+    with _metrics_lock:
+        _request_counts[(method, endpoint, status)] += 1
+
+        histogram = _request_durations.setdefault((method, endpoint), _new_histogram(REQUEST_BUCKETS))
+        histogram["count"] += 1
+        histogram["sum"] += wall
+        for bucket in REQUEST_BUCKETS:
+            if wall <= bucket:
+                histogram["buckets"][bucket] += 1
+
+        totals = _endpoint_db.setdefault(
+            (method, endpoint),
+            {"db_seconds": 0.0, "queries": 0, "rows": 0, "pool_wait_seconds": 0.0},
+        )
+        totals["db_seconds"] += profile.db_seconds
+        totals["queries"] += profile.query_count
+        totals["rows"] += profile.rows
+        totals["pool_wait_seconds"] += profile.pool_wait_seconds
+
+        for sql, (calls, seconds, slowest) in statements.items():
+            entry = _statement_totals.get(sql)
+            if entry is None:
+                if len(_statement_totals) >= MAX_TRACKED_STATEMENTS:
+                    continue
+                entry = _statement_totals[sql] = [0, 0.0, 0.0]
+            entry[0] += calls
+            entry[1] += seconds
+            entry[2] = max(entry[2], slowest)
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{key}="{_label(value)}"' for key, value in labels.items()) + "}"
+
+
+def _histogram_lines(name, histogram, buckets, **labels):
+    lines = []
+    for bucket in buckets:
+        lines.append(f"{name}_bucket{_labels(**labels, le=bucket)} {histogram['buckets'][bucket]}")
+    lines.append(f"{name}_bucket{_labels(**labels, le='+Inf')} {histogram['count']}")
+    lines.append(f"{name}_sum{_labels(**labels)} {histogram['sum']:.6f}")
+    lines.append(f"{name}_count{_labels(**labels)} {histogram['count']}")
+    return lines
+
+
+def render_metrics():
+    """Everything collected so far, in Prometheus text exposition format."""
+    with _metrics_lock:
+        request_counts = dict(_request_counts)
+        durations = {key: {**h, "buckets": dict(h["buckets"])} for key, h in _request_durations.items()}
+        endpoint_db = {key: dict(totals) for key, totals in _endpoint_db.items()}
+        statements = {sql: list(entry) for sql, entry in _statement_totals.items()}
+
+    lines = [
+        "# HELP http_requests_total HTTP requests handled.",
+        "# TYPE http_requests_total counter",
+    ]
+    for (method, endpoint, status), count in sorted(request_counts.items()):
+        lines.append(f"http_requests_total{_labels(method=method, endpoint=endpoint, status=status)} {count}")
+
+    lines += [
+        "# HELP http_request_duration_seconds Wall time per request.",
+        "# TYPE http_request_duration_seconds histogram",
+    ]
+    for (method, endpoint), histogram in sorted(durations.items()):
+        lines += _histogram_lines("http_request_duration_seconds", histogram, REQUEST_BUCKETS, method=method, endpoint=endpoint)
+
+    for metric, key, help_text in (
+        ("http_request_db_seconds_total", "db_seconds", "Time spent executing and fetching SQL."),
+        ("http_request_db_queries_total", "queries", "SQL statements executed."),
+        ("http_request_db_rows_total", "rows", "Rows fetched."),
+        ("http_request_db_pool_wait_seconds_total", "pool_wait_seconds", "Time spent waiting for a pooled connection."),
+    ):
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+        for (method, endpoint), totals in sorted(endpoint_db.items()):
+            value = totals[key]
+            lines.append(f"{metric}{_labels(method=method, endpoint=endpoint)} {value:.6f}" if isinstance(value, float)
+                         else f"{metric}{_labels(method=method, endpoint=endpoint)} {value}")
+
+    lines += [
+        "# HELP sql_statement_calls_total Executions per normalised statement.",
+        "# TYPE sql_statement_calls_total counter",
+    ]
+    for sql, (calls, _, _) in statements.items():
+        lines.append(f"sql_statement_calls_total{_labels(statement=sql)} {calls}")
+    lines += [
+        "# HELP sql_statement_seconds_total Execution time per normalised statement.",
+        "# TYPE sql_statement_seconds_total counter",
+    ]
+    for sql, (_, seconds, _) in statements.items():
+        lines.append(f"sql_statement_seconds_total{_labels(statement=sql)} {seconds:.6f}")
+    lines += [
+        "# HELP sql_statement_max_seconds Slowest single execution per normalised statement.",
+        "# TYPE sql_statement_max_seconds gauge",
+    ]
+    for sql, (_, _, slowest) in statements.items():
+        lines.append(f"sql_statement_max_seconds{_labels(statement=sql)} {slowest:.6f}")
+
+    pool = get_pool_stats()
+    lines += [
+        "# HELP db_pool_connections_in_use Connections checked out of the primary pool.",
+        "# TYPE db_pool_connections_in_use gauge",
+        f"db_pool_connections_in_use {pool['in_use']}",
+        "# HELP db_pool_size Configured primary pool size.",
+        "# TYPE db_pool_size gauge",
+        f"db_pool_size {pool['pool_size']}",
+    ]
+    for key in ("checkouts", "timeouts", "errors", "overflow_checkouts", "replica_checkouts", "replica_fallbacks"):
+        lines += [f"# TYPE db_pool_{key}_total counter", f"db_pool_{key}_total {pool[key]}"]
+    for key in ("wait_seconds", "hold_seconds"):
+        name = f"db_pool_{key}"
+        histogram = pool[key]
+        lines.append(f"# TYPE {name} histogram")
+        for bucket in HISTOGRAM_BUCKETS:
+            lines.append(f"{name}_bucket{_labels(le=bucket)} {histogram['buckets'][str(bucket)]}")
+        lines.append(f"{name}_bucket{_labels(le='+Inf')} {histogram['count']}")
+        lines.append(f"{name}_sum {histogram['sum']}")
+        lines.append(f"{name}_count {histogram['count']}")
+
+    return "\n".join(lines) + "\n"
+
+
+# -------------------------
+# Sampling profiler
+# -------------------------
+_sampled_threads = {}   # thread id -> RequestProfile
+_sampler_lock = threading.Lock()
+_sampler_thread = None
+
+
+def _should_sample():
+    return SAMPLING_ENABLED and random.random() < SAMPLE_RATE
+
+
+def _collapse(frame):
+    stack = []
+    while frame is not None and len(stack) < 64:
+        code = frame.f_code
+        stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(stack))
+
+
+def _sampler_loop():
+    while True:
+        time.sleep(SAMPLE_INTERVAL_SECONDS)
+        with _sampler_lock:
+            targets = list(_sampled_threads.items())
+        if not targets:
+            continue
+        frames = sys._current_frames()
+        for thread_id, profile in targets:
+            frame = frames.get(thread_id)
+            if frame is not None:
+                profile.samples[_collapse(frame)] += 1
+
+
+def _start_sampling(profile):
+    global _sampler_thread
+    with _sampler_lock:
+        _sampled_threads[threading.get_ident()] = profile
+        if _sampler_thread is None:
+            _sampler_thread = threading.Thread(target=_sampler_loop, name="request-sampler", daemon=True)
+            _sampler_thread.start()
+
+
+def _stop_sampling():
+    with _sampler_lock:
+        _sampled_threads.pop(threading.get_ident(), None)
+
+
+def _dump_samples(profile, method, endpoint, wall):
+    if not profile.samples:
+        return None
+    os.makedirs(DUMP_DIR, exist_ok=True)
+    name = re.sub(r"[^A-Za-z0-9]+", "_", endpoint).strip("_") or "root"
+    path = os.path.join(DUMP_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{method}-{name}-{int(wall * 1000)}ms.folded")
+    with open(path, "w") as f:
+        for stack, count in profile.samples.most_common():
+            f.write(f"{stack} {count}\n")
+    return path
+
+
+# -------------------------
+# N+1 detection
+# -------------------------
+_profile_listeners = []
+
+
+def add_profile_listener(listener):
+    """listener(label, profile) is called as each request or job profile closes."""
+    _profile_listeners.append(listener)
+
+
+def remove_profile_listener(listener):
+    if listener in _profile_listeners:
+        _profile_listeners.remove(listener)
+
+
+def _profile_closed(label, profile):
+    if N_PLUS_ONE_DETECTION:
+        report_n_plus_one(label, profile)
+    for listener in list(_profile_listeners):
+        try:
+            listener(label, profile)
+        except Exception as e:
+            logger.error(f"Profile listener failed: {e}")
+
+
+def report_n_plus_one(label, profile, threshold=None):
+    threshold = N_PLUS_ONE_THRESHOLD if threshold is None else threshold
+    findings = profile.repeated_statements(threshold)
+    lines = [
+        f"    {finding['calls']}x {finding['statement'][:200]}\n"
+        + "".join(f"        {calls}x from {site}\n" for site, calls in finding["call_sites"])
+        for finding in findings
+    ]
+    if profile.checkouts >= threshold:
+        lines.append(
+            f"    {profile.checkouts} connection checkouts\n"
+            + "".join(f"        {calls}x from {site}\n" for site, calls in profile.checkout_sites.most_common(3))
+        )
+    if lines:
+        logger.warning(f"Possible N+1 in {label}:\n" + "".join(lines).rstrip())
+    return findings
+
+
+@contextmanager
+def profile_block(label):
+    """
+    Profile DB use outside a request (scheduled jobs, scripts). Only active
+    with N+1 detection on or inside an enclosing profile, so production
+    jobs run unwrapped.
+    """
+    parent = current_profile.get()
+    if not N_PLUS_ONE_DETECTION and parent is None:
+        yield None
+        return
+
+    profile = RequestProfile(parent=parent)
+    token = current_profile.set(profile)
+    try:
+        yield profile
+    finally:
+        current_profile.reset(token)
+        _profile_closed(label, profile)
+
+
+# -------------------------
+# Flask wiring
+# -------------------------
+def _endpoint():
+    # Route template, not the raw path, to keep label cardinality bounded
+    return request.url_rule.rule if request.url_rule is not None else "unmatched"
+
+
+def _finish(profile, method, endpoint, status):
+    wall = profile.elapsed()
+    if profile.samples is not None:
+        _stop_sampling()
+
+    _record_request(method, endpoint, status, profile, wall)
+    _profile_closed(f"{method} {endpoint}", profile)
+
+    if wall * 1000 < SLOW_REQUEST_MS:
+        return
+
+    top = "\n".join(
+        f"    {seconds * 1000:8.1f} ms  x{calls:<4} {sql[:200]}"
+        for sql, (calls, seconds, _) in profile.top_statements()
+    )
+    dump = _dump_samples(profile, method, endpoint, wall) if profile.samples is not None else None
+    logger.warning(
+        f"Slow request {method} {endpoint} -> {status}: {wall * 1000:.0f} ms, "
+        f"db {profile.db_seconds * 1000:.0f} ms over {profile.query_count} queries, "
+        f"{profile.rows} rows, pool wait {profile.pool_wait_seconds * 1000:.0f} ms"
+        + (f"\n{top}" if top else "")
+        + (f"\n    profile: {dump}" if dump else "")
+    )
+
+
+def _server_timing(profile):
+    return (
+        f"app;dur={profile.elapsed() * 1000:.1f}, "
+        f"db;dur={profile.db_seconds * 1000:.1f};desc=\"{profile.query_count} queries\", "
+        f"pool;dur={profile.pool_wait_seconds * 1000:.1f}"
+    )
+
+
+def _reset_profile(token):
+    if token is None:
+        return
+    try:
+        current_profile.reset(token)
+    except ValueError:
+        # Token from another context (e.g. the body was sent elsewhere)
+        current_profile.set(None)
+
+
+def init_request_profiling(app):
+    if not PROFILING_ENABLED:
+        return
+
+    @app.before_request
+    def start_request_profile():
+        # A request profile left behind on this thread is never a parent
+        parent = current_profile.get()
+        profile = RequestProfile(parent=None if parent is None or parent.request_scoped else parent)
+        profile.request_scoped = True
+        request.environ["presales.profile"] = profile
+        request.environ["presales.profile_token"] = current_profile.set(profile)
+        if profile.samples is not None:
+            _start_sampling(profile)
+
+    @app.after_request
+    def finish_request_profile(response):
+        profile = request.environ.get("presales.profile")
+        if profile is None:
+            return response
+
+        if SERVER_TIMING_ENABLED:
+            response.headers["Server-Timing"] = _server_timing(profile)
+
+        method, endpoint, status = request.method, _endpoint(), response.status_code
+        if response.is_streamed:
+            # Streamed exports keep querying after this point; record once sent
+            token = request.environ.pop("presales.profile_token", None)
+
+            def finish_streamed():
+                _finish(profile, method, endpoint, status)
+                _reset_profile(token)
+
+            response.call_on_close(finish_streamed)
+        else:
+            _finish(profile, method, endpoint, status)
+        return response
+
+    @app.teardown_request
+    def reset_request_profile(exc):
+        _reset_profile(request.environ.pop("presales.profile_token", None))
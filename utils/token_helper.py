@@ -1,6 +1,6 @@
 import jwt
 from flask import request
-from config import PUBLIC_KEY, JWT_ISSUER, JWT_AUDIENCE
+from config import get_public_key, JWT_ISSUER, JWT_AUDIENCE
 import logging
 
 logger = logging.getLogger(__name__)
@@ -33,7 +33,7 @@ def get_emp_id_from_token():
         if JWT_AUDIENCE:
             decode_kwargs["audience"] = JWT_AUDIENCE
 
-        payload = jwt.decode(token, PUBLIC_KEY, **decode_kwargs)
+        payload = jwt.decode(token, get_public_key(), **decode_kwargs)
         emp_id = payload.get("sub")
         logger.info(f"Token decoded successfully for emp_id={emp_id}")
         return emp_id
@@ -68,7 +68,7 @@ def get_emp_role_from_token():
         if JWT_AUDIENCE:
             decode_kwargs["audience"] = JWT_AUDIENCE
 
-        payload = jwt.decode(token, PUBLIC_KEY, **decode_kwargs)
+        payload = jwt.decode(token, get_public_key(), **decode_kwargs)
 
         role = payload.get("role_type")   # 👈 This must exist in your JWT
         logger.info(f"Token role extracted: {role}")
@@ -0,0 +1,138 @@
+import tempfile
+from datetime import date, datetime
+from decimal import Decimal
+
+# openpyxl is imported on first export; it is slow to import and most
+# processes never build a workbook
+Workbook = WriteOnlyCell = Font = get_column_letter = None
+
+
+XLSX_MIMETYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+DATETIME_FORMAT = "yyyy-mm-dd hh:mm:ss"
+DATE_FORMAT = "yyyy-mm-dd"
+CHUNK_SIZE = 64 * 1024
+
+
+def column(header, key, kind="text", width=None):
+    """
+    Describes one export column.
+    key   - row dict key, or a callable taking the row
+    kind  - 'text', 'number', 'date' or 'datetime' (controls the cell type)
+    """
+    return {"header": header, "key": key, "kind": kind, "width": width}
+
+
+def _parse_datetime(value):
+    if isinstance(value, (datetime, date)):
+        return value
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+
+
+def _to_number(value):
+    if isinstance(value, (int, float)):
+        return value
+    if isinstance(value, Decimal):
+        return float(value)
+    try:
+        text = str(value).strip()
+        return float(text) if "." in text else int(text)
+    except ValueError:
+        return None
+
+
+def _cell(sheet, col, row):
+    key = col["key"]
+    value = key(row) if callable(key) else row.get(key)
+
+    if value is None or value == "":
+        return None
+
+    kind = col["kind"]
+
+    if kind in ("date", "datetime"):
+        parsed = _parse_datetime(value)
+        if parsed is None:
+            return str(value)
+        cell = WriteOnlyCell(sheet, value=parsed)
+        is_date_only = kind == "date" or not isinstance(parsed, datetime)
+        cell.number_format = DATE_FORMAT if is_date_only else DATETIME_FORMAT
+        return cell
+
+    if kind == "number":
+        number = _to_number(value)
+        return number if number is not None else str(value)
+
+    return str(value).strip()
+
+
+def _load_openpyxl():
+    global Workbook, WriteOnlyCell, Font, get_column_letter
+    if Workbook is None:
+        try:
+            from openpyxl import Workbook
+            from openpyxl.cell import WriteOnlyCell
+            from openpyxl.styles import Font
+            from openpyxl.utils import get_column_letter
+        except ImportError:  # pragma: no cover - optional dependency for xlsx export
+            raise ValueError("XLSX export requires openpyxl to be installed on the backend")
+
+
+def build_xlsx(columns, rows, sheet_title="Report", preamble=None):
+    """
+    Writes `rows` (any iterable of dicts, typically a server-side cursor
+    generator) into a write-only workbook. Rows are flushed to disk as they
+    are appended, so memory stays flat regardless of the row count.
+
+    Returns an open temporary file positioned at the start of the .xlsx data.
+    """
+    _load_openpyxl()
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=sheet_title[:31])
+
+    for index, col in enumerate(columns):
+        if col.get("width"):
+            letter = get_column_letter(index + 1)
+            sheet.column_dimensions[letter].width = col["width"]
+
+    bold = Font(bold=True)
+
+    for line in preamble or []:
+        sheet.append(line)
+    if preamble:
+        sheet.append([])
+
+    header_cells = []
+    for col in columns:
+        cell = WriteOnlyCell(sheet, value=col["header"])
+        cell.font = bold
+        header_cells.append(cell)
+    sheet.append(header_cells)
+
+    for row in rows:
+        sheet.append([_cell(sheet, col, row) for col in columns])
+
+    output = tempfile.TemporaryFile()
+    try:
+        workbook.save(output)
+        output.seek(0)
+    except Exception:
+        output.close()
+        raise
+    return output
+
+
+def iter_file_chunks(file_obj, chunk_size=CHUNK_SIZE):
+    """Stream a file in chunks and close it once fully read."""
+    try:
+        while True:
+            chunk = file_obj.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        file_obj.close()